@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+from helper_functions import determine_date_positions, slice_date_range
+
+# the ideal work-day has 12 hours of something productive (see "time_spent_plot" in plotting_functions.py)
+ideal_total_minutes = 12 * 60
+
+
+# 1. rolling averages
+class RollingAverages:
+    # rolling averages of a daily series for any window size, based on cumulative sums
+    # (a window's sum is the difference of two cumulative sums, so each window size costs O(n),
+    # and the windows offered in the app are computed once when the data is loaded)
+
+    def __init__(self, pandas_series, windows=(7, 30, 90)):
+        self.series = pandas_series
+        self.windows = tuple(windows)
+
+        values = pandas_series.values.astype(float)
+        is_missing = np.isnan(values)
+        self._cumulative_sums = np.concatenate(([0.0], np.cumsum(np.where(is_missing, 0.0, values))))
+        self._cumulative_missing = np.concatenate(([0], np.cumsum(is_missing)))
+
+        self._rolling_averages = {window: self._compute(window) for window in self.windows}
+
+    def determine_rolling_average(self, window, start_date=None, end_date=None):
+        # same result as pandas_series.rolling(window).mean()
+        # (optionally only for the days from "start_date" to "end_date", then only those days are computed)
+        if window in self._rolling_averages:
+            return slice_date_range(self._rolling_averages[window], start_date, end_date)
+
+        first_position, last_position = determine_date_positions(self.series.index, start_date, end_date)
+        return self._compute(window, first_position, last_position)
+
+    def _compute(self, window, first_position=0, last_position=None):
+        # rolling average of the values from "first_position" up to (excluding) "last_position"
+        if last_position is None:
+            last_position = len(self.series)
+        ends = np.arange(max(first_position, window - 1), last_position) + 1
+        starts = ends - window
+
+        averages = np.full(last_position - first_position, np.nan)
+        if len(ends) > 0:
+            window_sums = self._cumulative_sums[ends] - self._cumulative_sums[starts]
+            has_missing_values = (self._cumulative_missing[ends] - self._cumulative_missing[starts]) > 0
+            averages[ends - 1 - first_position] = np.where(has_missing_values, np.nan, window_sums / window)
+
+        return pd.Series(averages, index=self.series.index[first_position:last_position], name=self.series.name)
+
+    def extend(self, pandas_series):
+        # rolling averages for the series with the days in "pandas_series" appended
+        # (returns a new object, the rolling averages of the existing days are reused)
+        extended = RollingAverages.__new__(RollingAverages)
+        extended.series = pd.concat([self.series, pandas_series])
+        extended.windows = self.windows
+
+        values = pandas_series.values.astype(float)
+        is_missing = np.isnan(values)
+        extended._cumulative_sums = np.concatenate(
+            (self._cumulative_sums, self._cumulative_sums[-1] + np.cumsum(np.where(is_missing, 0.0, values))))
+        extended._cumulative_missing = np.concatenate(
+            (self._cumulative_missing, self._cumulative_missing[-1] + np.cumsum(is_missing)))
+
+        first_new_position = len(self.series)
+        extended._rolling_averages = {}
+        for window in self.windows:
+            new_averages = extended._compute(window, first_position=first_new_position)
+            extended._rolling_averages[window] = pd.concat([self._rolling_averages[window], new_averages])
+
+        return extended
+
+
+# 2. aggregates that are shown in the plots
+# (computed once per dataset, so that they can be served by the API as well, see api_functions.py)
+def determine_monthly_views(df_youtube_kpis):
+    monthly_views = df_youtube_kpis["views"].resample("M").sum()
+    monthly_views = monthly_views[:-1]      # exclude last month because it's not a full month
+
+    return monthly_views
+
+
+# 3. time spent per day and task
+class DailyTaskMinutes:
+    # minutes spent on each task per day as a dense array (one row per day since the first tracked day,
+    # one column per task), built once when the data is loaded and extended when time entries are appended
+    # (without the ideal schedule, days without time tracking are 0)
+
+    def __init__(self, df_time_tracking, tasks=()):
+        self.tasks = sorted(tasks)
+        self.first_date = None
+        self.minutes = np.zeros((0, len(self.tasks)), dtype=np.int32)
+        self._add(df_time_tracking)
+
+    def extend(self, df_time_tracking):
+        # table with the time entries in "df_time_tracking" added
+        # (returns a new object, like RollingAverages.extend)
+        extended = DailyTaskMinutes.__new__(DailyTaskMinutes)
+        extended.tasks = list(self.tasks)
+        extended.first_date = self.first_date
+        extended.minutes = self.minutes.copy()
+        extended._add(df_time_tracking)
+
+        return extended
+
+    def _add(self, df):
+        df = df[df.ideal_schedule == False]
+        if len(df) == 0:
+            return
+
+        # 3.1 new tasks get a new column
+        task_names = np.asarray(df.Task, dtype=object)
+        new_tasks = sorted(set(task_names) - set(self.tasks))
+        if new_tasks:
+            self.tasks = self.tasks + new_tasks
+            self.minutes = np.pad(self.minutes, ((0, 0), (0, len(new_tasks))), "constant")
+
+        # 3.2 new days get a new row
+        # (also days before the first day, then the table is shifted)
+        days = df.Date.values.astype("datetime64[D]").astype(np.int64)       # days since 1970-01-01
+        if self.first_date is None:
+            self.first_date = pd.Timestamp(days.min(), unit="D")
+        day_offsets = days - self.first_date.to_datetime64().astype("datetime64[D]").astype(np.int64)
+        if day_offsets.min() < 0:
+            n_days_before = -day_offsets.min()
+            self.minutes = np.pad(self.minutes, ((n_days_before, 0), (0, 0)), "constant")
+            self.first_date = self.first_date - pd.Timedelta(days=n_days_before)
+            day_offsets = day_offsets + n_days_before
+        if day_offsets.max() >= len(self.minutes):
+            self.minutes = np.pad(self.minutes, ((0, day_offsets.max() + 1 - len(self.minutes)), (0, 0)), "constant")
+
+        # 3.3 add the durations (several time entries can belong to the same day and task)
+        task_positions = pd.Index(self.tasks).get_indexer(task_names)
+        np.add.at(self.minutes, (day_offsets, task_positions), df.Duration.values)
+
+    @property
+    def dates(self):
+        if self.first_date is None:
+            return pd.DatetimeIndex([], name="Date")
+        return pd.date_range(self.first_date, periods=len(self.minutes), freq="D", name="Date")
+
+    # 3.4 aggregates
+    def get_days(self, date, n_days=1):
+        # minutes per task of "n_days" days, starting at "date"
+        minutes = np.zeros(len(self.tasks), dtype=np.int32)
+        if self.first_date is not None:
+            first_offset = (pd.Timestamp(date).normalize() - self.first_date).days
+            first_offset, last_offset = max(first_offset, 0), max(first_offset + n_days, 0)
+            minutes = minutes + self.minutes[first_offset:last_offset].sum(axis=0, dtype=np.int32)
+
+        return pd.Series(minutes, index=self.tasks)
+
+    def determine_percentages(self, ideal_total_minutes=ideal_total_minutes):
+        # total time spent per day as percentage of the ideal
+        return pd.Series(self.minutes.sum(axis=1) / ideal_total_minutes, index=self.dates, name="Duration")
+
+    def determine_rollup(self, frequency):
+        # minutes per task and week ("W") or month ("M")
+        df = pd.DataFrame(self.minutes, index=self.dates, columns=self.tasks)
+
+        return df.resample(frequency).sum()
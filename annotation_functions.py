@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+
+# vectorized helper functions for the markers and hovertexts of the plots
+# (they work on all dates/values of a trace at once instead of looping over every single point)
+
+# 1. weekends
+def determine_weekends(dates):
+    dates = pd.DatetimeIndex(dates)
+    day_of_week = dates.dayofweek
+
+    return np.asarray(day_of_week >= 5)     # 5 = Saturday, 6 = Sunday
+
+
+def create_marker_colors(dates, marker_color):
+    # indicating weekends with "hollow" markers
+    # (background color of plot is #F5F6F9)
+    is_weekend = determine_weekends(dates)
+
+    return np.where(is_weekend, "#F5F6F9", marker_color)
+
+
+def create_day_labels(dates):
+    is_weekend = determine_weekends(dates)
+
+    return np.where(is_weekend, "Weekend", "Workday")
+
+
+# 2. hovertexts
+def join_hovertext(*parts):
+    # concatenate strings and arrays of strings element-wise
+    hovertext = np.asarray(parts[0]).astype(str)
+    for part in parts[1:]:
+        hovertext = np.char.add(hovertext, np.asarray(part).astype(str))
+
+    return hovertext
+
+
+def format_values(format_string, values):
+    # element-wise "%"-formatting, e.g. format_values("%02.0f", [5.0, 12.0]) -> ["05", "12"]
+    # (always an array of strings, also when "values" is empty)
+    values = np.asarray(values)
+
+    return np.char.mod(format_string, values).astype(str)
+
+
+def create_duration_hovertext(dates, total_minutes):
+    # e.g. "Workday<br>4h 05min"
+    total_minutes = np.asarray(total_minutes, dtype=float)
+    hours = total_minutes // 60
+    minutes = total_minutes - hours * 60
+
+    return join_hovertext(create_day_labels(dates), "<br>",
+                          format_values("%.0f", hours), "h ",
+                          format_values("%02.0f", minutes), "min")
+
+
+def create_percentage_hovertext(dates, float_values, ideal_hours):
+    # e.g. "Weekend<br>40%: 4h 48min"
+    float_values = np.asarray(float_values, dtype=float)
+    percentages = np.round(float_values * 100)
+
+    total_time_spent = float_values * ideal_hours
+    hours_spent = np.trunc(total_time_spent)
+    minutes_spent = (total_time_spent - hours_spent) * 60
+
+    return join_hovertext(create_day_labels(dates), "<br>",
+                          format_values("%.0f", percentages), "%: ",
+                          format_values("%d", hours_spent), "h ",
+                          format_values("%02.0f", minutes_spent), "min")
+
+
+def create_value_hovertext(dates, values, unit):
+    # e.g. "Workday<br>91.3kg" (missing values are shown as "Workday<br>kg")
+    values = np.asarray(values, dtype=object)
+    value_texts = format_values("%s", values)
+    value_texts[pd.isnull(values)] = ""
+
+    return join_hovertext(create_day_labels(dates), "<br>", value_texts, unit)
+
+
+def create_seconds_hovertext(total_seconds):
+    # e.g. "2min 05s" (missing values, e.g. rounds that weren't done, get an empty text)
+    total_seconds = np.asarray(total_seconds, dtype=float)
+    is_missing = np.isnan(total_seconds)
+    total_seconds = np.where(is_missing, 0, total_seconds)
+    minutes = total_seconds // 60
+    seconds = total_seconds - minutes * 60
+
+    hovertext = join_hovertext(format_values("%d", minutes), "min ",
+                               format_values("%02d", seconds), "s")
+    hovertext[is_missing] = ""
+
+    return hovertext
@@ -0,0 +1,165 @@
+import json
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import flask
+
+from helper_functions import convert_dates, slice_date_range
+
+try:
+    import pyarrow
+except ImportError:     # only needed for "format=arrow"
+    pyarrow = None
+
+arrow_mimetype = "application/vnd.apache.arrow.stream"
+
+
+# 1. errors
+class QueryError(Exception):
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+# 2. endpoints
+class QueryAPI:
+    # read-only endpoints for the series behind the plots (so that they don't have to be scraped from the figures):
+    # - GET /api/deep-work?window=7                rolling average of deep work (in minutes)
+    # - GET /api/time-spent                        time spent per day as percentage of the ideal
+    # - GET /api/time-spent/rollup?frequency=W     minutes per task and week ("W") or month ("M")
+    # - GET /api/youtube/monthly-views             views per month
+    # - GET /api/habits/streaks                    current and longest streak and completion rate of every habit
+    # - GET /api/habits/<habit>/runs               start and length of every streak of a habit
+    # the series can be restricted with "start" and/or "end" (e.g. "2019-01-31", both inclusive),
+    # other tenants than the default one are selected with "tenant" (see tenant_functions.py)
+    # and the response is columnar JSON ("format=json", default) or an Arrow stream ("format=arrow")
+    # (everything is served from aggregates that are computed when the data is loaded, see "create_dataset" in app.py)
+
+    def __init__(self, determine_dataset):
+        self.determine_dataset = determine_dataset      # tenant name (None: default tenant) -> Dataset
+
+    def init_app(self, server, url_prefix="/api"):
+        endpoints = [
+            ("/deep-work", "deep_work", self.get_deep_work),
+            ("/time-spent", "time_spent", self.get_time_spent),
+            ("/time-spent/rollup", "time_spent_rollup", self.get_time_spent_rollup),
+            ("/youtube/monthly-views", "monthly_views", self.get_monthly_views),
+            ("/habits/streaks", "habit_streaks", self.get_habit_streaks),
+            ("/habits/<habit>/runs", "habit_runs", self.get_habit_runs),
+        ]
+        for rule, endpoint, get_table in endpoints:
+            server.add_url_rule(url_prefix + rule, "api_" + endpoint, self._create_view(get_table))
+
+    def _create_view(self, get_table):
+        def view(**view_args):
+            try:
+                dataset = self._determine_dataset()
+                df = get_table(dataset, **view_args)
+                if isinstance(df.index, pd.DatetimeIndex):
+                    df = slice_date_range(df, _parse_date("start"), _parse_date("end"))
+
+                return create_response(df, flask.request.args.get("format", "json"))
+            except QueryError as error:
+                return _create_error_response(error.status_code, error.message)
+
+        return view
+
+    def _determine_dataset(self):
+        tenant_name = flask.request.args.get("tenant")
+        try:
+            return self.determine_dataset(tenant_name)
+        except KeyError:
+            raise QueryError(404, "unknown tenant: {}".format(tenant_name))
+
+    # 2.1 tables
+    # (data frames with the dates as index, if the data is a time series)
+    def get_deep_work(self, dataset):
+        try:
+            window = int(flask.request.args.get("window", 7))
+        except ValueError:
+            raise QueryError(400, "window has to be a number of days")
+        if window < 1:
+            raise QueryError(400, "window has to be at least 1 day")
+
+        rolling_average = dataset.deep_work_averages.determine_rolling_average(window).dropna()
+
+        return rolling_average.to_frame("rolling_average")
+
+    def get_time_spent(self, dataset):
+        return dataset.time_spent_percentages.to_frame("percentage_of_ideal").rename_axis("date")
+
+    def get_time_spent_rollup(self, dataset):
+        frequency = flask.request.args.get("frequency", "W")
+        if frequency not in ("W", "M"):
+            raise QueryError(400, "frequency has to be W (weeks) or M (months)")
+
+        return dataset.daily_task_minutes.determine_rollup(frequency).rename_axis("date")
+
+    def get_monthly_views(self, dataset):
+        return dataset.monthly_views.to_frame("views")
+
+    def get_habit_streaks(self, dataset):
+        return dataset.habit_statistics.rename_axis("habit")
+
+    def get_habit_runs(self, dataset, habit):
+        if habit not in dataset.streak_tracker.habits:
+            raise QueryError(404, "unknown habit: {}".format(habit))
+
+        df_runs = dataset.streak_tracker.determine_runs(habit)
+
+        return df_runs.set_index("start")
+
+
+# 3. date ranges
+# (resolved with a binary search on the sorted dates, see "slice_date_range" in helper_functions.py)
+def _parse_date(name):
+    value = flask.request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return pd.Timestamp(value)
+    except ValueError:
+        raise QueryError(400, "{} has to be a date, e.g. 2019-01-31".format(name))
+
+
+# 4. responses
+def create_response(df, response_format):
+    df = df.reset_index()
+    if response_format == "json":
+        body = json.dumps(to_columns(df), separators=(",", ":"))
+        return flask.Response(body, mimetype="application/json")
+
+    if response_format == "arrow":
+        if pyarrow is None:
+            raise QueryError(406, "format=arrow requires pyarrow")
+        table = pyarrow.Table.from_pandas(df, preserve_index=False)
+        sink = pyarrow.BufferOutputStream()
+        writer = pyarrow.RecordBatchStreamWriter(sink, table.schema)
+        writer.write_table(table)
+        writer.close()
+        return flask.Response(sink.getvalue().to_pybytes(), mimetype=arrow_mimetype)
+
+    raise QueryError(400, "format has to be json or arrow")
+
+
+def to_columns(df):
+    # {"date": ["2019-01-01", ...], "views": [...]}
+    # (dates as "YYYY-MM-DD" and missing values as null)
+    columns = OrderedDict()
+    for column in df.columns:
+        values = df[column].values
+        if np.issubdtype(values.dtype, np.datetime64):
+            columns[column] = convert_dates(values).tolist()
+        elif values.dtype.kind == "f":
+            columns[column] = np.where(np.isnan(values), None, values).tolist()
+        else:
+            columns[column] = values.tolist()
+
+    return columns
+
+
+def _create_error_response(status_code, message):
+    return flask.Response(json.dumps({"error": message}), status=status_code, mimetype="application/json")
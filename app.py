@@ -1,10 +1,15 @@
+import os
+import json
+from urllib.parse import urlparse
 import numpy as np
 import pandas as pd
 
+import flask
+import plotly
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 
 from plotting_functions import (
     deep_work_plot,
@@ -14,45 +19,181 @@ from plotting_functions import (
     weight_plot,
     wim_hof_breathing_plot,
     youtube_kpi_plot,
+    tasks_color_key,
 )
 
-from helper_functions import determine_current_streak
+from helper_functions import TimeTrackingIndex, determine_x_range, slice_date_range
+from streak_functions import StreakTracker
+from aggregation_functions import DailyTaskMinutes, RollingAverages, determine_monthly_views
+from api_functions import QueryAPI
+from caching_functions import FigureCache, PageCache
+from metrics_functions import CallbackMetrics
+from http_functions import CallbackETags, PreserializedResponses
+from data_functions import DataReloader, Dataset, determine_loaded_data_version, determine_n_appended_rows, load_data
+from sheets_functions import FakeSheetsSession, SheetsClient, SheetsDataSource, create_sheets_client
+from tenant_functions import TenantRegistry, TenantState, load_tenant_config
+from image_functions import ImageService
 
 # 1.  load data
-df_youtube_kpis = pd.read_csv("data/youtube_kpis.csv", index_col="date", parse_dates=["date"])
-df_video_uploads_2018 = pd.read_csv("data/video_uploads_2018.csv", index_col="date", parse_dates=["date"])
-df_video_uploads_2019 = pd.read_csv("data/video_uploads_2019.csv", index_col="date", parse_dates=["date"])
-df_deep_work = pd.read_csv("data/deep_work.csv", parse_dates=["date"], index_col="date")
-df_habits = pd.read_csv("data/habits.csv", index_col="date", parse_dates=["date"])
-df_breathing = pd.read_csv("data/wim_hof_breathing.csv", index_col="date", parse_dates=["date"])
-
-df_time_tracking = pd.read_csv("data/time_tracking.csv", parse_dates=["Start", "Finish", "Date"])
-df_time_tracking.Duration = pd.to_timedelta(df_time_tracking.Duration)
-
-df_weight = pd.read_csv("data/weight.csv", index_col="date", parse_dates=["date"])
-end_date = "2019-05-31"
-start_date = "2019-09-24"
-df_weight_old = df_weight.loc[:end_date]
-df_weight_new = df_weight.loc[start_date:]
+# (from the CSV files in "data/" or from Google Sheets, see sheets_functions.py)
+# this is the data of the default tenant, the data of the other tenants is loaded when it is requested (see 3.2)
+data_dir = "data"
+tenants_dir = os.environ.get("TENANTS_DIR", "tenants")
+image_dir = "images"        # photos for the weight page, named after the day on which they were taken
+tenant_memory_budget = int(os.environ.get("TENANT_MEMORY_BUDGET", 512)) * 1024 ** 2     # in MB
+config = load_tenant_config("config.json")      # name and goals, see tenant_functions.py
+data_source = os.environ.get("DATA_SOURCE", "csv")     # "csv", "sheets" or "fake-sheets" (offline stand-in)
+reload_interval = int(os.environ.get("DATA_RELOAD_INTERVAL", 60))   # in seconds, 0 disables reloading
+
+if data_source == "csv":
+    # (CSV files are only parsed once, afterwards they are loaded from a binary cache, see data_functions.py)
+    # (the data version and the reloader start from the state of the files that were parsed, see 3.2)
+    data, file_states = load_data(data_dir)
+    data_version = determine_loaded_data_version(data_dir, file_states)
+else:
+    if data_source == "sheets":
+        sheets_client = create_sheets_client(os.environ["SHEETS_SPREADSHEET_KEY"], os.environ["SHEETS_CREDENTIALS_FILE"])
+    else:
+        sheets_client = SheetsClient("fake", session=FakeSheetsSession.from_data_dir("fake", data_dir))
+    sheets_data_source = SheetsDataSource(sheets_client, ttl=reload_interval)
+    data = sheets_data_source.load()
+    data_version = sheets_data_source.version
+
+rolling_average_windows = [7, 30, 90]   # offered in the app (any other window can be entered, too)
+habits = ["self_discipline", "cold_shower", "omad", "lucid_dreaming", "ab_workout"]     # shown on the pages
+
+# 1.1 data and derived values are kept together in an immutable dataset
+# (when the data is reloaded, a new dataset is created and swapped in, see 3.2)
+def create_dataset(data, data_version, previous_dataset=None, config=config):
+    df_habits = data["habits"]
+    missing_habits = [habit for habit in habits if habit not in df_habits.columns]
+    if missing_habits:
+        raise ValueError("habits.csv has no column for the habits {}".format(", ".join(missing_habits)))
+    streak_tracker = create_streak_tracker(df_habits, previous_dataset)
+    df_time_tracking = data["time_tracking"]
+    daily_task_minutes = create_daily_task_minutes(df_time_tracking, previous_dataset)
+    df_video_uploads_2018 = data["video_uploads_2018"]
+    df_video_uploads_2019 = data["video_uploads_2019"]
+
+    # (the weight was tracked with two different approaches, see "default_config" in tenant_functions.py)
+    df_weight = data["weight"]
+    if config["weight_old_approach_end_date"] is None:
+        df_weight_old = df_weight.iloc[:0]
+    else:
+        df_weight_old = slice_date_range(df_weight, end_date=config["weight_old_approach_end_date"])
+    df_weight_new = slice_date_range(df_weight, start_date=config["weight_new_approach_start_date"])
+
+    # (calendars of the habits start on the first day of the data, unless a date is configured)
+    first_date_habits = df_habits.index[0].strftime("%Y-%m-%d") if len(df_habits) > 0 else None
+    habit_calendar_start_dates = {habit: config["habit_calendar_start_dates"].get(habit, first_date_habits)
+                                  for habit in habits}
+
+    n_uploaded_videos_2018 = df_video_uploads_2018.values.sum()
+    n_uploaded_videos_2019 = df_video_uploads_2019.values.sum()
+
+    return Dataset(
+        data_version,
+        config=config,
+        goals=config["goals"],
+
+        df_youtube_kpis=data["youtube_kpis"],
+        df_video_uploads_2018=df_video_uploads_2018,
+        df_video_uploads_2019=df_video_uploads_2019,
+        df_deep_work=data["deep_work"],
+        deep_work_averages=create_deep_work_averages(data["deep_work"], previous_dataset),
+        df_habits=df_habits,
+        df_breathing=data["breathing"],
+        df_time_tracking=df_time_tracking,
+        daily_task_minutes=daily_task_minutes,
+        time_tracking_index=TimeTrackingIndex(df_time_tracking, tasks=tasks_color_key.keys(),
+                                              daily_task_minutes=daily_task_minutes),
+        df_weight_old=df_weight_old,
+        df_weight_new=df_weight_new,
+        habit_calendar_start_dates=habit_calendar_start_dates,
+
+        most_recent_date_time_tracking=df_time_tracking.Date.iloc[-1],
+        most_recent_date_weight_old=determine_most_recent_date(df_weight_old),
+        most_recent_date_weight_new=determine_most_recent_date(df_weight_new),
+
+        n_uploaded_videos_2018=n_uploaded_videos_2018,
+        n_uploaded_videos_2019=n_uploaded_videos_2019,
+        n_uploaded_videos_total=n_uploaded_videos_2018 + n_uploaded_videos_2019,
+
+        # aggregates (also served by the API, see 3.3)
+        time_spent_percentages=daily_task_minutes.determine_percentages(),
+        monthly_views=determine_monthly_views(data["youtube_kpis"]),
+        habit_statistics=streak_tracker.determine_statistics(),
+
+        streak_tracker=streak_tracker,
+        ab_workout_streak=streak_tracker.current_streak("ab_workout"),
+        cold_shower_streak=streak_tracker.current_streak("cold_shower"),
+        self_discipline_streak=streak_tracker.current_streak("self_discipline"),
+        lucid_dreaming_streak=streak_tracker.current_streak("lucid_dreaming"),
+        omad_streak=streak_tracker.current_streak("omad")
+    )
+
+
+def determine_most_recent_date(df):
+    # (None if there is no data, e.g. if a tenant has no weights of the old approach)
+    df = df.dropna()
+    if len(df) == 0:
+        return None
+
+    return df.index[-1]
+
+
+def create_hover_data(date):
+    # hover data of a plot that shows the photo/schedule of "date" when the page is opened
+    if date is None:
+        return None
+
+    return {"points": [{"x": date}]}
 
-# 2. set some variables
-header_image_source = "https://raw.githubusercontent.com/SebastianMantey/Personal_Dashboard/master/images/header%20image.png"
-header_image_height = 38
-header_image_width = 0.926 * header_image_height # preserving aspect ratio of image
 
-most_recent_date_time_tracking = df_time_tracking.Date.iloc[-1]
-most_recent_date_weight_old = df_weight_old.dropna().index[-1]
-most_recent_date_weight_new = df_weight_new.dropna().index[-1]
+def create_streak_tracker(df_habits, previous_dataset=None):
+    # if days were only appended to the habits, the streaks of the previous dataset are updated
+    # (the tracker is copied, since the previous dataset must not change)
+    if previous_dataset is not None:
+        n_new_days = determine_n_appended_rows(df_habits, previous_dataset.df_habits)
+        if n_new_days == 0:
+            return previous_dataset.streak_tracker
+        if n_new_days is not None:
+            streak_tracker = previous_dataset.streak_tracker.copy()
+            streak_tracker.append_days(df_habits.iloc[-n_new_days:])
+            return streak_tracker
 
-n_uploaded_videos_2018 = df_video_uploads_2018.values.sum()
-n_uploaded_videos_2019 = df_video_uploads_2019.values.sum()
-n_uploaded_videos_total = n_uploaded_videos_2018 + n_uploaded_videos_2019
+    return StreakTracker(df_habits)
 
-ab_workout_streak = determine_current_streak(df_habits.ab_workout)
-cold_shower_streak = determine_current_streak(df_habits.cold_shower)
-self_discipline_streak = determine_current_streak(df_habits.self_discipline)
-lucid_dreaming_streak = determine_current_streak(df_habits.lucid_dreaming)
-omad_streak = determine_current_streak(df_habits.omad)
+
+def create_deep_work_averages(df_deep_work, previous_dataset=None):
+    # if days were only appended, the rolling averages of the previous dataset are extended
+    if previous_dataset is not None:
+        n_new_days = determine_n_appended_rows(df_deep_work, previous_dataset.df_deep_work)
+        if n_new_days == 0:
+            return previous_dataset.deep_work_averages
+        if n_new_days is not None:
+            return previous_dataset.deep_work_averages.extend(df_deep_work["Deep Work"].iloc[-n_new_days:])
+
+    return RollingAverages(df_deep_work["Deep Work"], windows=rolling_average_windows)
+
+
+def create_daily_task_minutes(df_time_tracking, previous_dataset=None):
+    # if time entries were only appended, they are added to the table of the previous dataset
+    if previous_dataset is not None:
+        n_new_rows = determine_n_appended_rows(df_time_tracking, previous_dataset.df_time_tracking)
+        if n_new_rows == 0:
+            return previous_dataset.daily_task_minutes
+        if n_new_rows is not None:
+            return previous_dataset.daily_task_minutes.extend(df_time_tracking.iloc[-n_new_rows:])
+
+    return DailyTaskMinutes(df_time_tracking, tasks=tasks_color_key.keys())
+
+
+dataset = create_dataset(data, data_version)
+
+# 2. set some variables
+header_image_height = 38
+header_image_width = 0.926 * header_image_height # preserving aspect ratio of image
 
 css_style = {
     "title": {
@@ -98,15 +239,16 @@ css_style = {
 
 # 3. dash app
 # 3.1 sub-pages
-work = [
-    # YouTube
-    html.H2( 
-        style=css_style["title"],
-        children="Goal:  100,000 Subscribers on YouTube"
-    ),
-    dcc.Markdown(
-        containerProps={"style": {"margin-bottom": 20}},
-        children="""My goal is to reach 100,000 subscribers on my
+def create_work_page(dataset):
+    return [
+        # YouTube
+        html.H2( 
+            style=css_style["title"],
+            children="Goal:  {:,} Subscribers on YouTube".format(dataset.goals["subscribers"])
+        ),
+        dcc.Markdown(
+            containerProps={"style": {"margin-bottom": 20}},
+            children="""My goal is to reach {:,} subscribers on my
             [YouTube channel](https://www.youtube.com/channel/UCCtkE-r-0Mvp7PwAvxzSdvw)
             (and [here](https://www.sebastian-mantey.com/blog/why-i-want-to-reach-10000-subscribers-on-youtube) 
             is a blog post why I want to do that). 
@@ -116,709 +258,1002 @@ work = [
             Therefore, the actual lead measure, that I am going to focus on, is the amount of 
             [deep work](http://calnewport.com/books/deep-work/)
             that I do on a daily basis. And this is what I’m trying to increase over time.
-        """
-    ),
-    html.Div(
-        className="row",
-        style=css_style["plotting-area"],
-        children=[
-            html.Div(
-                className="ten columns offset-by-one",
-                style={"margin-bottom": 60},
-                children=[
-                    html.H3(
-                        style=css_style["heading"],
-                        children="Lag Measures"
-                    ),
-                    dcc.Graph(id="youtube-kpi-plot"),
-                    dcc.RadioItems(
-                        id="youtube-kpi-selection",
-                        style={
-                            "float": "left",
-                            "padding-left": 50, 
-                        },
-                        options=[
-                            {"label": "Subscriber Count", "value": "subscribers"},
-                            {"label": "Views per Month", "value": "views"} 
-                        ],
-                        value="subscribers"
-                    ),
-                    dcc.Graph(
-                        id="video-uploads-plot",
-                        style={"margin-top": 80}
-                    ),
-                    dcc.RadioItems(
-                        id="video-uploads-year-selection",
-                        style={"padding-left": 60},
-                        labelStyle={
-                            'display': 'inline-block',
-                            "padding-left": "2%"
-                        },
-                        options=[
-                            {"label": "2018", "value": "2018"},
-                            {"label": "2019", "value": "2019"} 
-                        ],
-                        value="2019"
-                    ),
-                    html.Div(
-                        className="row",
-                        style={"margin-top": 20},
-                        children=[
-                            html.Div(
-                                className="three columns",
-                                style={"margin-left": "11%"},
-                                children=[
-                                    html.P(
-                                        style=css_style["heading"],
-                                        children="Goal:"     
-                                    ),
-                                    html.P(
-                                        style={"text-align": "center"},
-                                        children="100 Videos"     
-                                    )
-                                ]
-                            ),
-                            html.Div(
-                                className="three columns",
-                                style={"margin-left": "11%"},
-                                children=[
-                                    html.P(
-                                        style=css_style["heading"],
-                                        children="Currently:"     
-                                    ),
-                                    html.P(
-                                        style={"text-align": "center"},
-                                        children="{} Videos".format(n_uploaded_videos_total)   
-                                    )
-                                ]
-                            ),
-                            html.Div(
-                                className="three columns",
-                                style={"margin-left": "11%", "margin-bottom": 40},
-                                children=[
-                                    html.P(
-                                        id="video-uploads-year",
-                                        style=css_style["heading"]    
-                                    ),
-                                    html.P(
-                                        id="number-of-uploaded-videos-in-year",
-                                        style={"text-align": "center"}    
-                                    )
-                                ]
-                            )
-                        ]
-                    ),
-                    html.H3(
-                        style=css_style["heading"],
-                        children="Lead Measure"
-                    ),
-                    dcc.Graph(
-                        id="deep-work-plot"
-                    ),
-                    dcc.RadioItems(
-                        id="rolling-average-selection",
-                        style={
-                            "float": "left",
-                            "padding-left": 50, 
-                        },
-                        options=[
-                            {"label": "7-Day Rolling Average", "value": 7},
-                            {"label": "30-Day Rolling Average", "value": 30},
-                            {"label": "90-Day Rolling Average", "value": 90}
-                        ],
-                        value=7
-                    )
-                ]
-            )
-        ]
-    )
-]
-
-health = [
-    # goal: weight loss
-    html.H2(
-        style=css_style["title"],
-        children="Goal: Average Weight of 85kg"
-    ),
-    dcc.Markdown(
-        containerProps={"style": {"margin-bottom": 20}},
-        children="""My goal is to get down to an average weight of 85kg, i.e. there 
+        """.format(dataset.goals["subscribers"])
+        ),
+        html.Div(
+            className="row",
+            style=css_style["plotting-area"],
+            children=[
+                html.Div(
+                    className="ten columns offset-by-one",
+                    style={"margin-bottom": 60},
+                    children=[
+                        html.H3(
+                            style=css_style["heading"],
+                            children="Lag Measures"
+                        ),
+                        dcc.Graph(id="youtube-kpi-plot"),
+                        dcc.RadioItems(
+                            id="youtube-kpi-selection",
+                            style={
+                                "float": "left",
+                                "padding-left": 50, 
+                            },
+                            options=[
+                                {"label": "Subscriber Count", "value": "subscribers"},
+                                {"label": "Views per Month", "value": "views"} 
+                            ],
+                            value="subscribers"
+                        ),
+                        dcc.Graph(
+                            id="video-uploads-plot",
+                            style={"margin-top": 80}
+                        ),
+                        dcc.RadioItems(
+                            id="video-uploads-year-selection",
+                            style={"padding-left": 60},
+                            labelStyle={
+                                'display': 'inline-block',
+                                "padding-left": "2%"
+                            },
+                            options=[
+                                {"label": "2018", "value": "2018"},
+                                {"label": "2019", "value": "2019"} 
+                            ],
+                            value="2019"
+                        ),
+                        html.Div(
+                            className="row",
+                            style={"margin-top": 20},
+                            children=[
+                                html.Div(
+                                    className="three columns",
+                                    style={"margin-left": "11%"},
+                                    children=[
+                                        html.P(
+                                            style=css_style["heading"],
+                                            children="Goal:"     
+                                        ),
+                                        html.P(
+                                            style={"text-align": "center"},
+                                            children="{} Videos".format(dataset.goals["videos"])
+                                        )
+                                    ]
+                                ),
+                                html.Div(
+                                    className="three columns",
+                                    style={"margin-left": "11%"},
+                                    children=[
+                                        html.P(
+                                            style=css_style["heading"],
+                                            children="Currently:"     
+                                        ),
+                                        html.P(
+                                            style={"text-align": "center"},
+                                            children="{} Videos".format(dataset.n_uploaded_videos_total)   
+                                        )
+                                    ]
+                                ),
+                                html.Div(
+                                    className="three columns",
+                                    style={"margin-left": "11%", "margin-bottom": 40},
+                                    children=[
+                                        html.P(
+                                            id="video-uploads-year",
+                                            style=css_style["heading"]    
+                                        ),
+                                        html.P(
+                                            id="number-of-uploaded-videos-in-year",
+                                            style={"text-align": "center"}    
+                                        )
+                                    ]
+                                )
+                            ]
+                        ),
+                        html.H3(
+                            style=css_style["heading"],
+                            children="Lead Measure"
+                        ),
+                        dcc.Graph(
+                            id="deep-work-plot"
+                        ),
+                        dcc.RadioItems(
+                            id="rolling-average-selection",
+                            style={
+                                "float": "left",
+                                "padding-left": 50, 
+                            },
+                            options=[
+                                {"label": "{}-Day Rolling Average".format(window), "value": window}
+                                for window in rolling_average_windows
+                            ],
+                            value=7
+                        ),
+                        dcc.Input(
+                            id="rolling-average-custom",
+                            style={"margin-left": 20},
+                            type="number",
+                            min=1,
+                            placeholder="Custom window (days)"
+                        )
+                    ]
+                )
+            ]
+        )
+    ]
+
+def create_health_page(dataset):
+    return [
+        # goal: weight loss
+        html.H2(
+            style=css_style["title"],
+            children="Goal: Average Weight of {}kg".format(dataset.goals["weight"])
+        ),
+        dcc.Markdown(
+            containerProps={"style": {"margin-bottom": 20}},
+            children="""My goal is to get down to an average weight of {}kg, i.e. there 
             should be a visible six pack.
-        """     
-    ),
-    html.Div(
-        className="row",
-        style=css_style["plotting-area"],
-        children=[
-            dcc.Graph(
-                id="weight-plot-new",
-                className="nine columns",
-                figure=weight_plot(df_weight_new, new_approach=True),
-                hoverData={"points": [{"x": most_recent_date_weight_new}]}
-            ),
-            html.Img(
-                id="weight-image",
-                className="three columns"
-            )
-        ]
-    )
-]
-
-
-misc = [
-    # Self-Discipline
-    html.H2(
-        style=css_style["title"],
-        children="Self-Discipline"
-    ),
-    dcc.Markdown(
-        containerProps={"style": {"margin-bottom": 20}},
-        children=["""I define self-discipline as the ability to discipline yourself to do what you set out to do.
+        """.format(dataset.goals["weight"])
+        ),
+        html.Div(
+            className="row",
+            style=css_style["plotting-area"],
+            children=[
+                dcc.Graph(
+                    id="weight-plot-new",
+                    className="nine columns",
+                    hoverData=create_hover_data(dataset.most_recent_date_weight_new)
+                ),
+                # photo of the hovered day (and links to prefetch the photos of the neighbouring days)
+                html.Div(
+                    id="weight-photo",
+                    className="three columns"
+                )
+            ]
+        )
+    ]
+
+
+def create_misc_page(dataset):
+    return [
+        # Self-Discipline
+        html.H2(
+            style=css_style["title"],
+            children="Self-Discipline"
+        ),
+        dcc.Markdown(
+            containerProps={"style": {"margin-bottom": 20}},
+            children=["""I define self-discipline as the ability to discipline yourself to do what you set out to do.
                     And I am going to track that in the following way: The night before, I create a to-do list 
                     with the things that I want to accomplish the next day. And if I am able to check everything 
                     off the list, then I have exercised self-discipline for that day.
         """]
-    ),
-    html.Div(
-        className="row",
-        style=css_style["plotting-area"],
-        children=[
-            dcc.Graph(
-                id="self-discipline-plot",
-                className="ten columns offset-by-one",
-                figure=git_hub_chart(df_habits[["self_discipline"]],
-                                     starting_date="2018-12-31",
-                                     figure_title = "Habit Tracker: Self-Discipline")
-            ),
-            html.Div(
-                className="row",
-                children=[
-                    html.Div(
-                        className="four columns",
-                        style={"margin-left": "15%"},
-                        children=[
-                            html.P(
-                                style=css_style["heading"],
-                                children="Goal:"
-                            ),
-                            html.P(
-                                style={"text-align": "center"},
-                                children="100 consecutive Days"
-                            )
-                        ]
-                    ),
-                    html.Div(
-                        className="four columns",
-                        style={"margin-left": "15%"},
-                        children=[
-                            html.P(
-                                style=css_style["heading"],
-                                children="Current Streak:"
-                            ),
-                            html.P(
-                                style={"text-align": "center"},
-                                children="{} Days".format(self_discipline_streak)
-                            )
-                        ]
-                    )
-                ]
-            )
-        ]
-    )
-]
-
-
-archive = [
-    # Wim Hof Technique
-    html.H2(
-        style=css_style["title-success"],
-        children="Wim Hof Method - Success"
-    ),
-    dcc.Markdown(
-        containerProps={"style": {"margin-bottom": 20}},
-        children="""Wim Hof has achieved incredible [feats](https://youtu.be/TM6WKeZ43s4?t=69).
+        ),
+        html.Div(
+            className="row",
+            style=css_style["plotting-area"],
+            children=[
+                dcc.Graph(
+                    id="self-discipline-plot",
+                    className="ten columns offset-by-one",
+                    figure=git_hub_chart(dataset.df_habits[["self_discipline"]],
+                                         starting_date=dataset.habit_calendar_start_dates["self_discipline"],
+                                         figure_title = "Habit Tracker: Self-Discipline")
+                ),
+                html.Div(
+                    className="row",
+                    children=[
+                        html.Div(
+                            className="four columns",
+                            style={"margin-left": "15%"},
+                            children=[
+                                html.P(
+                                    style=css_style["heading"],
+                                    children="Goal:"
+                                ),
+                                html.P(
+                                    style={"text-align": "center"},
+                                    children="{} consecutive Days".format(dataset.goals["self_discipline"])
+                                )
+                            ]
+                        ),
+                        html.Div(
+                            className="four columns",
+                            style={"margin-left": "15%"},
+                            children=[
+                                html.P(
+                                    style=css_style["heading"],
+                                    children="Current Streak:"
+                                ),
+                                html.P(
+                                    style={"text-align": "center"},
+                                    children="{} Days".format(dataset.self_discipline_streak)
+                                )
+                            ]
+                        )
+                    ]
+                )
+            ]
+        )
+    ]
+
+
+def create_archive_page(dataset):
+    return [
+        # Wim Hof Technique
+        html.H2(
+            style=css_style["title-success"],
+            children="Wim Hof Method - Success"
+        ),
+        dcc.Markdown(
+            containerProps={"style": {"margin-bottom": 20}},
+            children="""Wim Hof has achieved incredible [feats](https://youtu.be/TM6WKeZ43s4?t=69).
             So, I’m just curious to try out the Wim Hof Method which includes a certain 
             [breathing technique](https://www.youtube.com/watch?v=nzCaZQqAs9I) and cold exposure.
         """     
-    ),
-    html.Div(
-        className="row",
-        style=css_style["plotting-area"],
-        children=[
-            html.Div(
-                className="ten columns offset-by-one",
-                children=[
-                    dcc.Graph(
-                        style={"margin-bottom": "20"},
-                        figure=wim_hof_breathing_plot(df_breathing)
-                    ),
-                    dcc.Graph(figure=git_hub_chart(df_habits[["cold_shower"]],
-                                                   starting_date="2018-11-04",
-                                                   figure_title = "Habit Tracker: Cold Shower")
-                    ),
-                    html.Div(
-                        className="row",
-                        children=[
-                            html.Div(
-                                className="four columns",
-                                style={"margin-left": "15%"},
-                                children=[
-                                    html.P(
-                                        style=css_style["heading"],
-                                        children="Goal:"
-                                    ),
-                                    html.P(
-                                        style={"text-align": "center"},
-                                        children="100 consecutive Days"
-                                    )
-                                ]
-                            ),
-                            html.Div(
-                                className="four columns",
-                                style={"margin-left": "15%"},
-                                children=[
-                                    html.P(
-                                        style=css_style["heading"],
-                                        children="Current Streak:"
-                                    ),
-                                    html.P(
-                                        style={"text-align": "center"},
-                                        children="{} Days".format(cold_shower_streak)
-                                    )
-                                ]
-                            )
-                        ]
-                    )
-                ]
-            )
-        ]
-    ),
+        ),
+        html.Div(
+            className="row",
+            style=css_style["plotting-area"],
+            children=[
+                html.Div(
+                    className="ten columns offset-by-one",
+                    children=[
+                        dcc.Graph(
+                            style={"margin-bottom": "20"},
+                            figure=wim_hof_breathing_plot(dataset.df_breathing)
+                        ),
+                        dcc.Graph(figure=git_hub_chart(dataset.df_habits[["cold_shower"]],
+                                                       starting_date=dataset.habit_calendar_start_dates["cold_shower"],
+                                                       figure_title = "Habit Tracker: Cold Shower")
+                        ),
+                        html.Div(
+                            className="row",
+                            children=[
+                                html.Div(
+                                    className="four columns",
+                                    style={"margin-left": "15%"},
+                                    children=[
+                                        html.P(
+                                            style=css_style["heading"],
+                                            children="Goal:"
+                                        ),
+                                        html.P(
+                                            style={"text-align": "center"},
+                                            children="{} consecutive Days".format(dataset.goals["cold_shower"])
+                                        )
+                                    ]
+                                ),
+                                html.Div(
+                                    className="four columns",
+                                    style={"margin-left": "15%"},
+                                    children=[
+                                        html.P(
+                                            style=css_style["heading"],
+                                            children="Current Streak:"
+                                        ),
+                                        html.P(
+                                            style={"text-align": "center"},
+                                            children="{} Days".format(dataset.cold_shower_streak)
+                                        )
+                                    ]
+                                )
+                            ]
+                        )
+                    ]
+                )
+            ]
+        ),
     
-    # OMAD
-    html.H2(
-        style=css_style["title-success"],
-        children="OMAD - Success"
-    ),
-    dcc.Markdown(
-        containerProps={"style": {"margin-bottom": 20}},
-        children="""OMAD is an intermittent fasting protocoll and it stands for eating just "one meal a day."
+        # OMAD
+        html.H2(
+            style=css_style["title-success"],
+            children="OMAD - Success"
+        ),
+        dcc.Markdown(
+            containerProps={"style": {"margin-bottom": 20}},
+            children="""OMAD is an intermittent fasting protocoll and it stands for eating just "one meal a day."
         """     
-    ),
-    html.Div(
-        className="row",
-        style=css_style["plotting-area"],
-        children=[
-            dcc.Graph(
-                className="ten columns offset-by-one",
-                figure=git_hub_chart(df_habits[["omad"]],
-                                     starting_date="2018-12-31",
-                                     figure_title = "Habit Tracker: OMAD")
-            ),
-            html.Div(
-                className="row",
-                children=[
-                    html.Div(
-                        className="four columns",
-                        style={"margin-left": "15%"},
-                        children=[
-                            html.P(
-                                style=css_style["heading"],
-                                children="Goal:"
-                            ),
-                            html.P(
-                                style={"text-align": "center"},
-                                children="21 consecutive Days"
-                            )
-                        ]
-                    ),
-                    html.Div(
-                        className="four columns",
-                        style={"margin-left": "15%"},
-                        children=[
-                            html.P(
-                                style=css_style["heading"],
-                                children="Current Streak:"
-                            ),
-                            html.P(
-                                style={"text-align": "center"},
-                                children="{} Days".format(omad_streak)
-                            )
-                        ]
-                    )
-                ]
-            )
-        ]
-    ),
+        ),
+        html.Div(
+            className="row",
+            style=css_style["plotting-area"],
+            children=[
+                dcc.Graph(
+                    className="ten columns offset-by-one",
+                    figure=git_hub_chart(dataset.df_habits[["omad"]],
+                                         starting_date=dataset.habit_calendar_start_dates["omad"],
+                                         figure_title = "Habit Tracker: OMAD")
+                ),
+                html.Div(
+                    className="row",
+                    children=[
+                        html.Div(
+                            className="four columns",
+                            style={"margin-left": "15%"},
+                            children=[
+                                html.P(
+                                    style=css_style["heading"],
+                                    children="Goal:"
+                                ),
+                                html.P(
+                                    style={"text-align": "center"},
+                                    children="{} consecutive Days".format(dataset.goals["omad"])
+                                )
+                            ]
+                        ),
+                        html.Div(
+                            className="four columns",
+                            style={"margin-left": "15%"},
+                            children=[
+                                html.P(
+                                    style=css_style["heading"],
+                                    children="Current Streak:"
+                                ),
+                                html.P(
+                                    style={"text-align": "center"},
+                                    children="{} Days".format(dataset.omad_streak)
+                                )
+                            ]
+                        )
+                    ]
+                )
+            ]
+        ),
     
-    # Lucid Dreaming
-    html.H2(
-        style=css_style["title-success"],
-        children="Lucid Dreaming - Success"
-    ),
-    dcc.Markdown(
-        containerProps={"style": {"margin-bottom": 20}},
-        children="""To improve my dream recall I want to keep a dream journal where I write down my dreams. 
+        # Lucid Dreaming
+        html.H2(
+            style=css_style["title-success"],
+            children="Lucid Dreaming - Success"
+        ),
+        dcc.Markdown(
+            containerProps={"style": {"margin-bottom": 20}},
+            children="""To improve my dream recall I want to keep a dream journal where I write down my dreams. 
                     Furthermore, I am going to do reality checks throughout the day in order to be able to
                     induce lucid dreams.
         """     
-    ),
-    html.Div(
-        className="row",
-        style=css_style["plotting-area"],
-        children=[
-            dcc.Graph(
-                className="ten columns offset-by-one",
-                figure=git_hub_chart(df_habits[["lucid_dreaming"]],
-                                     starting_date="2018-12-31",
-                                     figure_title = "Habit Tracker: Lucid Dreaming")
-            ),
-            html.Div(
-                className="row",
-                children=[
-                    html.Div(
-                        className="four columns",
-                        style={"margin-left": "15%"},
-                        children=[
-                            html.P(
-                                style=css_style["heading"],
-                                children="Goal:"
-                            ),
-                            html.P(
-                                style={"text-align": "center"},
-                                children="30 consecutive Days"
-                            )
-                        ]
-                    ),
-                    html.Div(
-                        className="four columns",
-                        style={"margin-left": "15%"},
-                        children=[
-                            html.P(
-                                style=css_style["heading"],
-                                children="Current Streak:"
-                            ),
-                            html.P(
-                                style={"text-align": "center"},
-                                children="{} Days".format(lucid_dreaming_streak)
-                            )
-                        ]
-                    )
-                ]
-            )
-        ]
-    ),
+        ),
+        html.Div(
+            className="row",
+            style=css_style["plotting-area"],
+            children=[
+                dcc.Graph(
+                    className="ten columns offset-by-one",
+                    figure=git_hub_chart(dataset.df_habits[["lucid_dreaming"]],
+                                         starting_date=dataset.habit_calendar_start_dates["lucid_dreaming"],
+                                         figure_title = "Habit Tracker: Lucid Dreaming")
+                ),
+                html.Div(
+                    className="row",
+                    children=[
+                        html.Div(
+                            className="four columns",
+                            style={"margin-left": "15%"},
+                            children=[
+                                html.P(
+                                    style=css_style["heading"],
+                                    children="Goal:"
+                                ),
+                                html.P(
+                                    style={"text-align": "center"},
+                                    children="{} consecutive Days".format(dataset.goals["lucid_dreaming"])
+                                )
+                            ]
+                        ),
+                        html.Div(
+                            className="four columns",
+                            style={"margin-left": "15%"},
+                            children=[
+                                html.P(
+                                    style=css_style["heading"],
+                                    children="Current Streak:"
+                                ),
+                                html.P(
+                                    style={"text-align": "center"},
+                                    children="{} Days".format(dataset.lucid_dreaming_streak)
+                                )
+                            ]
+                        )
+                    ]
+                )
+            ]
+        ),
     
-    # goal: weight loss
-    html.H2(
-        style=css_style["title-failure"],
-        children="Goal: Average Weight of 85kg - Failure"
-    ),
-    dcc.Markdown(
-        containerProps={"style": {"margin-bottom": 20}},
-        children="""My goal is to get down to an average weight of 85kg, i.e. there 
+        # goal: weight loss
+        html.H2(
+            style=css_style["title-failure"],
+            children="Goal: Average Weight of {}kg - Failure".format(dataset.goals["weight"])
+        ),
+        dcc.Markdown(
+            containerProps={"style": {"margin-bottom": 20}},
+            children="""My goal is to get down to an average weight of {}kg, i.e. there 
             should be a visible six pack. Therefore, I also want to establish 
             the habit of doing a short [ab workout](https://www.youtube.com/watch?v=DHD1-2P94DI)
             right after getting up in the morning.
-        """     
-    ),
-    html.Div(
-        className="row",
-        style=css_style["plotting-area"],
-        children=[
-            dcc.Graph(
-                id="weight-plot-old",
-                className="ten columns offset-by-one",
-                figure=weight_plot(df_weight_old),
-                hoverData={"points": [{"x": most_recent_date_weight_old}]}
-            ),
-            html.Div(
-                className="ten columns offset-by-one",
-                children=[
-                    dcc.Graph(
-                        style={"margin-top": "60"},
-                        figure=git_hub_chart(df_habits[["ab_workout"]],
-                                             starting_date="2018-11-04",
-                                             figure_title = "Habit Tracker: Morning Ab Workout"),
-                    ),
-                    html.Div(
-                        className="row",
-                        children=[
-                            html.Div(
-                                className="four columns",
-                                style={"margin-left": "15%"},
-                                children=[
-                                    html.P(
-                                        style=css_style["heading"],
-                                        children="Goal:"
-                                    ),
-                                    html.P(
-                                        style={"text-align": "center"},
-                                        children="100 consecutive Days"
-                                    )
-                                ]
-                            ),
-                            html.Div(
-                                className="four columns",
-                                style={"margin-left": "15%"},
-                                children=[
-                                    html.P(
-                                        style=css_style["heading"],
-                                        children="Current Streak:"
-                                    ),
-                                    html.P(
-                                        style={"text-align": "center"},
-                                        children="{} Days".format(ab_workout_streak)
-                                    )
-                                ]
-                            )
-                        ]
-                    )
-                ]
-            )
-        ]
-    ),
-    
-    # Daily Schedule
-    html.H2(
-        style=css_style["title-failure"],
-        children="Daily Schedule - Failure"
-    ),
-    dcc.Markdown(
-        containerProps={"style": {"margin-bottom": 20}},
-        children="""As Jordan Peterson mentions in [this](https://www.youtube.com/watch?v=OoA4017M7WU)
-            video, once you have a vision (in my case reaching 100,000 subscribers on YouTube), 
-            you have to ask yourself: What do I have to do on a daily basis to reach that goal?
-            So, I created an ideal work-day schedule where I spent 12 hours a day doing something 
-            productive. And now, I want to track the percentage of how close I get to that ideal. 
-            And then, obviously, I want to improve that over time.
-        """     
-    ),
-    html.Div(
-        className="row",
-        style=css_style["plotting-area"],
-        children=[
-            dcc.Graph(
-                id="time-spent-plot",
-                className="ten columns offset-by-one",
-                figure=time_spent_plot(df_time_tracking),
-                hoverData={"points": [{"x": most_recent_date_time_tracking}]}
-            ),
-            html.Div(
-                className="ten columns offset-by-one",
-                style={"margin-top": "30"},
-                children=[
-                    dcc.Graph(id="gantt-chart"),
-                    dcc.Checklist(
-                        id="checkbox-ideal-schedule",
-                        style={ "margin-top": 20},
-                        options=[{"label": "Show ideal Schedule", "value": "ideal schedule"}],
-                        values=[],
-                    )
-                ]
-            )
-        ]
-    ),
-]
-
-
-# 3.2 actual app
-app = dash.Dash(__name__, external_stylesheets=["https://codepen.io/chriddyp/pen/bWLwgP.css"])
-server = app.server
-
-app.layout = html.Div(
-    className="container", 
-    style={"max-width": "1300px"},
-    children=[
-        # facilitate multi-page app
-        dcc.Location(id="url", refresh=True),
-    
-        # header
+        """.format(dataset.goals["weight"])
+        ),
         html.Div(
             className="row",
+            style=css_style["plotting-area"],
             children=[
-                html.H1(
-                    style={"display": "inline-block"},
-                    children="Personal Dashboard"
+                dcc.Graph(
+                    id="weight-plot-old",
+                    className="ten columns offset-by-one",
+                    figure=weight_plot(dataset.df_weight_old),
+                    hoverData=create_hover_data(dataset.most_recent_date_weight_old)
                 ),
                 html.Div(
-                    className="row",
-                    style={"float": "right"},
+                    className="ten columns offset-by-one",
                     children=[
-                        html.Img(
-                            style={"margin-right": 10},
-                            src=header_image_source,
-                            height=header_image_height,
-                            width=header_image_width
+                        dcc.Graph(
+                            style={"margin-top": "60"},
+                            figure=git_hub_chart(dataset.df_habits[["ab_workout"]],
+                                                 starting_date=dataset.habit_calendar_start_dates["ab_workout"],
+                                                 figure_title = "Habit Tracker: Morning Ab Workout"),
                         ),
-                        html.H1(
-                            style={"display": "inline-block"},
-                            children="Sebastian Mantey"
+                        html.Div(
+                            className="row",
+                            children=[
+                                html.Div(
+                                    className="four columns",
+                                    style={"margin-left": "15%"},
+                                    children=[
+                                        html.P(
+                                            style=css_style["heading"],
+                                            children="Goal:"
+                                        ),
+                                        html.P(
+                                            style={"text-align": "center"},
+                                            children="{} consecutive Days".format(dataset.goals["ab_workout"])
+                                        )
+                                    ]
+                                ),
+                                html.Div(
+                                    className="four columns",
+                                    style={"margin-left": "15%"},
+                                    children=[
+                                        html.P(
+                                            style=css_style["heading"],
+                                            children="Current Streak:"
+                                        ),
+                                        html.P(
+                                            style={"text-align": "center"},
+                                            children="{} Days".format(dataset.ab_workout_streak)
+                                        )
+                                    ]
+                                )
+                            ]
                         )
                     ]
                 )
             ]
         ),
-
-        # buttons to pages
+    
+        # Daily Schedule
+        html.H2(
+            style=css_style["title-failure"],
+            children="Daily Schedule - Failure"
+        ),
+        dcc.Markdown(
+            containerProps={"style": {"margin-bottom": 20}},
+            children="""As Jordan Peterson mentions in [this](https://www.youtube.com/watch?v=OoA4017M7WU)
+            video, once you have a vision (in my case reaching {:,} subscribers on YouTube), 
+            you have to ask yourself: What do I have to do on a daily basis to reach that goal?
+            So, I created an ideal work-day schedule where I spent 12 hours a day doing something 
+            productive. And now, I want to track the percentage of how close I get to that ideal. 
+            And then, obviously, I want to improve that over time.
+        """.format(dataset.goals["subscribers"])
+        ),
         html.Div(
             className="row",
-            style={"margin-bottom": "10"},
+            style=css_style["plotting-area"],
             children=[
-                dcc.Link(
-                    id="work-button",
-                    className="button",
-                    href="/work",
-                    children="work"
-                ),
-                dcc.Link( 
-                    id="health-button",
-                    className="button",
-                    href="/health",
-                    children="health"
+                dcc.Graph(
+                    id="time-spent-plot",
+                    className="ten columns offset-by-one",
+                    hoverData={"points": [{"x": dataset.most_recent_date_time_tracking}]}
                 ),
-                dcc.Link( 
-                    id="misc-button",
-                    className="button",
-                    href="/misc",
-                    children="misc"
-                ),
-                dcc.Link( 
-                    id="archive-button",
-                    className="button",
-                    style={"margin-left": 50},
-                    href="/archive",
-                    children="archive"
+                html.Div(
+                    className="ten columns offset-by-one",
+                    style={"margin-top": "30"},
+                    children=[
+                        dcc.Graph(id="gantt-chart"),
+                        dcc.Checklist(
+                            id="checkbox-ideal-schedule",
+                            style={"margin-top": 20, "float": "left"},
+                            options=[{"label": "Show ideal Schedule", "value": "ideal schedule"}],
+                            values=[],
+                        ),
+                        dcc.RadioItems(
+                            id="schedule-period-selection",
+                            style={"margin-top": 20, "padding-left": 50, "float": "left"},
+                            labelStyle={"display": "inline-block", "padding-right": 20},
+                            options=[
+                                {"label": "Day", "value": 1},
+                                {"label": "Week", "value": 7}
+                            ],
+                            value=1
+                        )
+                    ]
                 )
             ]
         ),
+    ]
 
-        # container for page content
-        html.Div(
-            id="page-content",
-            className="row"
-        ),
 
-        # footer
-        dcc.Markdown(
-            containerProps={"style": {"text-align": "center"}},
-            children="""Built with [Dash](https://plot.ly/products/dash/). 
-                Code available at [GitHub](https://github.com/SebastianMantey/Personal_Dashboard).
-            """
+# buttons to the pages (the button of the current page is highlighted)
+# (they are part of every page, so that navigating only takes one request, instead of one for the page
+# and one for the style of every button)
+# the links are relative, so that they stay within the pages of a tenant, e.g. "/jane/work"
+def create_navigation(page_name):
+    buttons = []
+    for button_page_name in ["work", "health", "misc", "archive"]:
+        style = {"margin-right": "5"}
+        if button_page_name == "archive":
+            style["float"] = "right"
+        if button_page_name == page_name:
+            style.update({"background-color": "grey", "color": "white"})
+
+        button = dcc.Link(
+            id="{}-button".format(button_page_name),
+            className="button",
+            style=style,
+            href=button_page_name,
+            children=button_page_name
+        )
+        buttons.append(button)
+
+    return html.Div(
+        className="row",
+        style={"margin-bottom": "10"},
+        children=buttons
+    )
+
+
+def add_navigation(page_name, create_page):
+    def create_page_with_navigation(dataset):
+        return [create_navigation(page_name)] + create_page(dataset)
+
+    return create_page_with_navigation
+
+
+# (shown for all URLs that don't belong to a page, with the buttons to the pages)
+def create_not_found_page(dataset):
+    return [
+        html.H3(
+            children="Page not found"
         )
     ]
-)
 
-# 3.3 interactivity of the app
-# 3.3.1 navigate pages
+
+# 3.2 caches and metrics
+# latencies of the callbacks are exposed at "/metrics" (see 3.3),
+# the plotting functions are timed as the "figure_build" phase of the callbacks
+callback_metrics = CallbackMetrics()
+
+deep_work_plot = callback_metrics.figure_build(deep_work_plot)
+gantt_chart = callback_metrics.figure_build(gantt_chart)
+git_hub_chart = callback_metrics.figure_build(git_hub_chart)
+time_spent_plot = callback_metrics.figure_build(time_spent_plot)
+weight_plot = callback_metrics.figure_build(weight_plot)
+wim_hof_breathing_plot = callback_metrics.figure_build(wim_hof_breathing_plot)
+youtube_kpi_plot = callback_metrics.figure_build(youtube_kpi_plot)
+
+# pages are built the first time they are requested (and not at import time),
+# pages and figures of the interactive plots are cached until the data is reloaded
+page_builders = {
+    "work": add_navigation("work", create_work_page),
+    "health": add_navigation("health", create_health_page),
+    "misc": add_navigation("misc", create_misc_page),
+    "archive": add_navigation("archive", create_archive_page),
+    "not-found": add_navigation(None, create_not_found_page)
+}
+page_cache = PageCache(page_builders)
+if os.environ.get("PREWARM_PAGES") == "1":
+    page_cache.prewarm(dataset)
+
+figure_cache = FigureCache()
+figure_cache.set_data_version(dataset.version)
+
+# the data is reloaded in the background when the CSV files (or the sheets) change
+# (callbacks always work with the dataset that was current when they started)
+def publish_data(data, data_version):
+    global dataset
+    new_dataset = create_dataset(data, data_version, dataset, dataset.config)
+
+    # (the new dataset is swapped in first, the cache then drops the figures of the old one)
+    dataset = new_dataset
+    figure_cache.set_data_version(new_dataset.version)
+
+# the other tenants (with their own data, caches and goals) are served at "/<tenant>/<page>"
+# (and the least recently used ones are unloaded if their data and figures exceed the memory budget)
+tenant_registry = TenantRegistry(tenants_dir, create_dataset, page_builders,
+                                 memory_budget=tenant_memory_budget, reload_interval=reload_interval)
+
+def get_tenant(pathname):
+    tenant_name, _ = tenant_registry.split_pathname(pathname)
+    if tenant_name is None:
+        return TenantState(dataset, figure_cache, page_cache)
+
+    return tenant_registry.get(tenant_name)
+
+def get_tenant_dataset(tenant_name):
+    # (unknown tenants raise a KeyError)
+    if tenant_name is None:
+        return dataset
+
+    return tenant_registry.get(tenant_name).dataset
+
+def determine_image_dir(pathname):
+    tenant_name, _ = tenant_registry.split_pathname(pathname)
+    if tenant_name is None:
+        return image_dir
+
+    return os.path.join(tenants_dir, tenant_name, "images")
+
+def determine_page_name(pathname):
+    _, page_name = tenant_registry.split_pathname(pathname)
+    page_name = page_name or "work"
+    if page_name not in page_builders:
+        return "not-found"
+
+    return page_name
+
+def serialize_page(values):
+    # response of "show_page" as JSON (serialized once per page and data version, see PageCache)
+    pathname = values.get("url.pathname")
+    tenant = get_tenant(pathname)
+
+    return tenant.page_cache.get_serialized_page(determine_page_name(pathname), tenant.dataset)
+
+def determine_request_data_version():
+    # version of the data that the current callback request is answered from (for its ETag)
+    # (all callbacks get the URL as input or state)
+    # the version of the dataset that is served, not of the CSV files, which may already be newer
+    body = flask.request.get_json()
+    pathnames = [item.get("value") for item in body.get("inputs", []) + body.get("state", [])
+                 if item.get("id") == "url"]
+    pathname = pathnames[0] if pathnames else None
+    data_version = get_tenant(pathname).dataset.version
+
+    # (the photos of the weight page are not part of the data, they come from the image index)
+    if body.get("output", {}).get("id") == "weight-photo":
+        return data_version, image_service.determine_index_version(determine_image_dir(pathname))
+
+    return data_version
+
+def start_background_tasks():
+    # (called in every worker process, see 3.5)
+    if reload_interval > 0:
+        if data_source == "csv":
+            data_reloader = DataReloader(data_dir, data, file_states, on_reload=publish_data,
+                                         interval=reload_interval)
+            data_reloader.start()
+        else:
+            sheets_data_source.on_refresh = publish_data
+            sheets_data_source.start()
+
+
+# 3.3 actual app
+def create_header_owner(config):
+    return [
+        html.Img(
+            style={"margin-right": 10},
+            src=config["header_image_source"],
+            height=header_image_height,
+            width=header_image_width
+        ),
+        html.H1(
+            style={"display": "inline-block"},
+            children=config["name"]
+        )
+    ]
+
+def determine_layout_pathname():
+    # the layout is requested by the page of the app that is opened, e.g. "/jane/work"
+    # (None when the layout is validated while the app is set up, then the default tenant is used)
+    if not flask.has_request_context() or not flask.request.referrer:
+        return None
+
+    return urlparse(flask.request.referrer).path
+
+app = dash.Dash(__name__, external_stylesheets=["https://codepen.io/chriddyp/pen/bWLwgP.css"])
+server = app.server
+callback_metrics.init_app(server)
+tenant_registry.init_app(server)
+
+# responses get ETags, so that repeated requests are answered with "304 Not Modified"
+# (the responses are compressed by Flask-Compress, which Dash registers itself)
+callback_etags = CallbackETags(determine_data_version=determine_request_data_version)
+callback_etags.init_app(server)
+
+# the pages are sent as pre-serialized JSON (see show_page)
+preserialized_pages = PreserializedResponses("page-content.children", determine_response=serialize_page,
+                                             callback_metrics=callback_metrics, callback_name="show_page")
+preserialized_pages.init_app(server)
+
+# read-only JSON/Arrow endpoints for the series behind the plots at "/api/..." (see api_functions.py)
+query_api = QueryAPI(determine_dataset=get_tenant_dataset)
+query_api.init_app(server)
+
+# photos of the weight page are served at "/images/<content hash>" (as thumbnails, if Pillow is installed)
+# (the photos of the default tenant are indexed and the thumbnails are created when the app starts)
+image_service = ImageService(thumbnail_width=480)
+image_service.init_app(server)
+if os.path.isdir(image_dir):
+    image_service.get_index(image_dir)
+
+# the layout is created for every page that is opened, so that the header shows the owner of the tenant
+# (the pages themselves are cached, see PageCache)
+def create_layout():
+    config = get_tenant(determine_layout_pathname()).dataset.config
+
+    return html.Div(
+        className="container", 
+        style={"max-width": "1300px"},
+        children=[
+            # facilitate multi-page app
+            dcc.Location(id="url", refresh=True),
+    
+            # header
+            html.Div(
+                className="row",
+                children=[
+                    html.H1(
+                        style={"display": "inline-block"},
+                        children="Personal Dashboard"
+                    ),
+                    html.Div(
+                        id="header-owner",
+                        className="row",
+                        style={"float": "right"},
+                        children=create_header_owner(config)
+                    )
+                ]
+            ),
+
+            # date range of the plots (without dates, the whole history is shown)
+            html.Div(
+                className="row",
+                style={"margin-bottom": "10"},
+                children=[
+                    dcc.DatePickerRange(
+                        id="date-range",
+                        clearable=True,
+                        updatemode="bothdates",
+                        minimum_nights=0,
+                        first_day_of_week=1,
+                        display_format="YYYY-MM-DD",
+                        start_date_placeholder_text="Start date",
+                        end_date_placeholder_text="End date"
+                    )
+                ]
+            ),
+
+            # container for page content
+            # (including the buttons to the pages, see create_navigation)
+            html.Div(
+                id="page-content",
+                className="row"
+            ),
+
+            # footer
+            dcc.Markdown(
+                containerProps={"style": {"text-align": "center"}},
+                children="""Built with [Dash](https://plot.ly/products/dash/). 
+                    Code available at [GitHub](https://github.com/SebastianMantey/Personal_Dashboard).
+                """
+            )
+        ]
+    )
+
+app.layout = create_layout
+
+# 3.4 interactivity of the app
+# 3.4.1 navigate pages
+# (the requests are answered with the pre-serialized page before this callback runs, see 3.3)
 @app.callback(Output("page-content", "children"),
              [Input("url", "pathname")])
+@callback_metrics.callback
 def show_page(pathname):
-    if (pathname == "/work") or (pathname == "/"):
-        return work
-    if pathname == "/health":
-        return health
-    if pathname == "/misc":
-        return misc
-    if pathname == "/archive":
-        return archive
-
-
-# 3.3.2 update style of buttons
-@app.callback(Output("work-button", "style"),
-             [Input("url", "pathname")])
-def update_work_button(pathname):
-    if (pathname == "/work") or (pathname == "/"):
-        return {"margin-right": "5", "background-color": "grey", "color": "white"}
-    else:
-        return {"margin-right": "5"}
-    
+    tenant = get_tenant(pathname)
 
-@app.callback(Output("health-button", "style"),
-             [Input("url", "pathname")])
-def update_health_button(pathname):
-    if pathname == "/health":
-        return {"margin-right": "5", "background-color": "grey", "color": "white"}
-    else:
-        return {"margin-right": "5"}
-    
-    
-@app.callback(Output("misc-button", "style"),
-             [Input("url", "pathname")])
-def update_health_button(pathname):
-    if pathname == "/misc":
-        return {"margin-right": "5", "background-color": "grey", "color": "white"}
-    else:
-        return {"margin-right": "5"}
-    
-@app.callback(Output("archive-button", "style"),
-             [Input("url", "pathname")])
-def update_archive_button(pathname):
-    if pathname == "/archive":
-        return {"margin-right": "5", "background-color": "grey", "color": "white", "float": "right"}
-    else:
-        return {"margin-right": "5", "float": "right"}
+    return tenant.page_cache.get_page(determine_page_name(pathname), tenant.dataset)
 
 
-# 3.3.3 supress exceptions (see: https://dash.plot.ly/urls)
+# 3.4.2 supress exceptions (see: https://dash.plot.ly/urls)
 app.config.suppress_callback_exceptions = True
 
 
-# 3.3.4 interactivity of plots
+# 3.4.3 interactivity of plots
+# (the long time series are downsampled, when zooming in, the visible range is shown in full resolution)
+# (the time series are restricted to the dates of the date range selector)
+# (the URL is passed as state to determine the tenant, see 3.2)
 @app.callback(Output("youtube-kpi-plot", "figure"),
-             [Input("youtube-kpi-selection", "value")])
-def update_youtube_kpi_plot(youtube_kpi):
-    return youtube_kpi_plot(df_youtube_kpis, youtube_kpi)
+             [Input("youtube-kpi-selection", "value"),
+              Input("youtube-kpi-plot", "relayoutData"),
+              Input("date-range", "start_date"),
+              Input("date-range", "end_date")],
+             [State("url", "pathname")])
+@callback_metrics.callback
+def update_youtube_kpi_plot(youtube_kpi, relayout_data, start_date, end_date, pathname):
+    tenant = get_tenant(pathname)
+    x_range = determine_x_range(relayout_data)
+    return tenant.figure_cache.get_figure(youtube_kpi_plot, tenant.dataset.df_youtube_kpis, youtube_kpi,
+                                          x_range=x_range, start_date=start_date, end_date=end_date,
+                                          data_version=tenant.dataset.version)
         
         
 @app.callback(Output("video-uploads-year", "children"),
              [Input("video-uploads-year-selection", "value")])
+@callback_metrics.callback
 def display_video_upload_year(year):
     return "{}:".format(year)
 
 @app.callback(Output("number-of-uploaded-videos-in-year", "children"),
-             [Input("video-uploads-year-selection", "value")])
-def display_n_uploaded_videos_year(year):
+             [Input("video-uploads-year-selection", "value")],
+             [State("url", "pathname")])
+@callback_metrics.callback
+def display_n_uploaded_videos_year(year, pathname):
+    dataset = get_tenant(pathname).dataset
     if year == "2018":
-        return n_uploaded_videos_2018
+        return dataset.n_uploaded_videos_2018
     if year == "2019":
-        return n_uploaded_videos_2019
+        return dataset.n_uploaded_videos_2019
     
 @app.callback(Output("video-uploads-plot", "figure"),
-             [Input("video-uploads-year-selection", "value")])
-def update_video_uploads_plot(year):
+             [Input("video-uploads-year-selection", "value"),
+              Input("date-range", "start_date"),
+              Input("date-range", "end_date")],
+             [State("url", "pathname")])
+@callback_metrics.callback
+def update_video_uploads_plot(year, start_date, end_date, pathname):
+    tenant = get_tenant(pathname)
     if year == "2018":
         figure_title = "Video Uploads {}".format(year)
-        return git_hub_chart(df_video_uploads_2018, starting_date="2018-01-01", figure_title=figure_title)
+        return tenant.figure_cache.get_figure(git_hub_chart, tenant.dataset.df_video_uploads_2018, starting_date="2018-01-01", figure_title=figure_title,
+                                              start_date=start_date, end_date=end_date,
+                                              data_version=tenant.dataset.version)
     
     if year == "2019":
         figure_title = "Video Uploads {}".format(year)
-        return git_hub_chart(df_video_uploads_2019, starting_date="2018-12-31", figure_title=figure_title)
+        return tenant.figure_cache.get_figure(git_hub_chart, tenant.dataset.df_video_uploads_2019, starting_date="2018-12-31", figure_title=figure_title,
+                                              start_date=start_date, end_date=end_date,
+                                              data_version=tenant.dataset.version)
 
     
 @app.callback(Output("deep-work-plot", "figure"),
-             [Input("rolling-average-selection", "value")])
-def update_deep_work_plot(rolling_average):
-    return deep_work_plot(df_deep_work, rolling_average)
+             [Input("rolling-average-selection", "value"),
+              Input("rolling-average-custom", "value"),
+              Input("deep-work-plot", "relayoutData"),
+              Input("date-range", "start_date"),
+              Input("date-range", "end_date")],
+             [State("url", "pathname")])
+@callback_metrics.callback
+def update_deep_work_plot(rolling_average, custom_rolling_average, relayout_data, start_date, end_date, pathname):
+    # a custom window (if one is entered) takes precedence over the selected one
+    try:
+        custom_rolling_average = int(custom_rolling_average)
+    except (TypeError, ValueError):
+        custom_rolling_average = 0
+    if custom_rolling_average >= 1:
+        rolling_average = custom_rolling_average
+
+    tenant = get_tenant(pathname)
+    x_range = determine_x_range(relayout_data)
+    return tenant.figure_cache.get_figure(deep_work_plot, tenant.dataset.deep_work_averages, rolling_average,
+                                          x_range=x_range, start_date=start_date, end_date=end_date,
+                                          data_version=tenant.dataset.version)
 
     
-@app.callback(Output("weight-image", "src"),
-             [Input("weight-plot-new", "hoverData")])
-def update_body_image(hover_data):
-    date = hover_data["points"][0]["x"]
-    src = "https://raw.githubusercontent.com/SebastianMantey/Personal_Dashboard/master/images/{}.JPG".format(date)
+@app.callback(Output("weight-plot-new", "figure"),
+             [Input("weight-plot-new", "relayoutData"),
+              Input("date-range", "start_date"),
+              Input("date-range", "end_date")],
+             [State("url", "pathname")])
+@callback_metrics.callback
+def update_weight_plot(relayout_data, start_date, end_date, pathname):
+    tenant = get_tenant(pathname)
+    x_range = determine_x_range(relayout_data)
+    return tenant.figure_cache.get_figure(weight_plot, tenant.dataset.df_weight_new, new_approach=True, x_range=x_range,
+                                          start_date=start_date, end_date=end_date,
+                                          data_version=tenant.dataset.version)
+
     
-    return src
+@app.callback(Output("weight-photo", "children"),
+             [Input("weight-plot-new", "hoverData")],
+             [State("url", "pathname")])
+@callback_metrics.callback
+def update_body_image(hover_data, pathname):
+    if hover_data is None:
+        return None     # no weights
+    date = hover_data["points"][0]["x"]
+    image_source = get_tenant(pathname).dataset.config["weight_image_source"]
+    if image_source is not None:
+        # photos are hosted elsewhere
+        return html.Img(style={"width": "100%"}, src=image_source.format(date))
+
+    # photo of that day (or of the nearest earlier day) from the image service
+    src, neighbour_srcs = image_service.determine_photo_urls(determine_image_dir(pathname), date)
+    if src is None:
+        return None
+
+    return [html.Img(style={"width": "100%"}, src=src)] + [html.Link(rel="prefetch", href=neighbour_src)
+                                                           for neighbour_src in neighbour_srcs]
+
+
+@app.callback(Output("time-spent-plot", "figure"),
+             [Input("time-spent-plot", "relayoutData"),
+              Input("date-range", "start_date"),
+              Input("date-range", "end_date")],
+             [State("url", "pathname")])
+@callback_metrics.callback
+def update_time_spent_plot(relayout_data, start_date, end_date, pathname):
+    tenant = get_tenant(pathname)
+    x_range = determine_x_range(relayout_data)
+    return tenant.figure_cache.get_figure(time_spent_plot, tenant.dataset.time_spent_percentages, x_range=x_range,
+                                          start_date=start_date, end_date=end_date,
+                                          data_version=tenant.dataset.version)
 
 
 @app.callback(Output("gantt-chart", "figure"),
               [Input("time-spent-plot", "hoverData"),
-              Input("checkbox-ideal-schedule", "values")])
-def show_daily_schedule(hover_data, checkbox_ideal_schedule):
+              Input("checkbox-ideal-schedule", "values"),
+              Input("schedule-period-selection", "value"),
+              Input("date-range", "start_date"),
+              Input("date-range", "end_date")],
+              [State("url", "pathname")])
+@callback_metrics.callback
+def show_daily_schedule(hover_data, checkbox_ideal_schedule, n_days, start_date, end_date, pathname):
+    tenant = get_tenant(pathname)
     if checkbox_ideal_schedule:
-        return gantt_chart(df_time_tracking, show_ideal_schedule=True)
+        # (the ideal schedule doesn't belong to a date, so it doesn't depend on the date range)
+        return tenant.figure_cache.get_figure(gantt_chart, tenant.dataset.time_tracking_index, show_ideal_schedule=True,
+                                              data_version=tenant.dataset.version)
     else:
-        date = hover_data["points"][0]["x"]
-        return gantt_chart(df_time_tracking, date)
+        # hovered day (the last day of the date range, if it isn't within the range, e.g. when the range changed)
+        date = pd.Timestamp(hover_data["points"][0]["x"]).normalize()
+        if start_date:
+            date = max(date, pd.Timestamp(start_date).normalize())
+        if end_date:
+            date = min(date, pd.Timestamp(end_date).normalize())
+
+        first_day, last_day = date, date
+        if n_days == 7:
+            # week (Monday to Sunday) of the hovered day, without the days outside of the date range
+            first_day = date - pd.Timedelta(days=date.weekday())
+            last_day = first_day + pd.Timedelta(days=6)
+            if start_date:
+                first_day = max(first_day, pd.Timestamp(start_date).normalize())
+            if end_date:
+                last_day = min(last_day, pd.Timestamp(end_date).normalize())
+
+        return tenant.figure_cache.get_figure(gantt_chart, tenant.dataset.time_tracking_index,
+                                              first_day.strftime("%Y-%m-%d"), n_days=(last_day - first_day).days + 1,
+                                              data_version=tenant.dataset.version)
+
+
+# 3.5 preloading
+# with "gunicorn --preload" (see gunicorn_config.py) the app is imported once in the master process,
+# so the data, the pages and the figures for the default inputs are built there and shared by all workers
+# (the workers are forked from the master, so they only get a copy of the memory pages they write to)
+def prebuild_figures():
+    for page_name in page_cache.page_builders:
+        page_cache.get_serialized_page(page_name, dataset)
+
+    # same inputs as sent by the browser when the pages are shown
+    default_date = json.loads(json.dumps(dataset.most_recent_date_time_tracking, cls=plotly.utils.PlotlyJSONEncoder))
+    update_youtube_kpi_plot("subscribers", None, None, None, "/")
+    update_video_uploads_plot("2019", None, None, "/")
+    update_deep_work_plot(7, None, None, None, None, "/")
+    update_weight_plot(None, None, None, "/")
+    update_time_spent_plot(None, None, None, "/")
+    show_daily_schedule({"points": [{"x": default_date}]}, [], 1, None, None, "/")
+
+if os.environ.get("APP_PRELOADED") == "1":
+    prebuild_figures()      # background threads don't survive forking, they are started after the fork
+else:
+    start_background_tasks()
 
 
 if __name__ == '__main__':
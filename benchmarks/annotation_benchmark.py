@@ -0,0 +1,85 @@
+# Benchmark: element-wise vs. vectorized marker colors and hovertexts
+# usage: python benchmarks/annotation_benchmark.py
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from annotation_functions import create_duration_hovertext, create_marker_colors
+
+
+# 1. element-wise reference implementation
+# (this is how the markers and hovertexts used to be created in "plotting_functions.py")
+def loop_marker_colors(x_values, marker_color):
+    marker_colors = []
+    for date_string in x_values:
+        date = pd.to_datetime(date_string)
+        day_of_week = date.dayofweek
+        if (day_of_week == 5) or (day_of_week == 6):
+            marker_colors.append("#F5F6F9")
+        else:
+            marker_colors.append(marker_color)
+
+    return marker_colors
+
+
+def loop_duration_hovertext(x_values, y_values):
+    hovertext_lst = []
+    for date_string, total_minutes in zip(x_values, y_values):
+        hours = total_minutes // 60
+        minutes = total_minutes - hours * 60
+
+        date = pd.to_datetime(date_string)
+        day_of_week = date.dayofweek
+        if (day_of_week == 5) or (day_of_week == 6):
+            day = "Weekend"
+        else:
+            day = "Workday"
+
+        hovertext = "{}<br>{:.0f}h {:02.0f}min".format(day, hours, minutes)
+        hovertext_lst.append(hovertext)
+
+    return hovertext_lst
+
+
+# 2. benchmark
+def create_data(n_points):
+    dates = pd.date_range("2000-01-01", periods=n_points, freq="D")
+    x_values = tuple(dates.strftime("%Y-%m-%d"))                      # plotly stores dates as strings
+    y_values = np.random.RandomState(0).uniform(0, 600, n_points)
+
+    return x_values, y_values
+
+
+def time_function(function, *args):
+    n_repeats = 3
+    return min(timeit.repeat(lambda: function(*args), number=1, repeat=n_repeats))
+
+
+def main():
+    print("{:>8} | {:>12} {:>12} {:>8} | {:>12} {:>12} {:>8}".format(
+        "points", "colors loop", "vectorized", "speedup", "hover loop", "vectorized", "speedup"))
+
+    for n_points in [1000, 10000, 50000]:
+        x_values, y_values = create_data(n_points)
+
+        # make sure that both implementations produce the same result
+        assert list(create_marker_colors(x_values, "orange")) == loop_marker_colors(x_values, "orange")
+        assert list(create_duration_hovertext(x_values, y_values)) == loop_duration_hovertext(x_values, y_values)
+
+        colors_loop = time_function(loop_marker_colors, x_values, "orange")
+        colors_vectorized = time_function(create_marker_colors, x_values, "orange")
+        hover_loop = time_function(loop_duration_hovertext, x_values, y_values)
+        hover_vectorized = time_function(create_duration_hovertext, x_values, y_values)
+
+        print("{:>8} | {:>11.3f}s {:>11.3f}s {:>7.0f}x | {:>11.3f}s {:>11.3f}s {:>7.0f}x".format(
+            n_points,
+            colors_loop, colors_vectorized, colors_loop / colors_vectorized,
+            hover_loop, hover_vectorized, hover_loop / hover_vectorized))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# Benchmark: plotting functions and app callbacks with 1, 5, 20 and 100 years of synthetic data
+# (time, peak memory and size of the JSON that is sent to the browser)
+# usage: python benchmarks/scaling_benchmark.py [--years 1 5 20 100] [--repeat 3] [--compare <results file>]
+#
+# the results are stored in "benchmarks/results" and compared to the previous run
+# (or to the file given with "--compare")
+import os
+import sys
+import glob
+import json
+import time
+import platform
+import argparse
+import datetime
+import subprocess
+import tracemalloc
+
+os.environ.setdefault("DATA_RELOAD_INTERVAL", "0")
+
+import numpy as np
+import pandas as pd
+import plotly
+import dash
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)     # the app loads "data/" relative to the working directory
+
+import app
+from data_functions import Dataset
+from helper_functions import determine_current_streak
+from plotting_functions import (
+    deep_work_plot,
+    gantt_chart,
+    git_hub_chart,
+    time_spent_plot,
+    weight_plot,
+    wim_hof_breathing_plot,
+    youtube_kpi_plot,
+)
+from synthetic_data import generate_data
+
+results_dir = os.path.join(root_dir, "benchmarks", "results")
+regression_threshold = 1.2      # slower by more than 20% than the previous run
+
+
+# 1. cases
+# 1.1 functions (called directly, with a dataset created from the synthetic data)
+def create_function_cases(dataset, data):
+    mid_date = dataset.df_time_tracking.Date.iloc[len(dataset.df_time_tracking) // 2].strftime("%Y-%m-%d")
+
+    return [
+        ("create_dataset", lambda: app.create_dataset(data, "benchmark")),
+        ("deep_work_plot (7)", lambda: deep_work_plot(dataset.deep_work_averages, 7)),
+        ("deep_work_plot (45)", lambda: deep_work_plot(dataset.deep_work_averages, 45)),
+        ("gantt_chart (day)", lambda: gantt_chart(dataset.time_tracking_index, mid_date)),
+        ("gantt_chart (ideal)", lambda: gantt_chart(dataset.time_tracking_index, show_ideal_schedule=True)),
+        ("gantt_chart (week)", lambda: gantt_chart(dataset.time_tracking_index, mid_date, n_days=7)),
+        ("git_hub_chart", lambda: git_hub_chart(dataset.df_habits[["self_discipline"]],
+                                                starting_date=dataset.df_habits.index[0],
+                                                figure_title="Habit Tracker: Self-Discipline")),
+        ("git_hub_chart (video uploads)", lambda: git_hub_chart(dataset.df_video_uploads_2019,
+                                                                starting_date=dataset.df_video_uploads_2019.index[0],
+                                                                figure_title="Video Uploads")),
+        ("time_spent_plot", lambda: time_spent_plot(dataset.time_spent_percentages)),
+        ("weight_plot", lambda: weight_plot(data["weight"])),
+        ("wim_hof_breathing_plot", lambda: wim_hof_breathing_plot(dataset.df_breathing)),
+        ("youtube_kpi_plot (subscribers)", lambda: youtube_kpi_plot(dataset.df_youtube_kpis, "subscribers")),
+        ("youtube_kpi_plot (views)", lambda: youtube_kpi_plot(dataset.df_youtube_kpis, "views")),
+        ("determine_current_streak", lambda: determine_current_streak(dataset.df_habits["omad"])),
+    ]
+
+
+# 1.2 callbacks (requests to the app, including serialization)
+def create_callback_cases(dataset):
+    mid_date = dataset.df_time_tracking.Date.iloc[len(dataset.df_time_tracking) // 2].strftime("%Y-%m-%d")
+
+    def request(output_id, output_property, *inputs):
+        return {"output": {"id": output_id, "property": output_property},
+                "inputs": [{"id": id_, "property": property_, "value": value} for id_, property_, value in inputs],
+                "state": [{"id": "url", "property": "pathname", "value": "/"}]}   # (page of the default tenant)
+
+    no_date_range = [("date-range", "start_date", None), ("date-range", "end_date", None)]    # (whole history)
+
+    cases = [("show_page ({})".format(page), request("page-content", "children", ("url", "pathname", "/" + page)))
+             for page in ["work", "health", "misc", "archive"]]
+    cases += [
+        ("update_youtube_kpi_plot", request("youtube-kpi-plot", "figure",
+                                            ("youtube-kpi-selection", "value", "subscribers"),
+                                            ("youtube-kpi-plot", "relayoutData", None), *no_date_range)),
+        ("update_video_uploads_plot", request("video-uploads-plot", "figure",
+                                              ("video-uploads-year-selection", "value", "2019"), *no_date_range)),
+        ("update_video_uploads_plot (2018)", request("video-uploads-plot", "figure",
+                                                     ("video-uploads-year-selection", "value", "2018"), *no_date_range)),
+        ("update_deep_work_plot", request("deep-work-plot", "figure",
+                                          ("rolling-average-selection", "value", 7),
+                                          ("rolling-average-custom", "value", None),
+                                          ("deep-work-plot", "relayoutData", None), *no_date_range)),
+        ("update_weight_plot", request("weight-plot-new", "figure",
+                                       ("weight-plot-new", "relayoutData", None), *no_date_range)),
+        ("update_time_spent_plot", request("time-spent-plot", "figure",
+                                           ("time-spent-plot", "relayoutData", None), *no_date_range)),
+        ("show_daily_schedule", request("gantt-chart", "figure",
+                                        ("time-spent-plot", "hoverData", {"points": [{"x": mid_date}]}),
+                                        ("checkbox-ideal-schedule", "values", []),
+                                        ("schedule-period-selection", "value", 1), *no_date_range)),
+        ("show_daily_schedule (week)", request("gantt-chart", "figure",
+                                               ("time-spent-plot", "hoverData", {"points": [{"x": mid_date}]}),
+                                               ("checkbox-ideal-schedule", "values", []),
+                                               ("schedule-period-selection", "value", 7), *no_date_range)),
+        ("show_daily_schedule (ideal)", request("gantt-chart", "figure",
+                                                ("time-spent-plot", "hoverData", {"points": [{"x": mid_date}]}),
+                                                ("checkbox-ideal-schedule", "values", ["ideal schedule"]),
+                                                ("schedule-period-selection", "value", 1), *no_date_range)),
+    ]
+
+    return cases
+
+
+# 2. measurements
+def measure_function(function, n_repeats):
+    # 2.1 time (best of "n_repeats")
+    durations = []
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+
+    # 2.2 peak memory (in a separate call, since tracing slows everything down)
+    tracemalloc.start()
+    function()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # 2.3 JSON size of figures
+    if isinstance(result, (plotly.graph_objs.Figure, dict)):
+        json_size = len(json.dumps(result, cls=plotly.utils.PlotlyJSONEncoder))
+    else:
+        json_size = None
+
+    return {"seconds": min(durations), "peak_memory_bytes": peak_memory, "json_bytes": json_size}
+
+
+def measure_callback(client, dataset, payload, n_repeats):
+    # every request gets a dataset with a new version, so that nothing is served from the caches
+    n_calls = [0]
+
+    def call():
+        n_calls[0] += 1
+        values = {name: value for name, value in vars(dataset).items() if name != "version"}
+        app.dataset = Dataset(("benchmark", dataset.version, n_calls[0]), **values)
+        app.figure_cache.set_data_version(app.dataset.version)
+
+        response = client.post("/_dash-update-component", json=payload)
+        assert response.status_code == 200, response.status_code
+        return response
+
+    measurement = measure_function(call, n_repeats)
+    measurement["json_bytes"] = len(call().data)
+
+    return measurement
+
+
+def run(years, n_repeats):
+    client = app.server.test_client()
+    original_dataset = app.dataset
+
+    results = []
+    try:
+        for n_years in years:
+            data = generate_data(n_years)
+            dataset = app.create_dataset(data, ("benchmark", n_years))
+
+            for kind, cases, measure in [
+                    ("function", create_function_cases(dataset, data), lambda case: measure_function(case, n_repeats)),
+                    ("callback", create_callback_cases(dataset),
+                     lambda case: measure_callback(client, dataset, case, n_repeats))]:
+                for name, case in cases:
+                    result = {"n_years": n_years, "kind": kind, "name": name}
+                    result.update(measure(case))
+                    results.append(result)
+                    print_result(result)
+    finally:
+        app.dataset = original_dataset
+        app.figure_cache.set_data_version(original_dataset.version)
+
+    return results
+
+
+# 3. results
+def print_result(result, previous_result=None):
+    line = "{:>4}y {:<9} {:<32} {:>9.1f}ms {:>9.1f}MB {:>10}".format(
+        result["n_years"], result["kind"], result["name"],
+        result["seconds"] * 1000,
+        result["peak_memory_bytes"] / 1024 ** 2,
+        "-" if result["json_bytes"] is None else "{:.0f}kB".format(result["json_bytes"] / 1024))
+
+    if previous_result is not None:
+        ratio = result["seconds"] / previous_result["seconds"]
+        line += "   {:>5.2f}x{}".format(ratio, "  <-- slower" if ratio > regression_threshold else "")
+
+    print(line)
+
+
+def save_results(results):
+    if not os.path.isdir(results_dir):
+        os.makedirs(results_dir)
+
+    created = datetime.datetime.now()
+    file_path = os.path.join(results_dir, "benchmark_{}.json".format(created.strftime("%Y%m%d_%H%M%S")))
+    with open(file_path, "w") as json_file:
+        json.dump({"created": created.isoformat(),
+                   "commit": determine_commit(),
+                   "environment": determine_environment(),
+                   "results": results},
+                  json_file, indent=2)
+
+    return file_path
+
+
+def compare_results(results, previous_file_path):
+    with open(previous_file_path) as json_file:
+        previous = json.load(json_file)
+
+    print("\ncompared to {} (commit {}):".format(os.path.basename(previous_file_path), previous["commit"]))
+    previous_results = {(r["n_years"], r["kind"], r["name"]): r for r in previous["results"]}
+    for result in results:
+        print_result(result, previous_results.get((result["n_years"], result["kind"], result["name"])))
+
+
+def determine_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=root_dir).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def determine_environment():
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "plotly": plotly.__version__,
+            "dash": dash.__version__}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 5, 20, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", help="results file to compare with (default: the previous run)")
+    args = parser.parse_args()
+
+    previous_file_paths = sorted(glob.glob(os.path.join(results_dir, "benchmark_*.json")))
+    years = [int(n_years) if n_years == int(n_years) else n_years for n_years in args.years]
+
+    results = run(years, args.repeat)
+    file_path = save_results(results)
+    print("\nresults saved to {}".format(file_path))
+
+    previous_file_path = args.compare or (previous_file_paths[-1] if previous_file_paths else None)
+    if previous_file_path is not None:
+        compare_results(results, previous_file_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Synthetic data with the same files, columns and dtypes as the data in "data/"
+# (but for any number of years, to see how the app scales with the amount of data)
+# usage: python benchmarks/synthetic_data.py <n_years> <data_dir>
+import os
+import sys
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_functions import data_files
+
+
+# (the data ends where the data in "data/" ends, so that e.g. the date ranges in "app.py" aren't empty)
+last_date = "2019-12-31"
+tasks = ["Deep Work", "Gym", "Learning", "Shallow Work"]
+
+
+# 1. data frames
+# (same format as the data returned by "load_data" in "data_functions.py")
+def generate_data(n_years, seed=0):
+    random_state = np.random.RandomState(seed)
+    dates = pd.date_range(end=last_date, periods=int(n_years * 365), freq="D", name="date")
+    n_days = len(dates)
+
+    data = OrderedDict()
+    data["youtube_kpis"] = pd.DataFrame({"subscribers": random_state.poisson(1, n_days) - random_state.binomial(1, 0.1, n_days),
+                                         "views": random_state.poisson(60, n_days)},
+                                        index=dates, columns=["subscribers", "views"])
+
+    data["video_uploads_2018"] = _create_uploads(dates, random_state)
+    data["video_uploads_2019"] = _create_uploads(dates, random_state)
+
+    deep_work = random_state.uniform(0, 540, n_days).round()
+    deep_work[random_state.rand(n_days) < 0.1] = np.nan
+    data["deep_work"] = pd.DataFrame({"Deep Work": deep_work}, index=dates)
+
+    habits = ["ab_workout", "cold_shower", "lucid_dreaming", "omad", "self_discipline"]
+    data["habits"] = pd.DataFrame(random_state.rand(n_days, len(habits)) < [0.4, 0.65, 0.1, 0.1, 0.05],
+                                  index=dates, columns=habits)
+
+    breathing = np.sort(random_state.randint(60, 210, (n_days, 3)), axis=1)
+    data["breathing"] = pd.DataFrame(breathing, index=dates, columns=["round_1", "round_2", "round_3"])
+
+    data["time_tracking"] = _create_time_tracking(dates, random_state)
+
+    goal = np.linspace(91.5, 85, n_days)
+    actual = (goal + random_state.normal(0, 0.5, n_days)).round(1)
+    actual[random_state.rand(n_days) < 0.25] = np.nan
+    data["weight"] = pd.DataFrame({"upper bound": goal + 1, "goal": goal, "lower bound": goal - 1, "actual": actual},
+                                  index=dates, columns=["upper bound", "goal", "lower bound", "actual"])
+
+    return data
+
+
+def _create_uploads(dates, random_state):
+    return pd.DataFrame({"video_uploaded": random_state.binomial(1, 0.2, len(dates)).astype(bool)}, index=dates)
+
+
+def _create_time_tracking(dates, random_state):
+    # 1.1 ideal schedule (one day, like in "data/")
+    ideal_starts = pd.to_datetime(["2018-11-20 08:00", "2018-11-20 12:00", "2018-11-20 16:00", "2018-11-20 21:00"])
+    ideal_durations = np.array([180, 90, 180, 120], dtype=np.int32)      # in minutes
+    df_ideal = pd.DataFrame({"Task": tasks,
+                             "Start": ideal_starts,
+                             "Finish": ideal_starts + pd.to_timedelta(ideal_durations, unit="m"),
+                             "Duration": ideal_durations,
+                             "Date": pd.Timestamp("2018-11-20"),
+                             "ideal_schedule": True})
+
+    # 1.2 between 1 and 8 time blocks per day, one after the other (starting at 08:00)
+    n_blocks = random_state.randint(1, 9, len(dates))
+    block_dates = np.repeat(dates.values, n_blocks)
+    n_rows = len(block_dates)
+
+    durations = random_state.randint(10, 91, n_rows).astype(np.int32)       # in minutes
+    gaps = random_state.randint(0, 31, n_rows)
+    offsets = pd.Series(durations + gaps).groupby(block_dates).cumsum().values - durations
+
+    starts = pd.DatetimeIndex(block_dates) + pd.Timedelta(hours=8) + pd.to_timedelta(offsets, unit="m")
+    df_actual = pd.DataFrame({"Task": np.array(tasks)[random_state.randint(0, len(tasks), n_rows)],
+                              "Start": starts,
+                              "Finish": starts + pd.to_timedelta(durations, unit="m"),
+                              "Duration": durations,
+                              "Date": block_dates,
+                              "ideal_schedule": False})
+
+    columns = ["Task", "Start", "Finish", "Duration", "Date", "ideal_schedule"]
+    df = pd.concat([df_ideal, df_actual], ignore_index=True)[columns]
+    df["Task"] = df.Task.astype("category")
+
+    return df
+
+
+# 2. CSV files
+# (so that loading the data can be benchmarked, too)
+def write_data(data, data_dir):
+    if not os.path.isdir(data_dir):
+        os.makedirs(data_dir)
+
+    for name, spec in data_files.items():
+        # (the CSV files contain 0/1 flags and durations like "0 days 01:05:00")
+        df = data[name]
+        if spec.get("flags"):
+            df = df.astype(int)
+        for column in spec.get("parse_minutes", []):
+            df = df.assign(**{column: pd.to_timedelta(df[column], unit="m")})
+
+        file_path = os.path.join(data_dir, spec["file_name"])
+        df.to_csv(file_path, index=spec.get("index_col") is not None)
+
+
+if __name__ == "__main__":
+    write_data(generate_data(float(sys.argv[1])), sys.argv[2])
@@ -0,0 +1,167 @@
+# Memory of the gunicorn workers with and without preloading the app (PRELOAD_APP=1, see gunicorn_config.py)
+# usage: python benchmarks/worker_memory.py [--workers 4] [--requests 40]
+#
+# for every mode, gunicorn is started, the memory of the master and the workers is measured
+# after start-up ("before") and after every page and plot was requested a few times ("after")
+# RSS counts shared memory pages in every process, PSS splits them between the processes that share them
+# (so the sum of PSS is the actual memory usage, Linux only)
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# 1. memory of a process
+def determine_memory(pid):
+    memory = {"rss": 0, "pss": 0, "shared": 0}
+    file_path = "/proc/{}/smaps_rollup".format(pid)
+    if not os.path.exists(file_path):
+        file_path = "/proc/{}/smaps".format(pid)        # older kernels
+
+    with open(file_path) as smaps_file:
+        for line in smaps_file:
+            fields = line.split()
+            if fields[0] == "Rss:":
+                memory["rss"] += int(fields[1]) * 1024
+            elif fields[0] == "Pss:":
+                memory["pss"] += int(fields[1]) * 1024
+            elif fields[0] in ("Shared_Clean:", "Shared_Dirty:"):
+                memory["shared"] += int(fields[1]) * 1024
+
+    return memory
+
+
+def determine_worker_pids(master_pid):
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/{}/stat".format(entry)) as stat_file:
+                parent_pid = int(stat_file.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError):
+            continue
+        if parent_pid == master_pid:
+            pids.append(int(entry))
+
+    return sorted(pids)
+
+
+# 2. requests to the app
+def create_requests():
+    def request(output_id, output_property, *inputs):
+        return {"output": {"id": output_id, "property": output_property},
+                "inputs": [{"id": id_, "property": property_, "value": value} for id_, property_, value in inputs],
+                "state": [{"id": "url", "property": "pathname", "value": "/"}]}   # (page of the default tenant)
+
+    no_date_range = [("date-range", "start_date", None), ("date-range", "end_date", None)]    # (whole history)
+
+    requests = [request("page-content", "children", ("url", "pathname", "/" + page))
+                for page in ["work", "health", "misc", "archive"]]
+    requests += [
+        request("youtube-kpi-plot", "figure",
+                ("youtube-kpi-selection", "value", "subscribers"), ("youtube-kpi-plot", "relayoutData", None),
+                *no_date_range),
+        request("video-uploads-plot", "figure", ("video-uploads-year-selection", "value", "2019"), *no_date_range),
+        request("deep-work-plot", "figure",
+                ("rolling-average-selection", "value", 7), ("rolling-average-custom", "value", None),
+                ("deep-work-plot", "relayoutData", None), *no_date_range),
+        request("weight-plot-new", "figure", ("weight-plot-new", "relayoutData", None), *no_date_range),
+        request("time-spent-plot", "figure", ("time-spent-plot", "relayoutData", None), *no_date_range),
+    ]
+
+    return requests
+
+
+def send_requests(port, n_requests):
+    # (gunicorn distributes the requests over the workers)
+    requests = create_requests()
+    for i in range(n_requests):
+        body = json.dumps(requests[i % len(requests)]).encode()
+        request = urllib.request.Request("http://127.0.0.1:{}/_dash-update-component".format(port), data=body,
+                                         headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(request).read()
+
+
+def wait_until_ready(process, port, timeout=120):
+    start = time.time()
+    while time.time() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited with code {}".format(process.returncode))
+        try:
+            urllib.request.urlopen("http://127.0.0.1:{}/_dash-layout".format(port)).read()
+            return
+        except OSError:
+            time.sleep(0.5)
+
+    raise RuntimeError("gunicorn didn't start within {} seconds".format(timeout))
+
+
+def determine_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# 3. report
+def measure(preload, n_workers, n_requests):
+    port = determine_free_port()
+    env = dict(os.environ, PRELOAD_APP="1" if preload else "0")
+    command = [sys.executable, "-m", "gunicorn.app.wsgiapp", "app:server", "--config", "gunicorn_config.py",
+               "--workers", str(n_workers), "--bind", "127.0.0.1:{}".format(port), "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=root_dir, env=env)
+
+    try:
+        wait_until_ready(process, port)
+        time.sleep(1)   # all workers are ready
+        before = snapshot(process.pid)
+        send_requests(port, n_requests)
+        after = snapshot(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+
+    return before, after
+
+
+def snapshot(master_pid):
+    processes = [("master", master_pid)]
+    processes += [("worker", pid) for pid in determine_worker_pids(master_pid)]
+
+    return [(role, pid, determine_memory(pid)) for role, pid in processes]
+
+
+def print_snapshot(title, processes):
+    print(title)
+    print("    {:<8} {:>7} {:>10} {:>10} {:>10}".format("process", "pid", "RSS", "PSS", "shared"))
+    for role, pid, memory in processes:
+        print("    {:<8} {:>7} {:>8.1f}MB {:>8.1f}MB {:>8.1f}MB".format(
+            role, pid, memory["rss"] / 1024 ** 2, memory["pss"] / 1024 ** 2, memory["shared"] / 1024 ** 2))
+    print("    {:<8} {:>7} {:>8.1f}MB {:>8.1f}MB".format(
+        "total", "",
+        sum(memory["rss"] for _, _, memory in processes) / 1024 ** 2,
+        sum(memory["pss"] for _, _, memory in processes) / 1024 ** 2))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=40)
+    args = parser.parse_args()
+
+    for preload in [False, True]:
+        before, after = measure(preload, args.workers, args.requests)
+        mode = "with preloading" if preload else "without preloading"
+        print_snapshot("{}, before requests:".format(mode), before)
+        print_snapshot("{}, after {} requests:".format(mode, args.requests), after)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import gzip
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+import pandas as pd
+import plotly
+
+
+# 1. figure cache
+# (LRU cache for plotly figures, keyed on plot function, arguments and data version)
+# the data version is passed with every lookup, taken from the same dataset as the arguments,
+# so a figure is never stored under a different version than the data it was built from
+class FigureCache:
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.data_version = None
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._figures = OrderedDict()    # key -> (figure, n_bytes)
+        self._lock = threading.Lock()
+
+    def set_data_version(self, data_version):
+        # all cached figures were built from the old data, so they are dropped
+        # (and figures of other versions are no longer stored, see "get_figure")
+        with self._lock:
+            if data_version != self.data_version:
+                self._figures.clear()
+                self.n_bytes = 0
+                self.data_version = data_version
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+            self.n_bytes = 0
+
+    def get_figure(self, plot_function, *args, data_version, **kwargs):
+        key = (plot_function.__name__,
+               tuple(_make_hashable(arg) for arg in args),
+               tuple(sorted((name, _make_hashable(value)) for name, value in kwargs.items())),
+               data_version)
+
+        # 1.1 cache hit
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return self._figures[key][0]
+            self.misses += 1
+
+        # 1.2 cache miss
+        # (figure is built outside of the lock so that slow plots don't block other requests)
+        fig = plot_function(*args, **kwargs)
+        n_bytes = determine_figure_size(fig)
+
+        with self._lock:
+            if data_version != self.data_version or n_bytes > self.max_bytes:
+                # figure of older (or not yet published) data or figure is too big to be cached
+                return fig
+
+            if key in self._figures:
+                self.n_bytes -= self._figures[key][1]
+            self._figures[key] = (fig, n_bytes)
+            self.n_bytes += n_bytes
+
+            # 1.3 evict least recently used figures
+            while len(self._figures) > self.max_entries or self.n_bytes > self.max_bytes:
+                _, (_, evicted_n_bytes) = self._figures.popitem(last=False)
+                self.n_bytes -= evicted_n_bytes
+
+        return fig
+
+
+def determine_figure_size(fig):
+    return len(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def _make_hashable(value):
+    # DataFrames/Series are identified by object and shape
+    # (their content is covered by the data version)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return (type(value).__name__, id(value), value.shape)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _make_hashable(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_make_hashable(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(_make_hashable(item) for item in value)
+
+    return value
+
+
+# 2. page cache
+# (sub-pages of the app are only built when they are requested for the first time)
+# body of the callback response that shows a page, as JSON and gzip-compressed JSON
+SerializedPage = namedtuple("SerializedPage", ["body", "gzip_body"])
+
+
+class PageCache:
+
+    def __init__(self, page_builders, output_property="children"):
+        self.page_builders = page_builders    # page name -> function that creates the page from a dataset
+        self.output_property = output_property
+
+        self.data_version = None
+        self.n_bytes = 0        # size of the pages (as JSON) and of their serialized bodies
+        self._pages = {}        # (page name, data version) -> (page, SerializedPage)
+        self._lock = threading.Lock()
+
+    def get_page(self, page_name, dataset):
+        return self._get_entry(page_name, dataset)[0]
+
+    def get_serialized_page(self, page_name, dataset):
+        # the page serialized like Dash serializes the response of a callback ({"response": {"props": ...}}),
+        # once per data version (so that showing a page doesn't require converting all components to JSON)
+        return self._get_entry(page_name, dataset)[1]
+
+    def _get_entry(self, page_name, dataset):
+        key = (page_name, dataset.version)
+        entry = self._pages.get(key)
+        if entry is not None:
+            return entry
+
+        # only one thread builds a page, other requests for it wait until it is done
+        with self._lock:
+            # pages of older datasets are dropped
+            if dataset.version != self.data_version:
+                self._pages.clear()
+                self.n_bytes = 0
+                self.data_version = dataset.version
+
+            if key not in self._pages:
+                page = self.page_builders[page_name](dataset)
+                response = {"response": {"props": {self.output_property: page}}}
+                body = json.dumps(response, cls=plotly.utils.PlotlyJSONEncoder).encode()
+                serialized_page = SerializedPage(body, gzip.compress(body, compresslevel=9))
+
+                # (the components of the page are counted with the size of their JSON, like the figures)
+                self._pages[key] = (page, serialized_page)
+                self.n_bytes += 2 * len(body) + len(serialized_page.gzip_body)
+
+            return self._pages[key]
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self.n_bytes = 0
+            self.data_version = None
+
+    def prewarm(self, dataset):
+        # build and serialize all pages in a background thread
+        def build_pages():
+            for page_name in self.page_builders:
+                self.get_serialized_page(page_name, dataset)
+
+        thread = threading.Thread(target=build_pages, name="prewarm-pages", daemon=True)
+        thread.start()
+
+        return thread
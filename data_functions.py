@@ -0,0 +1,419 @@
+import io
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# 1. data files
+# (how each CSV file in the data directory is parsed)
+# the data is kept in compact dtypes: 0/1 flags as bool ("flags"), durations as int32 minutes ("parse_minutes")
+# and columns with few distinct strings as categoricals ("categorical_columns")
+data_files = OrderedDict([
+    ("youtube_kpis", {"file_name": "youtube_kpis.csv", "index_col": "date", "parse_dates": ["date"]}),
+    ("video_uploads_2018", {"file_name": "video_uploads_2018.csv", "index_col": "date", "parse_dates": ["date"],
+                            "flags": True}),
+    ("video_uploads_2019", {"file_name": "video_uploads_2019.csv", "index_col": "date", "parse_dates": ["date"],
+                            "flags": True}),
+    ("deep_work", {"file_name": "deep_work.csv", "index_col": "date", "parse_dates": ["date"]}),
+    ("habits", {"file_name": "habits.csv", "index_col": "date", "parse_dates": ["date"], "flags": True}),
+    ("breathing", {"file_name": "wim_hof_breathing.csv", "index_col": "date", "parse_dates": ["date"]}),
+    ("time_tracking", {"file_name": "time_tracking.csv",
+                       "parse_dates": ["Start", "Finish", "Date"],
+                       "parse_minutes": ["Duration"],
+                       "categorical_columns": ["Task"]}),
+    ("weight", {"file_name": "weight.csv", "index_col": "date", "parse_dates": ["date"]}),
+])
+
+cache_format_version = 3
+
+
+def load_data(data_dir="data", cache_dir=None):
+    # returns the data frames and the states of the files they were parsed from
+    # (modification time, size and hash of the bytes that were parsed, see DataReloader)
+    if cache_dir is None:
+        cache_dir = os.path.join(data_dir, ".cache")
+
+    data = OrderedDict()
+    file_states = OrderedDict()
+    for name, spec in data_files.items():
+        file_path = os.path.join(data_dir, spec["file_name"])
+        data[name], file_states[name] = load_csv(file_path, cache_dir, **determine_read_options(spec))
+
+    return data, file_states
+
+
+def determine_loaded_data_version(data_dir, file_states):
+    # data version of the files in the state they were parsed in
+    # (changes whenever one of the CSV files is modified and reloaded, see DataReloader)
+    return tuple(sorted((os.path.join(data_dir, data_files[name]["file_name"]), file_state["mtime_ns"],
+                         file_state["size"]) for name, file_state in file_states.items()))
+
+
+def determine_read_options(spec):
+    return {"index_col": spec.get("index_col"),
+            "parse_dates": spec.get("parse_dates", []),
+            "parse_timedeltas": spec.get("parse_timedeltas", []),
+            "parse_minutes": spec.get("parse_minutes", []),
+            "categorical_columns": spec.get("categorical_columns", []),
+            "flags": spec.get("flags", False)}
+
+
+# 2. loading a CSV file
+# (every CSV file is parsed only once, afterwards it is loaded from a binary cache
+# with one typed NumPy array per column, e.g. datetime64/timedelta64 instead of strings)
+def load_csv(file_path, cache_dir, index_col=None, parse_dates=(), parse_timedeltas=(),
+             parse_minutes=(), categorical_columns=(), flags=False):
+    read_options = {"index_col": index_col,
+                    "parse_dates": list(parse_dates),
+                    "parse_timedeltas": list(parse_timedeltas),
+                    "parse_minutes": list(parse_minutes),
+                    "categorical_columns": list(categorical_columns),
+                    "flags": flags}
+
+    file_name = os.path.basename(file_path)
+    cache_path = os.path.join(cache_dir, file_name + ".npz")
+    meta_path = os.path.join(cache_dir, file_name + ".json")
+
+    # 2.1 try to load from cache
+    # (the cache holds the content of the file in the state stored in its meta data)
+    meta = _read_meta(meta_path)
+    if _is_cache_valid(meta, meta_path, file_path, read_options):
+        try:
+            file_state = {key: meta[key] for key in ["mtime_ns", "size", "file_hash", "ends_with_newline"]}
+            return _read_cache(cache_path, meta), file_state
+        except (OSError, KeyError, ValueError):
+            pass    # cache is corrupt, so the CSV file gets parsed again
+
+    # 2.2 parse CSV file and create cache
+    # (the cache is labelled with the state of the file before it was read and the hash of the bytes that
+    # were parsed, so that it never looks valid for content it doesn't hold, even if the file changes meanwhile)
+    # (rows that are appended after the "stat" are part of the content, so the size is the number of bytes read)
+    stat = os.stat(file_path)
+    with open(file_path, "rb") as csv_file:
+        content = csv_file.read()
+    file_state = {"mtime_ns": stat.st_mtime_ns,
+                  "size": len(content),
+                  "file_hash": hashlib.sha1(content).hexdigest(),
+                  "ends_with_newline": content.endswith(b"\n")}
+
+    df = read_csv(io.BytesIO(content), **read_options)
+    try:
+        _write_cache(df, cache_path, meta_path, file_state, read_options)
+    except (OSError, ValueError):
+        pass        # e.g. read-only file system (the app still works, it just has to parse the CSV files)
+
+    return df, file_state
+
+
+def read_csv(file_path, index_col=None, parse_dates=(), parse_timedeltas=(),
+             parse_minutes=(), categorical_columns=(), flags=False):
+    df = pd.read_csv(file_path, index_col=index_col, parse_dates=list(parse_dates))
+    for column in parse_timedeltas:
+        df[column] = pd.to_timedelta(df[column])
+    for column in parse_minutes:
+        df[column] = (pd.to_timedelta(df[column]) // pd.Timedelta(minutes=1)).astype(np.int32)
+    for column in categorical_columns:
+        df[column] = df[column].astype("category")
+    if flags:
+        df = df.astype(bool)
+
+    return df
+
+
+def read_csv_tail(file_path, df, offset, size, **read_options):
+    # only parse the rows that were appended between "offset" (number of bytes that were already read)
+    # and "size" (size of the file when its state was determined, rows appended since then are read next time)
+    with open(file_path, "rb") as csv_file:
+        header = csv_file.readline()
+        csv_file.seek(offset)
+        tail = csv_file.read(size - offset)
+
+    # (a row that is still being written is left out)
+    tail = tail[:tail.rfind(b"\n") + 1]
+
+    df_tail = read_csv(io.BytesIO(header + tail), **read_options)
+    if len(df_tail) == 0:
+        return df
+    if read_options.get("index_col") is None:
+        df_tail.index = df_tail.index + len(df)
+
+    # (categoricals with different categories would be concatenated as strings)
+    df = pd.concat([df, df_tail])
+    for column in read_options.get("categorical_columns", []):
+        df[column] = df[column].astype("category")
+
+    return df
+
+
+# 3. cache files
+# 3.1 meta data (state of the CSV file when the cache was created)
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as meta_file:
+            return json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_cache_valid(meta, meta_path, file_path, read_options):
+    if meta is None:
+        return False
+    if meta["cache_format_version"] != cache_format_version or meta["read_options"] != read_options:
+        return False
+
+    # file hasn't been touched
+    stat = os.stat(file_path)
+    if (stat.st_mtime_ns == meta["mtime_ns"]) and (stat.st_size == meta["size"]):
+        return True
+
+    # file has been touched, but its content is the same
+    # (e.g. after a "git checkout"), so only the modification time has to be updated
+    if (stat.st_size == meta["size"]) and (_hash_file(file_path) == meta["file_hash"]):
+        meta["mtime_ns"] = stat.st_mtime_ns
+        try:
+            _write_json(meta, meta_path)
+        except OSError:
+            pass
+        return True
+
+    return False
+
+
+def _hash_file(file_path):
+    sha1 = hashlib.sha1()
+    with open(file_path, "rb") as csv_file:
+        for chunk in iter(lambda: csv_file.read(1024 * 1024), b""):
+            sha1.update(chunk)
+
+    return sha1.hexdigest()
+
+
+# 3.2 column arrays
+def _read_cache(cache_path, meta):
+    with np.load(cache_path, allow_pickle=False) as arrays:
+        columns = OrderedDict()
+        for i, column in enumerate(meta["columns"]):
+            if column in meta["categorical_columns"]:
+                columns[column] = pd.Categorical.from_codes(arrays["column_{}".format(i)],
+                                                            arrays["column_{}_categories".format(i)])
+            else:
+                columns[column] = arrays["column_{}".format(i)]
+        df = pd.DataFrame(columns, columns=meta["columns"])
+
+        if meta["index_name"] is not None:
+            df.index = pd.Index(arrays["index"], name=meta["index_name"])
+
+    return df
+
+
+def _write_cache(df, cache_path, meta_path, file_state, read_options):
+    # ("file_state": modification time, size, hash and last byte of the CSV file that "df" was parsed from)
+    if not os.path.isdir(os.path.dirname(cache_path)):
+        os.makedirs(os.path.dirname(cache_path))
+
+    arrays = {}
+    categorical_columns = []
+    for i, column in enumerate(df.columns):
+        # categoricals are stored as their codes (e.g. int8) and their categories
+        if pd.api.types.is_categorical_dtype(df[column]):
+            categorical_columns.append(column)
+            arrays["column_{}".format(i)] = df[column].cat.codes.values
+            arrays["column_{}_categories".format(i)] = _to_typed_array(df[column].cat.categories.values)
+        else:
+            arrays["column_{}".format(i)] = _to_typed_array(df[column].values)
+    if read_options["index_col"] is not None:
+        arrays["index"] = _to_typed_array(df.index.values)
+
+    meta = {"cache_format_version": cache_format_version,
+            "read_options": read_options,
+            "columns": list(df.columns),
+            "categorical_columns": categorical_columns,
+            "index_name": df.index.name if read_options["index_col"] is not None else None,
+            "mtime_ns": file_state["mtime_ns"],
+            "size": file_state["size"],
+            "file_hash": file_state["file_hash"],
+            "ends_with_newline": file_state["ends_with_newline"]}
+
+    # write to temporary files first, so that other processes never read half-written files
+    # (and remove the old meta data, so that the new arrays are never read with the old meta data)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    temp_cache_path = "{}.{}.tmp".format(cache_path, os.getpid())
+    with open(temp_cache_path, "wb") as cache_file:
+        np.savez(cache_file, **arrays)
+    os.replace(temp_cache_path, cache_path)
+    _write_json(meta, meta_path)
+
+
+def _to_typed_array(values):
+    # strings are stored as fixed-width unicode arrays (so that no pickling is required)
+    if values.dtype == object:
+        if not all(isinstance(value, str) for value in values):
+            raise ValueError("only columns with strings can be cached")
+        return values.astype(str)
+
+    return values
+
+
+def _write_json(data, file_path):
+    temp_file_path = "{}.{}.tmp".format(file_path, os.getpid())
+    with open(temp_file_path, "w") as json_file:
+        json.dump(data, json_file)
+    os.replace(temp_file_path, file_path)
+
+
+# 4. reloading data
+class Dataset:
+    # immutable snapshot of the data and of the values that are derived from it
+    # (a reload creates a new snapshot instead of changing the current one,
+    # so that callbacks which are still running keep working with consistent data)
+
+    def __init__(self, version, **values):
+        object.__setattr__(self, "version", version)
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Dataset is immutable, create a new one instead")
+
+
+class DataReloader:
+    # checks the CSV files for changes in a background thread and
+    # passes the reloaded data and its data version to "on_reload" (which is responsible for publishing it)
+    # ("file_states": the states of the files that "data" was parsed from, as returned by "load_data",
+    # so that changes made after the data was loaded are never mistaken for data that is already loaded)
+
+    def __init__(self, data_dir, data, file_states, on_reload, interval=60, cache_dir=None):
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir if cache_dir is not None else os.path.join(data_dir, ".cache")
+        self.data = data
+        self.on_reload = on_reload
+        self.interval = interval
+
+        self._file_states = dict(file_states)
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name="data-reloader", daemon=True)
+        thread.start()
+
+        return thread
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check_for_changes()
+            except Exception as error:
+                # the app keeps running with the current data
+                print("Warning! Reloading the data failed: {!r}".format(error))
+
+    def check_for_changes(self):
+        changed_names = []
+        for name in data_files:
+            stat = os.stat(self._file_path(name))
+            file_state = self._file_states[name]
+            if (stat.st_mtime_ns != file_state["mtime_ns"]) or (stat.st_size != file_state["size"]):
+                changed_names.append(name)
+
+        if not changed_names:
+            return False
+
+        # 4.1 reload changed files
+        # (the frames of the other files are shared with the current data, they are never modified)
+        data = OrderedDict(self.data)
+        for name in changed_names:
+            data[name], self._file_states[name] = self._reload_file(name)
+
+        if all(data[name] is self.data[name] for name in changed_names):
+            return False    # only the modification times changed
+
+        # 4.2 publish new data
+        self.data = data
+        self.on_reload(data, determine_loaded_data_version(self.data_dir, self._file_states))
+
+        return True
+
+    def _reload_file(self, name):
+        spec = data_files[name]
+        read_options = determine_read_options(spec)
+        file_path = self._file_path(name)
+
+        # returns the data frame and the state of the file it was parsed from
+        old_file_state = self._file_states[name]
+        new_file_state = _determine_file_state(file_path, prefix_size=old_file_state["size"])
+
+        # only the modification time changed
+        if new_file_state["file_hash"] == old_file_state["file_hash"]:
+            return self.data[name], new_file_state
+
+        # rows were only appended to the file, so only the new rows have to be parsed
+        if new_file_state["prefix_hash"] == old_file_state["file_hash"] and old_file_state["ends_with_newline"]:
+            df = read_csv_tail(file_path, self.data[name], old_file_state["size"], new_file_state["size"],
+                               **read_options)
+            if not new_file_state["ends_with_newline"]:
+                # the last row was left out, the next change is loaded completely (see "ends_with_newline")
+                return df, new_file_state
+            try:
+                cache_path = os.path.join(self.cache_dir, spec["file_name"] + ".npz")
+                meta_path = os.path.join(self.cache_dir, spec["file_name"] + ".json")
+                _write_cache(df, cache_path, meta_path, new_file_state, read_options)
+            except (OSError, ValueError):
+                pass
+            return df, new_file_state
+
+        return load_csv(file_path, self.cache_dir, **read_options)
+
+    def _file_path(self, name):
+        return os.path.join(self.data_dir, data_files[name]["file_name"])
+
+
+def determine_n_appended_rows(df, df_previous):
+    # number of rows that were appended to "df_previous" to get "df"
+    # (None if existing rows changed, then everything that is derived from it has to be recomputed)
+    n_rows_previous = len(df_previous)
+    if df is df_previous:
+        return 0
+    if (len(df) >= n_rows_previous > 0) and df.iloc[:n_rows_previous].equals(df_previous):
+        return len(df) - n_rows_previous
+
+    return None
+
+
+def _determine_file_state(file_path, prefix_size=None):
+    # hash of the whole file and (optionally) of its first "prefix_size" bytes,
+    # to be able to tell if rows were only appended to the file
+    # (only the first "size" bytes are hashed, so that rows appended meanwhile are part of the next state)
+    stat = os.stat(file_path)
+    file_hash = hashlib.sha1()
+    prefix_hash = None
+    last_byte = b""
+    n_remaining_bytes = stat.st_size
+
+    with open(file_path, "rb") as csv_file:
+        if prefix_size is not None and prefix_size <= stat.st_size:
+            prefix = csv_file.read(prefix_size)
+            file_hash.update(prefix)
+            prefix_hash = file_hash.hexdigest()
+            last_byte = prefix[-1:]
+            n_remaining_bytes -= len(prefix)
+
+        while n_remaining_bytes > 0:
+            chunk = csv_file.read(min(n_remaining_bytes, 1024 * 1024))
+            if not chunk:
+                break
+            file_hash.update(chunk)
+            last_byte = chunk[-1:]
+            n_remaining_bytes -= len(chunk)
+
+    return {"mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "file_hash": file_hash.hexdigest(),
+            "prefix_hash": prefix_hash,
+            "ends_with_newline": last_byte == b"\n"}
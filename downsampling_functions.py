@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+# the widest a plot can get is the app's container (max-width: 1300px)
+# and more points than pixels can't be displayed anyway
+max_plot_width = 1300
+point_budget = max_plot_width
+
+
+# 1. Largest-Triangle-Three-Buckets (LTTB)
+# (selects the points that preserve the visual shape of a line, see: https://github.com/sveinn-steinarsson/flot-downsample)
+def largest_triangle_three_buckets(x, y, n_points):
+    n_values = len(x)
+    if (n_points >= n_values) or (n_points < 3):
+        return np.arange(n_values)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # first and last point are always kept, the points in between are split into buckets
+    # and from each bucket the point which forms the largest triangle with its neighbours is selected
+    bucket_size = (n_values - 2) / (n_points - 2)
+    bucket_bounds = np.floor(np.arange(n_points - 1) * bucket_size).astype(int) + 1
+    bucket_bounds[-1] = n_values - 1
+
+    selected_positions = np.empty(n_points, dtype=int)
+    selected_positions[0] = 0
+    selected_positions[-1] = n_values - 1
+
+    previous_position = 0
+    for i in range(n_points - 2):
+        start, end = bucket_bounds[i], bucket_bounds[i + 1]
+        if i + 2 < len(bucket_bounds):
+            next_start, next_end = end, bucket_bounds[i + 2]
+        else:
+            next_start, next_end = n_values - 1, n_values
+
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+        previous_x = x[previous_position]
+        previous_y = y[previous_position]
+
+        areas = np.abs((previous_x - next_x) * (y[start:end] - previous_y) -
+                       (previous_x - x[start:end]) * (next_y - previous_y))
+        previous_position = start + np.argmax(areas)
+        selected_positions[i + 1] = previous_position
+
+    return selected_positions
+
+
+# 2. downsampling of time series
+def downsample(df, column=None, x_range=None, n_points=None):
+    # "df" can be a DataFrame (then "column" determines which points are selected) or a Series
+    # "x_range" restricts the data to the visible range (e.g. after zooming into a plot)
+    if n_points is None:
+        n_points = point_budget
+
+    # 2.1 visible range (including one point beyond each edge, so that lines reach the edges of the plot)
+    if x_range is not None:
+        start_position = df.index.searchsorted(pd.to_datetime(x_range[0]), side="left")
+        end_position = df.index.searchsorted(pd.to_datetime(x_range[1]), side="right")
+        df = df.iloc[max(start_position - 1, 0):end_position + 1]
+
+    if len(df) <= n_points:
+        return df
+
+    # 2.2 select points
+    # (missing values are skipped, they can't be part of a triangle)
+    values = df[column] if column is not None else df
+    is_available = values.notnull().values
+    df = df[is_available]
+    values = values[is_available]
+
+    days = (values.index - values.index[0]) / pd.Timedelta(days=1)
+    selected_positions = largest_triangle_three_buckets(days, values.values, n_points)
+
+    return df.iloc[selected_positions]
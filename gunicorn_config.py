@@ -0,0 +1,27 @@
+# gunicorn settings (see Procfile)
+# with PRELOAD_APP=1 the app is imported once in the master process before the workers are forked,
+# so that all workers share the memory of the data, the pages and the prebuilt figures (copy-on-write)
+import gc
+import os
+import sys
+
+preload_app = os.environ.get("PRELOAD_APP") == "1"
+if preload_app:
+    # tells app.py to prebuild the figures and not to start its background threads
+    # (threads don't survive forking, they are started in "post_fork")
+    os.environ["APP_PRELOADED"] = "1"
+
+
+def when_ready(server):
+    # the app has been imported, so everything that exists now is shared by the workers
+    # (gc.freeze (Python 3.7+) moves it out of the garbage collector's reach, otherwise the garbage
+    # collector of each worker writes to the objects and thereby creates copies of their memory pages)
+    if preload_app:
+        gc.collect()
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        sys.modules["app"].start_background_tasks()
@@ -1,42 +1,230 @@
+import os
+import functools
 import numpy as np
 import pandas as pd
-import itertools
+
+from streak_functions import determine_streak_runs
 
 # 1. helper functions for "plotting_functions.py" 
-# (for deep_work_plot, time_spent_plot and weight_plot)
-def customize_marker_colors(x_values, marker_color):
-    marker_colors = []
-    for date_string in x_values:
-        date = pd.to_datetime(date_string)
-        day_of_week = date.dayofweek
-
-        # determine weekend or workday
-        if (day_of_week == 5) or (day_of_week == 6):
-            # indicating weekends with "hollow" markers
-            # (background color of plot is #F5F6F9)
-            marker_colors.append("#F5F6F9")
-        else:
-            marker_colors.append(marker_color)
-            
-    return marker_colors
+# (for all plots)
+# layouts and traces are styled like cufflinks' "pearl" theme 
+# (which is how the plots looked when they were created with cufflinks)
+font_color = "#4D5663"
+grid_color = "#E1E5ED"
+background_color = "#F5F6F9"
+trace_colors = ["rgba(255, 153, 51, 1.0)", "rgba(55, 128, 191, 1.0)", "rgba(50, 171, 96, 1.0)"]
+
+# traces with more points than that are rendered with WebGL (Scattergl)
+webgl_threshold = int(os.environ.get("WEBGL_THRESHOLD", 5000))
+
+
+# (layout and traces are returned as dicts, so that plotly validates them only once: in go.Figure)
+def create_layout(title=None, x_title="", y_title=""):
+    layout = {"legend": {"bgcolor": background_color, "font": {"color": font_color}},
+              "paper_bgcolor": background_color,
+              "plot_bgcolor": background_color,
+              "titlefont": {"color": font_color}}
+    if title is not None:
+        layout["title"] = title
+
+    for axis, axis_title in [("xaxis", x_title), ("yaxis", y_title)]:
+        layout[axis] = {"gridcolor": grid_color,
+                        "showgrid": True,
+                        "tickfont": {"color": font_color},
+                        "title": axis_title,
+                        "titlefont": {"color": font_color},
+                        "zerolinecolor": grid_color}
+
+    return layout
+
+
+def create_scatter_trace(pandas_series, mode="lines", color=trace_colors[0], dash="solid", width=1.3):
+    if len(pandas_series) > webgl_threshold:
+        trace_type = "scattergl"
+    else:
+        trace_type = "scatter"
+
+    trace = {"type": trace_type,
+             "x": convert_dates(pandas_series.index),
+             "y": pandas_series.values,
+             "name": pandas_series.name,
+             "mode": mode,
+             "text": "",
+             "line": {"color": color, "dash": dash, "shape": "linear", "width": width}}
+    if "markers" in mode:
+        trace["marker"] = {"symbol": "circle"}
+
+    return trace
+
+
+def convert_dates(dates):
+    # dates are shown as "YYYY-MM-DD" (np.datetime_as_string is vectorized, unlike strftime)
+    dates = pd.DatetimeIndex(dates)
+
+    return np.datetime_as_string(dates.values, unit="D")
+
+
+# (for gantt_chart)
+class TimeTrackingIndex:
+    # per-day blocks of the time tracking data, built once when the data is loaded
+    # (so that looking up the schedule of a day doesn't require a scan of the whole history)
+    # and the minutes per task of every day (see DailyTaskMinutes in aggregation_functions.py)
+
+    def __init__(self, df, tasks, daily_task_minutes):
+        self.tasks = sorted(tasks)
+        self.daily_task_minutes = daily_task_minutes
+
+        # "Task" is categorical (see data_functions.py), all tasks have to be categories
+        # (so that missing tasks can be added without converting the column back to strings)
+        categories = sorted(set(df.Task.cat.categories) | set(self.tasks))
+        self.task_dtype = pd.api.types.CategoricalDtype(categories)
+        df = df.assign(Task=df.Task.astype(self.task_dtype))
+
+        # 1. ideal schedule
+        df_ideal = df[df.ideal_schedule == True]
+        df_ideal = df_ideal.sort_values("Task", kind="mergesort")
+        self.ideal_schedule = df_ideal.reset_index(drop=True)
+        self.ideal_task_minutes = df_ideal.groupby("Task", observed=True).Duration.sum()
+
+        # 2. actual schedules
+        df = df[df.ideal_schedule == False]
+
+        # 2.1 add missing tasks for every day at once
+        # (so that y-axis of gantt chart always shows all tasks)
+        dates = df.Date.unique()
+        all_date_task_pairs = pd.MultiIndex.from_product([dates, self.tasks], names=["Date", "Task"])
+        done_date_task_pairs = pd.MultiIndex.from_arrays([df.Date, df.Task])
+        missing_date_task_pairs = all_date_task_pairs[~all_date_task_pairs.isin(done_date_task_pairs)]
+
+        df_missing = self._create_missing_tasks(missing_date_task_pairs.get_level_values("Date"),
+                                                missing_date_task_pairs.get_level_values("Task"))
+        df = pd.concat([df, df_missing], ignore_index=True)
+
+        # 2.2 group rows by day and make sure that tasks are always in the same order
+        # (sorting is stable, so the order of the time blocks within a task is preserved)
+        df = df.sort_values(["Date", "Task"])
+        df = df.reset_index(drop=True)
+
+        # 2.3 determine the rows of each day
+        date_values = df.Date.values
+        is_first_row_of_day = np.concatenate(([True], date_values[1:] != date_values[:-1]))
+        first_rows = np.flatnonzero(is_first_row_of_day)
+        last_rows = np.append(first_rows[1:], len(df))
+
+        self.df = df
+        self.day_blocks = dict(zip(pd.DatetimeIndex(date_values[first_rows]), zip(first_rows, last_rows)))
+
+    def get_task_minutes(self, date_string=None, n_days=1):
+        # minutes per task of "n_days" days (or of the ideal schedule, if no date is given)
+        if date_string is None:
+            return self.ideal_task_minutes
+
+        return self.daily_task_minutes.get_days(date_string, n_days)
+
+    def get_day(self, date_string):
+        return self.get_days(date_string, n_days=1)
+
+    def get_days(self, date_string, n_days=1):
+        # rows of "n_days" consecutive days (the blocks of the days are adjacent in "self.df")
+        first_date = pd.to_datetime(date_string).normalize()
+        dates = pd.date_range(first_date, periods=n_days, freq="D")
+        blocks = [self.day_blocks[date] for date in dates if date in self.day_blocks]
+        if blocks:
+            first_row, last_row = blocks[0][0], blocks[-1][1]
+            return self.df.iloc[first_row:last_row].reset_index(drop=True)
+
+        # no time tracking data for these days
+        dates = pd.DatetimeIndex([first_date] * len(self.tasks))
+        return self._create_missing_tasks(dates, self.tasks)
+
+    def _create_missing_tasks(self, dates, tasks):
+        start_times = dates + pd.Timedelta(hours=11, minutes=11, seconds=11)    # arbitrary time
+        end_times = start_times                                                 # duration of missing tasks is zero
+
+        df_missing = pd.DataFrame({"Task": pd.Categorical(list(tasks), dtype=self.task_dtype),
+                                   "Start": start_times,
+                                   "Finish": end_times,
+                                   "Duration": np.zeros(len(dates), dtype=np.int32),
+                                   "Date": dates,
+                                   "ideal_schedule": False},
+                                  columns=["Task", "Start", "Finish", "Duration", "Date", "ideal_schedule"])
+
+        return df_missing
+
+
+# (for git_hub_chart)
+month_abbreviations = np.array(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"])
+
+@functools.lru_cache(maxsize=64)
+def determine_calendar_grid(starting_date, end_date, min_n_weeks=52):
+    # grid of the calendar heatmap: one column per week (starting on a monday) and one row per day of the week
+    # (the returned arrays are shared between calls, so they are read-only)
+    grid_start = starting_date - pd.Timedelta(days=starting_date.dayofweek)
+    n_days = (end_date - grid_start).days + 1
+    n_weeks = max(min_n_weeks, -(-n_days // 7))
+
+    # 1. hover text: date of each cell
+    days = pd.date_range(grid_start, periods=n_weeks * 7, freq="D")
+    hover_text = np.datetime_as_string(days.values, unit="D").reshape(n_weeks, 7).T
+
+    # 2. x-axis ticks: name of the month at the week where the month starts
+    # (determined by the last day of each week)
+    last_days_of_weeks = days[6::7]
+    months = last_days_of_weeks.year * 12 + last_days_of_weeks.month
+    is_new_month = np.concatenate(([True], months[1:] != months[:-1]))
+    tickvals = np.flatnonzero(is_new_month)
+    ticktext = month_abbreviations[last_days_of_weeks.month[tickvals] - 1]
+
+    # show the year as well if the calendar spans more than one year
+    if n_weeks > min_n_weeks:
+        is_first_tick_of_year = (last_days_of_weeks.month[tickvals] == 1) | (tickvals == 0)
+        years = last_days_of_weeks.year[tickvals].astype(str)
+        ticktext = np.where(is_first_tick_of_year, np.char.add(np.char.add(ticktext, "<br>"), years), ticktext)
+
+    for array in [hover_text, tickvals, ticktext]:
+        array.flags.writeable = False
+
+    return grid_start, n_weeks, hover_text, tickvals, ticktext
 
 
 # 2. helper functions for "app.py"
-def determine_current_streak(pandas_series):  
-    values = pandas_series.values
-    streaks = []
-    for value, streak in itertools.groupby(values):
-        if value == 0:
-            continue
-        else:
-            n = 0
-            for day in streak:
-                n += 1
-            streaks.append(n)
-
-    if streaks:
-        current_streak = streaks[-1]
+def determine_current_streak(pandas_series):
+    # length of the most recent streak (see streak_functions.py for all habits at once)
+    df_runs = determine_streak_runs(pandas_series.to_frame())
+    if len(df_runs) > 0:
+        current_streak = int(df_runs.length.iloc[-1])
     else:
         current_streak = 0
-        
-    return current_streak
\ No newline at end of file
+
+    return current_streak
+
+
+def determine_x_range(relayout_data):
+    # visible range of the x-axis after zooming/panning a plot
+    # (None if the whole plot is shown, e.g. after a double click)
+    if not relayout_data:
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return [relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]]
+    if "xaxis.range" in relayout_data:
+        return list(relayout_data["xaxis.range"])
+
+    return None
+
+
+# 3. date ranges
+# (binary search on the sorted dates, so that the cost depends on the size of the range, not of the whole history)
+def determine_date_positions(date_index, start_date=None, end_date=None):
+    # positions of the first date >= "start_date" and after the last date <= "end_date" (both are inclusive)
+    first_position = date_index.searchsorted(pd.Timestamp(start_date), side="left") if start_date else 0
+    last_position = date_index.searchsorted(pd.Timestamp(end_date), side="right") if end_date else len(date_index)
+
+    return first_position, max(first_position, last_position)
+
+
+def slice_date_range(df, start_date=None, end_date=None):
+    if not start_date and not end_date:
+        return df
+    first_position, last_position = determine_date_positions(df.index, start_date, end_date)
+
+    return df.iloc[first_position:last_position]
@@ -0,0 +1,157 @@
+import os
+import glob
+import json
+import hashlib
+
+import flask
+
+
+# responses are compressed (gzip, or brotli if it is installed) by Flask-Compress, which Dash registers
+# on "app.server", and it appends the algorithm to ETags (e.g. "abc" -> "abc:gzip")
+compression_algorithms = ("gzip", "br", "deflate", "zstd")
+
+
+# 1. ETags
+class CallbackETags:
+    # strong ETags for the responses of the app, so that repeated requests get a "304 Not Modified"
+    # - callbacks: the ETag is derived from (callback, inputs, data version, code version),
+    #   i.e. it is known before the callback runs and a matching request doesn't run the callback at all
+    # - everything else that is requested with GET (e.g. layout, dependencies, JavaScript bundles):
+    #   the ETag is the hash of the response
+    # (browsers only revalidate GET requests, callbacks are POST requests,
+    # so their ETags are only used by clients and proxies that send "If-None-Match" themselves)
+
+    def __init__(self, determine_data_version, code_version=None):
+        self.determine_data_version = determine_data_version
+        self.code_version = code_version if code_version is not None else determine_code_version()
+
+    def init_app(self, server):
+        server.before_request(self._check_callback_etag)
+        server.after_request(self._add_etag)
+
+    def _check_callback_etag(self):
+        flask.g.callback_etag = None
+        if flask.request.method == "POST" and flask.request.path.endswith("_dash-update-component"):
+            etag = self.determine_callback_etag(flask.request.get_json())
+            flask.g.callback_etag = etag
+            matching_etag = _find_matching_etag(etag)
+            if matching_etag is not None:
+                return _create_not_modified_response(matching_etag)
+
+    def _add_etag(self, response):
+        if response.status_code != 200 or response.is_streamed or response.direct_passthrough:
+            return response
+
+        etag = flask.g.get("callback_etag")
+        if etag is not None:
+            # (responses that are already compressed get the suffix that Flask-Compress would append)
+            content_encoding = response.headers.get("Content-Encoding")
+            if content_encoding in compression_algorithms:
+                etag = "{}:{}".format(etag, content_encoding)
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"     # always revalidate
+            return response
+
+        if flask.request.method == "GET":
+            etag = hashlib.sha1(response.get_data()).hexdigest()
+            matching_etag = _find_matching_etag(etag)
+            if matching_etag is not None:
+                return _create_not_modified_response(matching_etag)
+            response.set_etag(etag)
+
+        return response
+
+    def determine_callback_etag(self, body):
+        request_data = {"output": body.get("output"), "inputs": body.get("inputs", []), "state": body.get("state", [])}
+        sha1 = hashlib.sha1()
+        sha1.update(json.dumps(request_data, sort_keys=True).encode())
+        sha1.update(repr(self.determine_data_version()).encode())
+        sha1.update(self.code_version.encode())
+
+        return sha1.hexdigest()
+
+
+def determine_code_version(directory=None):
+    # hash of the Python files of the app (so that ETags change when the app is updated)
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(__file__))
+
+    sha1 = hashlib.sha1()
+    for file_path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+        with open(file_path, "rb") as python_file:
+            sha1.update(python_file.read())
+
+    return sha1.hexdigest()
+
+
+def _find_matching_etag(etag):
+    # ETag of "If-None-Match" that matches "etag" (None if there is none)
+    # (ignoring the suffix that Flask-Compress appends to the ETags of compressed responses)
+    if_none_match = flask.request.if_none_match
+    if not if_none_match:
+        return None
+    if if_none_match.star_tag:
+        return etag
+
+    for tag in if_none_match.as_set(include_weak=True):
+        base_tag, _, suffix = tag.rpartition(":")
+        if tag == etag or (suffix in compression_algorithms and base_tag == etag):
+            return tag
+
+    return None
+
+
+def _create_not_modified_response(etag):
+    response = flask.Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+
+    return response
+
+
+# 2. pre-serialized callback responses
+class PreserializedResponses:
+    # answers the callback requests for "output" (e.g. "page-content.children") with responses that were
+    # serialized before (see PageCache.get_serialized_page), instead of letting Dash run the callback
+    # and convert the components to JSON on every request
+    # - "determine_response" gets the values of the inputs and the state of the request and returns
+    #   a SerializedPage (or None, then the request is handled by Dash as usual)
+    # - the compressed body is sent to clients that accept gzip (so it isn't compressed again by Flask-Compress)
+
+    def __init__(self, output, determine_response, callback_metrics=None, callback_name=None):
+        self.output = output
+        self.determine_response = determine_response
+        self.callback_metrics = callback_metrics
+        self.callback_name = callback_name or determine_response.__name__
+
+    def init_app(self, server):
+        # (has to be called after CallbackETags.init_app, so that unchanged responses are still answered with 304)
+        server.before_request(self._send_preserialized_response)
+
+    def _send_preserialized_response(self):
+        if flask.request.method != "POST" or not flask.request.path.endswith("_dash-update-component"):
+            return None
+        body = flask.request.get_json()
+        output = body.get("output", {})
+        if "{}.{}".format(output.get("id"), output.get("property")) != self.output:
+            return None
+
+        # (inputs take precedence over state with the same id and property)
+        values = {}
+        for item in body.get("inputs", []) + body.get("state", []):
+            values.setdefault("{}.{}".format(item.get("id"), item.get("property")), item.get("value"))
+        serialized_response = self.determine_response(values)
+        if serialized_response is None:
+            return None
+        if self.callback_metrics is not None:
+            self.callback_metrics.record_callback(self.callback_name)
+
+        if "gzip" in flask.request.accept_encodings:
+            response = flask.Response(serialized_response.gzip_body, mimetype="application/json")
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = flask.Response(serialized_response.body, mimetype="application/json")
+        response.vary.add("Accept-Encoding")
+
+        return response
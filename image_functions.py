@@ -0,0 +1,203 @@
+import os
+import re
+import time
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+import flask
+
+try:
+    from PIL import Image
+except ImportError:     # without Pillow, the original images are served
+    Image = None
+
+# photos are named after the day on which they were taken, e.g. "images/2019-09-24.JPG"
+photo_name_pattern = re.compile(r"^(\d{4}-\d{2}-\d{2})\.(jpe?g|png)$", re.IGNORECASE)
+image_mimetypes = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+# URLs contain the hash of the image, so a URL always refers to the same content
+immutable_max_age = 365 * 24 * 60 * 60
+immutable_cache_control = "public, max-age={}, immutable".format(immutable_max_age)
+
+
+# 1. index of the photos in a directory
+class PhotoIndex:
+    # dates and content hashes of the photos in "image_dir", built once when the directory is indexed
+    # (and the thumbnails that don't exist yet are created in "image_dir/.cache/")
+    # photos that didn't change since "previous_index" was built are not hashed again
+
+    def __init__(self, image_dir, photo_states, thumbnail_width=None, previous_index=None):
+        self.image_dir = image_dir
+        self.cache_dir = os.path.join(image_dir, ".cache")
+        self.photo_states = photo_states
+        self.directory_mtime_ns = None      # state of the directory when the photos were last checked
+        self.last_checked = 0.0
+
+        # 1.1 find photos
+        photos = sorted((pd.Timestamp(photo_name_pattern.match(file_name).group(1)), file_name)
+                        for file_name in photo_states)
+
+        # 1.2 content hashes and thumbnails
+        # digest -> (file path, mimetype) of the file that is served
+        self.files = {}
+        self.digests = []
+        self._prepared_photos = {}      # file name -> (digest, file path)
+        for _, file_name in photos:
+            if previous_index is not None and previous_index.photo_states.get(file_name) == photo_states[file_name]:
+                digest, file_path = previous_index._prepared_photos[file_name]
+            else:
+                digest, file_path = self._prepare_photo(file_name, thumbnail_width)
+            self._prepared_photos[file_name] = (digest, file_path)
+            self.files[digest] = (file_path, image_mimetypes[os.path.splitext(file_path)[1].lower()])
+            self.digests.append(digest)
+
+        self.dates = pd.DatetimeIndex([date for date, _ in photos]).values
+
+        # (changes whenever a photo is added, removed or replaced, e.g. for the ETags of the callbacks)
+        self.version = hashlib.sha1(repr(sorted(self._prepared_photos.items())).encode()).hexdigest()
+
+    def _prepare_photo(self, file_name, thumbnail_width):
+        file_path = os.path.join(self.image_dir, file_name)
+        with open(file_path, "rb") as image_file:
+            digest = hashlib.sha1(image_file.read()).hexdigest()[:16]
+
+        if Image is None or thumbnail_width is None:
+            return digest + os.path.splitext(file_name)[1].lower(), file_path
+
+        # (the thumbnail is named after the original and the width, so it is only created once)
+        thumbnail_digest = "{}-{}.jpg".format(digest, thumbnail_width)
+        thumbnail_path = os.path.join(self.cache_dir, thumbnail_digest)
+        if not os.path.exists(thumbnail_path):
+            try:
+                create_thumbnail(file_path, thumbnail_path, thumbnail_width)
+            except OSError as error:
+                print("Warning! Creating a thumbnail of {!r} failed: {!r}".format(file_path, error))
+                return digest + os.path.splitext(file_name)[1].lower(), file_path
+
+        return thumbnail_digest, thumbnail_path
+
+    # 1.3 look-up
+    def find_position(self, date):
+        # position of the photo of "date" or of the nearest earlier photo (-1: no photo up to that date)
+        date = pd.Timestamp(date).normalize().to_datetime64()
+
+        return int(np.searchsorted(self.dates, date, side="right")) - 1
+
+
+def determine_photo_states(image_dir):
+    # file name -> (modification time, size) of every photo in "image_dir"
+    # (so that a photo that is replaced by another one with the same name is indexed again)
+    photo_states = {}
+    for file_name in os.listdir(image_dir):
+        if photo_name_pattern.match(file_name):
+            stat = os.stat(os.path.join(image_dir, file_name))
+            photo_states[file_name] = (stat.st_mtime_ns, stat.st_size)
+
+    return photo_states
+
+
+def create_thumbnail(file_path, thumbnail_path, width):
+    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+    image = Image.open(file_path)
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+
+    # (written to a temporary file first, so that other workers never serve a partial thumbnail)
+    temporary_path = "{}.{}.tmp".format(thumbnail_path, os.getpid())
+    image.convert("RGB").save(temporary_path, "JPEG", quality=85, optimize=True, progressive=True)
+    os.replace(temporary_path, thumbnail_path)
+
+
+# 2. image service
+class ImageService:
+    # serves the photos of the weight page at "/images/<digest>" (instead of downloading the
+    # full-size photos from GitHub on every hover)
+    # - the URL contains the hash of the content, so the responses can be cached by browsers "forever"
+    # - if Pillow is installed, thumbnails that are "thumbnail_width" pixels wide are served
+    # - days without a photo show the nearest earlier photo
+    # (directories are indexed when they are requested for the first time and indexed again
+    # when photos are added or removed (the directory changes) or when a photo changed, which is checked
+    # at most every "check_interval" seconds, so that a hover doesn't stat every photo)
+
+    def __init__(self, thumbnail_width=480, check_interval=60):
+        self.thumbnail_width = thumbnail_width
+        self.check_interval = check_interval
+        self.url_prefix = "/images"
+
+        self._indexes = {}      # image directory -> PhotoIndex
+        self._files = {}        # digest -> (file path, mimetype), of all directories
+        self._lock = threading.Lock()
+
+    def init_app(self, server, url_prefix="/images"):
+        self.url_prefix = url_prefix
+        server.add_url_rule(url_prefix + "/<digest>", "image", self.send_image)
+
+    def get_index(self, image_dir):
+        image_dir = os.path.abspath(image_dir)
+        now = time.time()
+        directory_mtime_ns = os.stat(image_dir).st_mtime_ns
+        with self._lock:
+            index = self._indexes.get(image_dir)
+        is_up_to_date = (index is not None and index.directory_mtime_ns == directory_mtime_ns
+                         and now - index.last_checked < self.check_interval)
+        if is_up_to_date:
+            return index
+
+        photo_states = determine_photo_states(image_dir)
+        if index is not None and index.photo_states == photo_states:
+            index.directory_mtime_ns = directory_mtime_ns
+            index.last_checked = now
+            return index
+
+        # (the photos are hashed without holding the lock, so that requests for other directories
+        # and for the images aren't blocked while a directory is indexed)
+        new_index = PhotoIndex(image_dir, photo_states, self.thumbnail_width, previous_index=index)
+        new_index.directory_mtime_ns = directory_mtime_ns
+        new_index.last_checked = now
+        with self._lock:
+            # (unless another request already replaced the index in the meantime)
+            if self._indexes.get(image_dir) is index:
+                self._indexes[image_dir] = new_index
+            self._files.update(new_index.files)
+
+        return new_index
+
+    def determine_index_version(self, image_dir):
+        if not os.path.isdir(image_dir):
+            return None
+
+        return self.get_index(image_dir).version
+
+    # 2.1 URLs
+    def determine_photo_urls(self, image_dir, date, n_neighbours=2):
+        # URL of the photo of "date" (or of the nearest earlier photo) and URLs of the photos of
+        # "n_neighbours" days before and after it (to prefetch them, so that they show up immediately on hover)
+        if not os.path.isdir(image_dir):
+            return None, []
+        index = self.get_index(image_dir)
+        position = index.find_position(date)
+        if position < 0:
+            return None, []
+
+        first_position = max(position - n_neighbours, 0)
+        last_position = min(position + n_neighbours + 1, len(index.digests))
+        neighbour_urls = [self._create_url(index.digests[i]) for i in range(first_position, last_position)
+                          if i != position]
+
+        return self._create_url(index.digests[position]), neighbour_urls
+
+    def _create_url(self, digest):
+        return flask.request.script_root + self.url_prefix + "/" + digest
+
+    # 2.2 responses
+    def send_image(self, digest):
+        if digest not in self._files:
+            flask.abort(404)
+        file_path, mimetype = self._files[digest]
+
+        response = flask.send_file(file_path, mimetype=mimetype, conditional=True)
+        response.headers["Cache-Control"] = immutable_cache_control
+
+        return response
@@ -0,0 +1,198 @@
+import time
+import bisect
+import threading
+import functools
+from collections import deque
+
+import numpy as np
+import flask
+
+
+# upper bounds of the histogram buckets (in seconds)
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+quantiles = (0.5, 0.95, 0.99)
+n_recent_observations = 1024     # the quantiles are determined from the most recent observations
+
+
+# 1. latency of one callback phase
+class LatencyHistogram:
+
+    def __init__(self, buckets=latency_buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)     # last bucket: +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=n_recent_observations)
+
+    def observe(self, seconds):
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+    def determine_quantiles(self):
+        if not self.recent:
+            return [float("nan")] * len(quantiles)
+
+        return list(np.percentile(self.recent, [q * 100 for q in quantiles]))
+
+
+# 2. metrics of all callbacks
+class CallbackMetrics:
+    # latency of every Dash callback, split into phases:
+    # "data_access" (the callback itself, without building figures), "figure_build" (plotting functions)
+    # and "serialization" (Dash converting the result to JSON), plus "total" (the whole request)
+    # (every worker process has its own metrics)
+
+    def __init__(self):
+        self._histograms = {}           # (callback, output, phase) -> LatencyHistogram
+        self._response_bytes = {}       # (callback, output) -> number of bytes sent
+        self._n_responses = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def init_app(self, server, path="/metrics"):
+        server.before_request(self._start_request)
+        server.after_request(self._finish_request)
+        server.add_url_rule(path, "metrics", self.create_response)
+
+    # 2.1 decorators
+    def callback(self, function):
+        # for the functions that are registered with "app.callback"
+        # (has to be the inner decorator, i.e. it has to be placed below "@app.callback")
+        @functools.wraps(function)
+        def timed_callback(*args, **kwargs):
+            current = getattr(self._local, "current", None)
+            if current is None:
+                return function(*args, **kwargs)
+
+            current["callback"] = function.__name__
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                current["callback_end"] = time.perf_counter()
+                current["callback_seconds"] = current["callback_end"] - start
+
+        return timed_callback
+
+    def figure_build(self, function):
+        # for the plotting functions
+        @functools.wraps(function)
+        def timed_figure_build(*args, **kwargs):
+            current = getattr(self._local, "current", None)
+            if current is None:
+                return function(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                current["figure_build_seconds"] += time.perf_counter() - start
+
+        return timed_figure_build
+
+    def record_callback(self, callback_name):
+        # for callback requests that are answered before Dash runs the callback (see PreserializedResponses)
+        current = getattr(self._local, "current", None)
+        if current is not None:
+            current["callback"] = callback_name
+            current["callback_end"] = time.perf_counter()
+            current["callback_seconds"] = current["callback_end"] - current["start"]
+
+    # 2.2 requests
+    def _start_request(self):
+        self._local.current = None
+        if flask.request.path.endswith("_dash-update-component"):
+            output = flask.request.get_json()["output"]
+            self._local.current = {"start": time.perf_counter(),
+                                   "output": "{}.{}".format(output["id"], output["property"]),
+                                   "figure_build_seconds": 0.0}
+
+    def _finish_request(self, response):
+        current = getattr(self._local, "current", None)
+        self._local.current = None
+        if current is None or "callback" not in current:
+            return response
+
+        end = time.perf_counter()
+        phase_seconds = {"data_access": current["callback_seconds"] - current["figure_build_seconds"],
+                         "figure_build": current["figure_build_seconds"],
+                         "serialization": end - current["callback_end"],
+                         "total": end - current["start"]}
+        n_bytes = len(response.get_data()) if not response.is_streamed else 0
+
+        key = (current["callback"], current["output"])
+        with self._lock:
+            for phase, seconds in phase_seconds.items():
+                histogram_key = key + (phase,)
+                if histogram_key not in self._histograms:
+                    self._histograms[histogram_key] = LatencyHistogram()
+                self._histograms[histogram_key].observe(seconds)
+
+            self._response_bytes[key] = self._response_bytes.get(key, 0) + n_bytes
+            self._n_responses[key] = self._n_responses.get(key, 0) + 1
+
+        return response
+
+    # 2.3 Prometheus text format
+    # (see: https://prometheus.io/docs/instrumenting/exposition_formats/)
+    def create_response(self):
+        return flask.Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    def render(self):
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            response_bytes = sorted(self._response_bytes.items())
+            n_responses = dict(self._n_responses)
+
+            lines = ["# HELP dash_callback_duration_seconds Latency of Dash callbacks per phase.",
+                     "# TYPE dash_callback_duration_seconds histogram"]
+            for (callback, output, phase), histogram in histograms:
+                labels = _format_labels(callback=callback, output=output, phase=phase)
+                cumulative_count = 0
+                for upper_bound, bucket_count in zip(histogram.buckets + ("+Inf",), histogram.bucket_counts):
+                    cumulative_count += bucket_count
+                    lines.append("dash_callback_duration_seconds_bucket{{{},le=\"{}\"}} {}".format(
+                        labels, upper_bound, cumulative_count))
+                lines.append("dash_callback_duration_seconds_sum{{{}}} {}".format(labels, _format_value(histogram.sum)))
+                lines.append("dash_callback_duration_seconds_count{{{}}} {}".format(labels, histogram.count))
+
+            lines += ["# HELP dash_callback_duration_quantile_seconds Latency quantiles of the most recent {} calls."
+                      .format(n_recent_observations),
+                      "# TYPE dash_callback_duration_quantile_seconds summary"]
+            for (callback, output, phase), histogram in histograms:
+                labels = _format_labels(callback=callback, output=output, phase=phase)
+                for q, value in zip(quantiles, histogram.determine_quantiles()):
+                    lines.append("dash_callback_duration_quantile_seconds{{{},quantile=\"{}\"}} {}".format(
+                        labels, q, _format_value(value)))
+                lines.append("dash_callback_duration_quantile_seconds_sum{{{}}} {}".format(
+                    labels, _format_value(histogram.sum)))
+                lines.append("dash_callback_duration_quantile_seconds_count{{{}}} {}".format(labels, histogram.count))
+
+            lines += ["# HELP dash_callback_response_bytes_total Size of the callback responses.",
+                      "# TYPE dash_callback_response_bytes_total counter"]
+            for (callback, output), n_bytes in response_bytes:
+                lines.append("dash_callback_response_bytes_total{{{}}} {}".format(
+                    _format_labels(callback=callback, output=output), n_bytes))
+
+            lines += ["# HELP dash_callback_responses_total Number of callback responses.",
+                      "# TYPE dash_callback_responses_total counter"]
+            for (callback, output), _ in response_bytes:
+                lines.append("dash_callback_responses_total{{{}}} {}".format(
+                    _format_labels(callback=callback, output=output), n_responses[(callback, output)]))
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(**labels):
+    return ",".join("{}=\"{}\"".format(name, str(value).replace("\\", "\\\\").replace("\"", "\\\""))
+                    for name, value in sorted(labels.items()))
+
+
+def _format_value(value):
+    value = float(value)
+    if np.isnan(value):
+        return "NaN"
+
+    return repr(value)
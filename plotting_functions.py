@@ -2,31 +2,42 @@ import numpy as np
 import pandas as pd
 
 import plotly.graph_objs as go
-import plotly.figure_factory as ff
-import cufflinks as cf
 
 from scipy.optimize import curve_fit
 
-from helper_functions import customize_marker_colors
-
-cf.go_offline(connected=True)
-
+from helper_functions import create_layout, create_scatter_trace, determine_calendar_grid, slice_date_range, trace_colors
+from downsampling_functions import downsample
+from aggregation_functions import determine_monthly_views, ideal_total_minutes
+from annotation_functions import (
+    create_duration_hovertext,
+    create_marker_colors,
+    create_percentage_hovertext,
+    create_seconds_hovertext,
+    create_value_hovertext,
+)
+
+tasks_color_key = {"Deep Work": "rgb(27,158,119)", 
+                   "Shallow Work": "rgb(127,201,127)",
+                   "Learning": "rgb(117,112,179)",
+                   "Gym": "rgb(36,78,213)"}
 
 
 
-def deep_work_plot(df, rolling_average):
+def deep_work_plot(deep_work_averages, rolling_average, x_range=None, start_date=None, end_date=None):
     
-    # 1. calculate moving average
-    df = df.rolling(window=rolling_average).mean()
-    df = df.dropna()
+    # 1. get moving average
+    # (see RollingAverages in aggregation_functions.py, only for the selected dates)
+    df = deep_work_averages.determine_rolling_average(rolling_average, start_date, end_date)
+    df = df.dropna().to_frame()
+
+    # only as many points as can be displayed (see downsampling_functions.py)
+    df = downsample(df, column=df.columns[0], x_range=x_range)
 
 
     # 2. create figure
-    fig = df.iplot(mode="markers+lines",
-                   title="Time spent on Deep Work", 
-                   xTitle="Date", 
-                   yTitle="Hours",
-                   asFigure=True)
+    trace = create_scatter_trace(df.iloc[:, 0], mode="markers+lines")
+    layout = create_layout(title="Time spent on Deep Work", x_title="Date", y_title="Hours")
+    fig = go.Figure(data=[trace], layout=layout)
 
 
     # 3. customize figure
@@ -34,6 +45,8 @@ def deep_work_plot(df, rolling_average):
     layout = fig.layout
     layout.height = 400
     layout.margin = {"l": 70, "r": 50, "t": 80, "b": 50}
+    if x_range is not None:
+        layout.xaxis.range = x_range
 
     # 3.2 y-axis
     y_axis = fig.layout.yaxis
@@ -44,141 +57,121 @@ def deep_work_plot(df, rolling_average):
     scatter = fig.data[0]
     scatter.marker.size = 5
     scatter.marker.line.width = 1
-    scatter.marker.color = customize_marker_colors(scatter.x, "orange")
+    scatter.marker.color = create_marker_colors(df.index, "orange")
 
     # 3.4 hoverinfo
-    hovertext_lst = []
-    for date_string, total_minutes in zip(scatter.x, scatter.y):
-        # determine time spent
-        hours = total_minutes // 60
-        minutes = total_minutes - hours * 60
-
-        # determine workday or weekend
-        date = pd.to_datetime(date_string)
-        day_of_week = date.dayofweek
-        if (day_of_week == 5) or (day_of_week == 6):
-            day = "Weekend"
-        else:
-            day = "Workday"
-
-        hovertext = "{}<br>{:.0f}h {:02.0f}min".format(day, hours, minutes)
-        hovertext_lst.append(hovertext)
-
     scatter.hoverinfo = "text+x"
-    scatter.hovertext = hovertext_lst
+    scatter.hovertext = create_duration_hovertext(df.index, scatter.y)
     
     return fig
 
 
 
 
-def gantt_chart(df, date_string="", show_ideal_schedule=False):
-    
-    tasks_color_key = {"Deep Work": "rgb(27,158,119)", 
-                   "Shallow Work": "rgb(127,201,127)",
-                   "Learning": "rgb(117,112,179)",
-                   "Gym": "rgb(36,78,213)"}
+def gantt_chart(time_tracking_index, date_string="", show_ideal_schedule=False, n_days=1):
 
     # 1.  prepare data
-    # 1.1 filter df 
+    # (rows are already sorted by day and task and missing tasks are already added, see TimeTrackingIndex)
     if show_ideal_schedule:
-        df = df[df.ideal_schedule == True]
+        df = time_tracking_index.ideal_schedule
+        first_day = df.Date[0]
+        n_days = 1
         figure_title = "Daily Schedule: ideal Work-Day"
     else:
-        df = df[df.Date == date_string]
+        df = time_tracking_index.get_days(date_string, n_days)
+        first_day = pd.Timestamp(date_string).normalize()
         figure_title = "Daily Schedule: " + date_string
-
-        # add missing tasks in case there are any
-        # (so that y-axis of gantt chart always shows all 4 tasks)
-        start_time = pd.to_datetime(date_string + " 11:11:11")      # arbitrary time
-        end_time = start_time                                       # duration of missing tasks is zero
-        date = pd.to_datetime(date_string)
-
-        tasks_available = set(tasks_color_key.keys())
-        tasks_done = set(df.Task.unique())
-        tasks_missing = tasks_available - tasks_done
-        for task in tasks_missing:
-            df_row = pd.DataFrame({"Task": [task], 
-                                   "Start": [start_time], 
-                                   "Finish": [end_time], 
-                                   "Duration": [end_time - start_time], 
-                                   "Date": [date],
-                                   "ideal_schedule": [False]})
-            df = df.append(df_row)
-
-    # 1.2 making sure that tasks are always shown in the same order
-    df = df.sort_values("Task")
-    df = df.reset_index(drop=True)
-
-
-    # 2. create figure
-    fig = ff.create_gantt(df,
-                          title=figure_title,
-                          index_col="Task",
-                          colors=tasks_color_key,
-                          height=300,
-                          width=None,
-                          showgrid_x=True,
-                          group_tasks=True,
-                          bar_width=0.5)
-
-    fig = go.Figure(fig)
+    last_day = first_day + pd.Timedelta(days=n_days - 1)
+    if n_days > 1:
+        figure_title = "Schedule: {} - {}".format(first_day.strftime("%Y-%m-%d"), last_day.strftime("%Y-%m-%d"))
+
+    # tasks are shown from top to bottom in alphabetical order
+    tasks = sorted(set(df.Task.unique()) | set(time_tracking_index.tasks))
+    n_tasks = len(tasks)
+    y_positions = pd.Series(np.arange(n_tasks - 1, -1, -1), index=tasks)
+
+
+    # 2. create traces
+    # (one horizontal bar trace per task that contains all of its time blocks,
+    # so the size of the figure doesn't depend on the number of time blocks or days)
+    df = df[df.Finish > df.Start]       # missing tasks (duration of zero) have no bars
+    bar_starts = df.Start.dt.strftime("%Y-%m-%d %H:%M").values
+    start_times = df.Start.dt.strftime("%H:%M").values
+    end_times = df.Finish.dt.strftime("%H:%M").values
+    durations = ((df.Finish - df.Start) // pd.Timedelta(minutes=1)).values
+    if n_days > 1:
+        start_times = df.Start.dt.strftime("%a ").values + start_times
+
+    # 2.1 hoverinfo
+    hover_text = ("Start - " + pd.Series(start_times) +
+                  "<br>Finish - " + pd.Series(end_times) +
+                  "<br>Duration - " + pd.Series(durations // 60).astype(str).str.zfill(2) +
+                  ":" + pd.Series(durations % 60).astype(str).str.zfill(2)).values
+
+    # 2.2 bars
+    # (on a date axis, "base" is the start of a bar and "x" its length in milliseconds)
+    data = []
+    task_codes = df.Task.astype(str).values
+    for task in tasks:
+        is_task = task_codes == task
+        if not is_task.any():
+            continue
+
+        bar = go.Bar(orientation="h",
+                     base=bar_starts[is_task],
+                     x=durations[is_task] * 60 * 1000,
+                     y=np.full(is_task.sum(), y_positions[task]),
+                     width=1,
+                     name=task,
+                     marker={"color": tasks_color_key.get(task, trace_colors[0])},
+                     hoverinfo="text",
+                     hovertext=hover_text[is_task],
+                     showlegend=False)
+        data.append(bar)
 
 
     # 3. customize figure
     # 3.1 layout
-    layout = fig.layout
-    layout.paper_bgcolor = "#F5F6F9"
-    layout.plot_bgcolor = "#F5F6F9"
-    layout.margin = {"t": 75, "b": 20}
-
-    # 3.2 hoverinfo
-    hover_text = "Start - {}<br>Finish - {}<br>Duration - {:02}:{:02}"
-    for bar in fig.data:
-        start_time, end_time = bar.x
-        duration = end_time - start_time
-        mid_point = start_time + (duration / 2)
-
-        bar.hoverinfo = "text"
-        bar.text = hover_text.format(start_time.strftime("%H:%M"),
-                                     end_time.strftime("%H:%M"),
-                                     duration.components.hours,
-                                     duration.components.minutes)
-        
-        # hoverinfo should only be shown when the cursor is in the middle of the bar 
-        # (and not when it is at the beginning or end of the bar)
-        bar.x = [mid_point]
-
-        # make markers "invisible" (background color of plot is #F5F6F9)
-        # and skip hoverinfo for missing tasks that were added above at 1.1
-        if start_time == end_time:
-            bar.marker.color = "#F5F6F9"
-            bar.hoverinfo = "skip"
-
-    # 3.3 axes
-    n_tasks = len(df.Task.unique())
-    date_today = df.Date[0]
-    x_min = date_today + pd.Timedelta(hours=7)
-    x_max = date_today + pd.Timedelta(hours=26)
-
-    layout.xaxis.range = [x_min, x_max]
-    layout.xaxis.rangeselector = None
-    layout.yaxis.range = [-1.5, n_tasks]
+    # (plain dict, so that it is only validated once by go.Figure)
+    layout = {"title": figure_title,
+              "height": 300,
+              "hovermode": "closest",
+              "barmode": "overlay",      # (every task has its own row)
+              "showlegend": False,
+              "paper_bgcolor": "#F5F6F9",
+              "plot_bgcolor": "#F5F6F9",
+              "margin": {"t": 75, "b": 20}}
+
+    # 3.2 axes
+    x_min = first_day + pd.Timedelta(hours=7)
+    x_max = last_day + pd.Timedelta(hours=26)
+
+    layout["xaxis"] = {"type": "date", "showgrid": True, "zeroline": False, "range": [x_min, x_max]}
+    layout["yaxis"] = {"autorange": False,
+                       "range": [-1.5, n_tasks],
+                       "showgrid": False,
+                       "zeroline": False,
+                       "tickvals": y_positions.values[::-1],
+                       "ticktext": y_positions.index[::-1]}
 
     # 4.  annotations
     # 4.1 determine x- and y-positions
-    x_position = date_today + pd.Timedelta(hours=25)
+    x_position = last_day + pd.Timedelta(hours=25)
     y_positions = range(n_tasks, -2, -1)
 
     # 4.2 create text for annotations
+    # (minutes per task are looked up in the table of the daily totals, see TimeTrackingIndex,
+    # in the order in which the tasks are shown)
     annotation_texts = ["Total time:"]
-    total_time_per_task = df.groupby("Task").Duration.sum()
-    for time in total_time_per_task:
-        text = "{:02}:{:02}".format(time.components.hours, time.components.minutes)
+    date_string = None if show_ideal_schedule else date_string
+    total_time_per_task = time_tracking_index.get_task_minutes(date_string, n_days)
+    total_time_per_task = total_time_per_task.reindex(tasks, fill_value=0)
+    for minutes in total_time_per_task:
+        text = "{:02}:{:02}".format(*divmod(int(minutes), 60))
         annotation_texts.append(text)
 
     total_time = total_time_per_task.sum()
-    text = "{:02}:{:02}".format(total_time.components.hours, total_time.components.minutes)
+    text = "{:02}:{:02}".format(*divmod(int(total_time), 60))
     annotation_texts.append(text)
 
     # 4.3 create annotations
@@ -191,64 +184,55 @@ def gantt_chart(df, date_string="", show_ideal_schedule=False):
                            "font":{"size": 13}}
         annotations.append(annotation_dict)
 
-    layout.annotations = annotations
+    layout["annotations"] = annotations
 
     # 4.4 draw a line above the last annotation 
     # to indicate that it is the sum of the above times
-    shapes = list(layout.shapes)
-    shapes.append({'type': 'line',
-                   'x0': date_today + pd.Timedelta(hours=24),
-                   'x1': date_today + pd.Timedelta(hours=26),
-                   'y0': -0.5,
-                   'y1': -0.5})
+    layout["shapes"] = [{'type': 'line',
+                         'x0': last_day + pd.Timedelta(hours=24),
+                         'x1': last_day + pd.Timedelta(hours=26),
+                         'y0': -0.5,
+                         'y1': -0.5}]
 
-    layout.shapes = shapes
+    fig = go.Figure(data=data, layout=layout)
 
     return fig
 
 
 
 
-def git_hub_chart(df, starting_date, figure_title):
+def git_hub_chart(df, starting_date, figure_title, start_date=None, end_date=None):
     
     # 1. get df into right shape to create heatmap
-    # 1.1 set variables
-    n_weeks_in_year = 52
-    n_days_in_week = 7
-    n_days_in_year = n_weeks_in_year * n_days_in_week   # 364
-    
+    # 1.1 determine grid of heatmap
+    # (at least one year, but the calendar grows if there is data for more than that)
+    # (days outside of the date range from "start_date" to "end_date" are empty)
     df = df.loc[starting_date:]
-    data = df.values.flatten()
-    
-    # 1.2 make sure that the data starts at a monday
-    # (prepend respective amount of zeros to data)
+    df = slice_date_range(df, start_date, end_date)
     starting_date = pd.to_datetime(starting_date)
-    day_of_week = starting_date.dayofweek
-    zeros = np.zeros(day_of_week)
-    
-    data = np.concatenate((zeros, data))
-    starting_date = starting_date - pd.to_timedelta(day_of_week, unit="D")
-    
-    # 1.3 ensure that data contains exactly 364 elements
-    # (append respective amount of zeros to data)
-    n_days_left = n_days_in_year - len(data)
-    if n_days_left < 0:
-        print("Warning! len(data) is too big. Please delete entries from the beginning of the CSV!")
-        return
-    else:
-        zeros = np.zeros(n_days_left)
-        data = np.concatenate((data, zeros))
+    last_date = max(df.index[-1], starting_date) if len(df) > 0 else starting_date
+    grid_start, n_weeks, hover_text, tickvals, ticktext = determine_calendar_grid(starting_date, last_date)
+
+    # 1.2 put every value into the cell of its date
+    # (cells without data are 0)
+    n_days_since_grid_start = (df.index - grid_start).days.values
+    data = np.zeros((7, n_weeks))
+    data[n_days_since_grid_start % 7, n_days_since_grid_start // 7] = df.values[:, 0]
     
-    # 1.4 create new df
-    data = data.reshape(n_weeks_in_year, n_days_in_week)  # shape of heatmap
-    column_headears = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    df_heatmap = pd.DataFrame(data, columns=column_headears)
+    # 1.3 create new df
+    row_headers = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    df_heatmap = pd.DataFrame(data, index=row_headers)
 
 
     # 2. create figure
-    fig = df_heatmap.iplot(kind="heatmap",
-                           title=figure_title,
-                           asFigure=True)
+    heatmap = {"type": "heatmap",
+               "x": df_heatmap.columns,
+               "y": df_heatmap.index,
+               "z": df_heatmap.values,
+               "zmin": data.min(),
+               "zmax": data.max()}
+    layout = create_layout(title=figure_title)
+    fig = go.Figure(data=[heatmap], layout=layout)
 
 
     # 3. customize figure
@@ -266,26 +250,8 @@ def git_hub_chart(df, starting_date, figure_title):
 
     # change tick values and their text
     # (display the name of the month at the week where the month starts)
-    last_day_of_week_lst = pd.date_range(starting_date, periods=n_weeks_in_year, freq="w")
-    current_month = last_day_of_week_lst[0].month_name()[:3]
-
-    tickvals = []
-    month_names = []
-    index = 0
-    for day in last_day_of_week_lst:
-        month = day.month_name()[:3]
-        if index == 0:
-            tickvals.append(index)
-            month_names.append(month)
-        elif month != current_month:
-            tickvals.append(index)
-            month_names.append(month)
-            current_month = month
-
-        index += 1
-
     x_axis.tickvals = tickvals
-    x_axis.ticktext = month_names
+    x_axis.ticktext = ticktext
 
     # 3.2.2 y-axis
     y_axis = layout.yaxis
@@ -302,11 +268,6 @@ def git_hub_chart(df, starting_date, figure_title):
     heatmap.ygap = 2
 
     # 3.4 hoverinfo
-    days = pd.date_range(start=starting_date, periods=n_days_in_year)
-    hover_text = [day.strftime("%Y-%m-%d") for day in days]
-    hover_text = np.reshape(hover_text, (-1, 7))
-    hover_text = hover_text.T
-
     heatmap.hoverinfo = "text+y"
     heatmap.text = hover_text
 
@@ -315,28 +276,23 @@ def git_hub_chart(df, starting_date, figure_title):
 
 
 
-def time_spent_plot(df):
+def time_spent_plot(time_spent_percentages, x_range=None, start_date=None, end_date=None):
     
     # 1.  prepare data
-    # 1.1 filter df
-    df = df[df.ideal_schedule == False]
-    
-    # 1.2 determine total time spent for each day as percentage of ideal
-    ideal_total_duration = pd.Timedelta(hours=12)
-    df = df.groupby("Date").Duration.sum()
-    df = df / ideal_total_duration
+    # 1.1 total time spent for each day as percentage of ideal (only for the selected dates)
+    # (computed when the data is loaded, see "determine_time_spent_percentages" in aggregation_functions.py)
+    df = slice_date_range(time_spent_percentages, start_date, end_date)
 
-    # 1.2 filling in "0" for days where I didn't do deep work
-    df = df.resample("D").sum()
-    df = df.fillna(0)
+    # 1.2 only as many points as can be displayed (see downsampling_functions.py)
+    df = downsample(df, x_range=x_range)
 
 
     # 2. create figure
-    fig = df.iplot(mode="lines+markers",
-                   title="Time spent on Something productive",
-                   xTitle="Date",
-                   yTitle="Percentage of Ideal (12h)",
-                   asFigure=True)
+    trace = create_scatter_trace(df, mode="lines+markers")
+    layout = create_layout(title="Time spent on Something productive", 
+                           x_title="Date", 
+                           y_title="Percentage of Ideal (12h)")
+    fig = go.Figure(data=[trace], layout=layout)
 
 
     # 3. customize figure
@@ -344,6 +300,8 @@ def time_spent_plot(df):
     layout = fig.layout
     layout.height = 400
     layout.margin = {"l": 70, "r": 40, "t": 80, "b": 50}
+    if x_range is not None:
+        layout.xaxis.range = x_range
 
     # 3.2 y-axis
     y_axis = fig.layout.yaxis
@@ -355,50 +313,38 @@ def time_spent_plot(df):
     scatter = fig.data[0]
     scatter.marker.size = 5
     scatter.marker.line.width = 1
-    scatter.marker.color = customize_marker_colors(scatter.x, "orange")
+    scatter.marker.color = create_marker_colors(df.index, "orange")
 
     # 3.4 hoverinfo
-    hovertext_lst = []
-    for date_string, float_value in zip(scatter.x, scatter.y):
-        # determine percentage value
-        percentage = round(float_value * 100)
-        percentage = "{:.0f}%".format(percentage)
-
-        # determine time spent
-        total_time_spent = float_value * ideal_total_duration.components.hours
-        hours_spent = int(total_time_spent)
-        minutes_spent = (total_time_spent - hours_spent) * 60
-        time_spent = "{}h {:02.0f}min".format(hours_spent, minutes_spent)
-
-        # determine workday or weekend
-        date = pd.to_datetime(date_string)
-        day_of_week = date.dayofweek
-        if (day_of_week == 5) or (day_of_week == 6):
-            day = "Weekend"
-        else:
-            day = "Workday"
-
-        hovertext = "{}<br>{}: {}".format(day, percentage, time_spent)
-        hovertext_lst.append(hovertext)
-
     scatter.hoverinfo = "text+x"
-    scatter.hovertext = hovertext_lst
+    scatter.hovertext = create_percentage_hovertext(df.index, scatter.y, 
+                                                    ideal_hours=ideal_total_minutes // 60)
     
     return fig
 
 
 
 
-def weight_plot(df, new_approach=False):
-    
+def weight_plot(df, new_approach=False, x_range=None, start_date=None, end_date=None):
+
     # 1. create figure
-    fig = df.iplot(mode=["lines", "lines", "lines", "lines+markers"],
-                   xTitle="Date",
-                   yTitle="Weight in kg",
-                   colors=["rgb(177,0,38)", "rgb(44,162,95)", "rgb(177,0,38)", "rgb(0,0,0)"],
-                   dash=["dash", "solid", "dash", "solid"],
-                   width=2,
-                   asFigure=True)
+    df = slice_date_range(df, start_date, end_date)
+
+    # (only as many points as can be displayed, they are selected based on the "actual" line,
+    # see downsampling_functions.py)
+    df = downsample(df, column="actual", x_range=x_range)
+
+    modes = ["lines", "lines", "lines", "lines+markers"]
+    colors = ["rgba(177, 0, 38, 1.0)", "rgba(44, 162, 95, 1.0)", "rgba(177, 0, 38, 1.0)", "rgba(0, 0, 0, 1.0)"]
+    dashes = ["dash", "solid", "dash", "solid"]
+
+    traces = []
+    for column, mode, color, dash in zip(df.columns, modes, colors, dashes):
+        trace = create_scatter_trace(df[column], mode=mode, color=color, dash=dash, width=2)
+        traces.append(trace)
+
+    layout = create_layout(x_title="Date", y_title="Weight in kg")
+    fig = go.Figure(data=traces, layout=layout)
 
 
     # 2. customize figure
@@ -406,6 +352,8 @@ def weight_plot(df, new_approach=False):
     layout = fig.layout
     layout.height = 350
     layout.margin = {"l": 70, "r": 0,  "t": 20, "b": 40}
+    if x_range is not None:
+        layout.xaxis.range = x_range
     layout.hovermode = "closest"
     layout.hoverdistance = 3
 
@@ -433,24 +381,11 @@ def weight_plot(df, new_approach=False):
     scatter = fig.data[3]
     scatter.marker.size = 5
     scatter.marker.line.width = 1
-    scatter.marker.color = customize_marker_colors(scatter.x, "black")
+    scatter.marker.color = create_marker_colors(df.index, "black")
 
     # 2.4.2 hoverinfo
-    hovertext_lst = []
-    for date_string, weight in zip(scatter.x, scatter.y):
-        # determine workday or weekend
-        date = pd.to_datetime(date_string)
-        day_of_week = date.dayofweek
-        if (day_of_week == 5) or (day_of_week == 6):
-            day = "Weekend"
-        else:
-            day = "Workday"
-
-        hovertext = "{}<br>{}kg".format(day, weight)
-        hovertext_lst.append(hovertext)
-
     scatter.hoverinfo = "text+x"
-    scatter.hovertext = hovertext_lst
+    scatter.hovertext = create_value_hovertext(df.index, scatter.y, unit="kg")
 
     return fig
 
@@ -459,9 +394,13 @@ def weight_plot(df, new_approach=False):
 
 def wim_hof_breathing_plot(df):
     # 1. create figure
-    fig = df.iplot(mode="lines+markers", 
-                   title="Wim Hof Breathing Method", 
-                   asFigure=True)
+    traces = []
+    for column, color in zip(df.columns, trace_colors):
+        trace = create_scatter_trace(df[column], mode="lines+markers", color=color)
+        traces.append(trace)
+
+    layout = create_layout(title="Wim Hof Breathing Method")
+    fig = go.Figure(data=traces, layout=layout)
     
     # 2. customize figure
     # 2.1 create area plot
@@ -487,23 +426,15 @@ def wim_hof_breathing_plot(df):
     
     # 2.3 hoverinfo
     for scatter_trace in fig.data:
-        hovertext_lst = []
-        for total_seconds in scatter_trace.y:
-            minutes = total_seconds // 60
-            seconds = total_seconds - minutes * 60
-
-            hovertext = "{}min {:02}s".format(minutes, seconds)
-            hovertext_lst.append(hovertext)
-
         scatter_trace.hoverinfo = "text+x"
-        scatter_trace.hovertext = hovertext_lst
+        scatter_trace.hovertext = create_seconds_hovertext(scatter_trace.y)
         
     return fig
 
 
 
 
-def youtube_kpi_plot(df, youtube_kpi):
+def youtube_kpi_plot(df, youtube_kpi, x_range=None, start_date=None, end_date=None):
     
     # 1. prepare data and define required variables
     pandas_series = df[youtube_kpi]
@@ -513,19 +444,22 @@ def youtube_kpi_plot(df, youtube_kpi):
         title_y_axis = "Subscriber Count"
         goal = 100000
     else:
-        pandas_series = pandas_series.resample("M").sum()
-        pandas_series = pandas_series[:-1]                    # exclude last month because it's not a full month
+        pandas_series = determine_monthly_views(df)           # (excludes the last month, it's not a full month)
 
         title_y_axis = "Views per Month"
         goal_ad_revenue_per_month = 2000
         revenue_per_mille = 1 / 1000                          # $1 per 1,000 views
         goal = goal_ad_revenue_per_month / revenue_per_mille  # rpm * views = revenue
 
+    # only the selected dates and only as many points as can be displayed (see downsampling_functions.py)
+    # (the subscriber count depends on all previous days, so the series is sliced afterwards)
+    pandas_series = slice_date_range(pandas_series, start_date, end_date)
+    pandas_series = downsample(pandas_series, x_range=x_range)
+
     # 2. create figure
-    fig = pandas_series.iplot(title="YouTube KPIs",
-                              xTitle="Date",
-                              yTitle=title_y_axis, 
-                              asFigure=True)
+    trace = create_scatter_trace(pandas_series)
+    layout = create_layout(title="YouTube KPIs", x_title="Date", y_title=title_y_axis)
+    fig = go.Figure(data=[trace], layout=layout)
 
     
     # 3. customize figure
@@ -533,6 +467,8 @@ def youtube_kpi_plot(df, youtube_kpi):
     layout = fig.layout
     layout.height = 400
     layout.margin = {"l": 70, "r": 40, "t": 80, "b": 50}
+    if x_range is not None:
+        layout.xaxis.range = x_range
 
     # 3.2 legend
     legend = layout.legend
@@ -0,0 +1,193 @@
+import io
+import os
+import csv
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import gspread
+from gspread.urls import SPREADSHEETS_API_V4_BASE_URL
+from oauth2client.service_account import ServiceAccountCredentials
+
+from data_functions import data_files, determine_read_options, read_csv
+
+
+# 1. sheets
+# (every data file is a worksheet of one spreadsheet, named like the data, e.g. "habits",
+# and it contains the same columns as the CSV file, including the header row)
+sheet_ranges = OrderedDict((name, name) for name in data_files)
+
+scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+batch_get_url = SPREADSHEETS_API_V4_BASE_URL + "/%s/values:batchGet"
+
+
+# 2. Google Sheets API
+class SheetsClient:
+    # gets the values of several ranges of a spreadsheet with one request
+    # (over one authorized session that is reused for every request)
+
+    def __init__(self, spreadsheet_key, credentials=None, session=None):
+        self.spreadsheet_key = spreadsheet_key
+        self.credentials = credentials
+        self.client = gspread.Client(auth=credentials, session=session)
+        if credentials is not None:
+            self.client.login()
+
+    def batch_get(self, ranges):
+        # access tokens expire after an hour
+        if self.credentials is not None and self.credentials.access_token_expired:
+            self.client.login()
+
+        response = self.client.request("get", batch_get_url % self.spreadsheet_key,
+                                       params={"ranges": list(ranges), "majorDimension": "ROWS"})
+        value_ranges = response.json().get("valueRanges", [])
+
+        return [value_range.get("values", []) for value_range in value_ranges]
+
+
+def create_sheets_client(spreadsheet_key, credentials_file):
+    credentials = ServiceAccountCredentials.from_json_keyfile_name(credentials_file, scopes)
+
+    return SheetsClient(spreadsheet_key, credentials)
+
+
+# 2.1 in-process stand-in for the API
+# (answers the requests of "SheetsClient" like the Sheets API would, so it can be used without network access)
+class FakeSheetsSession:
+
+    def __init__(self, spreadsheet_key, tables):
+        self.spreadsheet_key = spreadsheet_key
+        self.tables = tables        # range -> rows (list of lists of strings, the first row is the header)
+        self.headers = {}
+        self.n_requests = 0
+
+    @classmethod
+    def from_data_dir(cls, spreadsheet_key, data_dir="data"):
+        tables = {}
+        for name, spec in data_files.items():
+            with open(os.path.join(data_dir, spec["file_name"]), newline="") as csv_file:
+                tables[sheet_ranges[name]] = [row for row in csv.reader(csv_file)]
+
+        return cls(spreadsheet_key, tables)
+
+    def get(self, url, params=None, **kwargs):
+        self.n_requests += 1
+        params = params or {}
+
+        if url != batch_get_url % self.spreadsheet_key:
+            return FakeResponse(404, {"error": {"code": 404, "message": "Requested entity was not found."}})
+
+        ranges = params.get("ranges", [])
+        if isinstance(ranges, str):
+            ranges = [ranges]
+        missing_ranges = [range_ for range_ in ranges if range_ not in self.tables]
+        if missing_ranges:
+            return FakeResponse(400, {"error": {"code": 400,
+                                                "message": "Unable to parse range: {}".format(missing_ranges[0])}})
+
+        value_ranges = []
+        for range_ in ranges:
+            # like the API, trailing empty cells are left out
+            rows = [_strip_trailing_empty_cells(row) for row in self.tables[range_]]
+            value_ranges.append({"range": range_, "majorDimension": "ROWS", "values": rows})
+
+        return FakeResponse(200, {"spreadsheetId": self.spreadsheet_key, "valueRanges": value_ranges})
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.text = json.dumps(body)
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+def _strip_trailing_empty_cells(row):
+    row = list(row)
+    while row and row[-1] == "":
+        row.pop()
+
+    return row
+
+
+# 3. data source
+class SheetsDataSource:
+    # all sheets are fetched with one batched request and kept until the next refresh,
+    # which happens in a background thread every "ttl" seconds (so requests to the app never wait for the network)
+    # and only changed data is passed to "on_refresh" (which is responsible for publishing it)
+
+    def __init__(self, client, ttl=300, on_refresh=None, ranges=sheet_ranges):
+        self.client = client
+        self.ttl = ttl
+        self.on_refresh = on_refresh
+        self.ranges = ranges
+
+        self.data = None
+        self.version = None
+        self.fetched_at = None
+        self._table_hashes = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        # first load (blocks until the data is there)
+        self.refresh()
+
+        return self.data
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name="sheets-refresher", daemon=True)
+        thread.start()
+
+        return thread
+
+    def _run(self):
+        while True:
+            time.sleep(self.ttl)
+            try:
+                if self.refresh() and self.on_refresh is not None:
+                    self.on_refresh(self.data, self.version)
+            except Exception as error:
+                # the app keeps running with the current data
+                print("Warning! Refreshing the data from Google Sheets failed: {!r}".format(error))
+
+    def refresh(self):
+        # returns True if the data changed
+        with self._lock:
+            tables = self.client.batch_get(self.ranges.values())
+            self.fetched_at = time.time()
+
+            # 3.1 only changed sheets are parsed again
+            # (the frames of the other sheets are shared with the current data, they are never modified)
+            data = OrderedDict()
+            table_hashes = {}
+            for name, rows in zip(self.ranges, tables):
+                table_hashes[name] = hashlib.sha1(json.dumps(rows).encode()).hexdigest()
+                if self.data is not None and table_hashes[name] == self._table_hashes.get(name):
+                    data[name] = self.data[name]
+                else:
+                    data[name] = values_to_frame(rows, data_files[name])
+
+            if table_hashes == self._table_hashes:
+                return False
+
+            # 3.2 new data
+            self.data = data
+            self.version = ("sheets", hashlib.sha1(json.dumps(sorted(table_hashes.items())).encode()).hexdigest())
+            self._table_hashes = table_hashes
+
+            return True
+
+
+def values_to_frame(rows, spec):
+    # the values are parsed exactly like the CSV files (see "read_csv" in data_functions.py)
+    text = io.StringIO()
+    csv.writer(text).writerows(rows)
+    text.seek(0)
+
+    return read_csv(text, **determine_read_options(spec))
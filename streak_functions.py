@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+
+# 1. streaks of all habits at once
+# (a day counts towards a streak if its value is not 0, habits are usually already stored as bool)
+def find_runs(done):
+    n_days, n_habits = done.shape
+
+    # a streak starts where the (zero-padded) values go from 0 to 1 and ends where they go from 1 to 0
+    padded = np.zeros((n_days + 2, n_habits), dtype=np.int8)
+    padded[1:-1] = done
+    changes = np.diff(padded, axis=0).T                     # shape: (n_habits, n_days + 1)
+
+    habit_positions, start_positions = np.nonzero(changes == 1)
+    _, end_positions = np.nonzero(changes == -1)            # end positions are exclusive
+    lengths = end_positions - start_positions
+
+    return habit_positions, start_positions, lengths
+
+
+def determine_streak_runs(df):
+    habit_positions, start_positions, lengths = find_runs(df.values.astype(bool, copy=False))
+
+    df_runs = pd.DataFrame({"habit": df.columns.values[habit_positions],
+                            "start": df.index.values[start_positions],
+                            "end": df.index.values[start_positions + lengths - 1],
+                            "length": lengths},
+                           columns=["habit", "start", "end", "length"])
+
+    return df_runs
+
+
+class StreakTracker:
+    # streak statistics of every habit, which can be updated day by day
+    # (appending a day only touches the running counters, not the whole history)
+
+    def __init__(self, df):
+        self.habits = list(df.columns)
+        done = df.values.astype(bool, copy=False)
+        n_habits = len(self.habits)
+
+        # 1.1 runs of all habits (starting date and length of every streak)
+        habit_positions, start_positions, lengths = find_runs(done)
+        start_dates = df.index.values[start_positions].astype("datetime64[ns]")
+        split_positions = np.cumsum(np.bincount(habit_positions, minlength=n_habits))[:-1]
+
+        self.run_starts = {}
+        self.run_lengths = {}
+        for habit, habit_start_dates, habit_lengths in zip(self.habits,
+                                                           np.split(start_dates, split_positions),
+                                                           np.split(lengths, split_positions)):
+            self.run_starts[habit] = list(habit_start_dates)
+            self.run_lengths[habit] = habit_lengths.tolist()
+
+        # 1.2 counters
+        self.n_days = len(df)
+        self.n_days_done = done.sum(axis=0)
+        self.trailing_streak = np.zeros(n_habits, dtype=int)      # 0 if the habit wasn't done on the last day
+        self.last_streak = np.zeros(n_habits, dtype=int)          # most recent streak (even if it is already over)
+        self.longest_streak = np.zeros(n_habits, dtype=int)
+
+        for i, habit in enumerate(self.habits):
+            habit_lengths = self.run_lengths[habit]
+            if habit_lengths:
+                self.last_streak[i] = habit_lengths[-1]
+                self.longest_streak[i] = max(habit_lengths)
+                if done[-1, i]:
+                    self.trailing_streak[i] = habit_lengths[-1]
+
+    def copy(self):
+        tracker = StreakTracker.__new__(StreakTracker)
+        tracker.habits = self.habits
+        tracker.run_starts = {habit: list(starts) for habit, starts in self.run_starts.items()}
+        tracker.run_lengths = {habit: list(lengths) for habit, lengths in self.run_lengths.items()}
+        tracker.n_days = self.n_days
+        tracker.n_days_done = self.n_days_done.copy()
+        tracker.trailing_streak = self.trailing_streak.copy()
+        tracker.last_streak = self.last_streak.copy()
+        tracker.longest_streak = self.longest_streak.copy()
+
+        return tracker
+
+    # 2. incremental updates
+    def append_day(self, date, values):
+        done = np.asarray(values).astype(bool, copy=False)
+
+        self.trailing_streak = np.where(done, self.trailing_streak + 1, 0)
+        self.last_streak = np.where(done, self.trailing_streak, self.last_streak)
+        self.longest_streak = np.maximum(self.longest_streak, self.trailing_streak)
+        self.n_days_done = self.n_days_done + done
+        self.n_days += 1
+
+        for i in np.flatnonzero(done):
+            habit = self.habits[i]
+            if self.trailing_streak[i] == 1:
+                self.run_starts[habit].append(np.datetime64(pd.Timestamp(date), "ns"))
+                self.run_lengths[habit].append(1)
+            else:
+                self.run_lengths[habit][-1] += 1
+
+    def append_days(self, df):
+        # e.g. the rows that were appended to "habits.csv"
+        for date, values in zip(df.index, df[self.habits].values):
+            self.append_day(date, values)
+
+    # 3. results
+    def determine_statistics(self):
+        if self.n_days > 0:
+            completion_rate = self.n_days_done / self.n_days
+        else:
+            completion_rate = np.zeros(len(self.habits))
+
+        df_statistics = pd.DataFrame({"current_streak": self.last_streak,
+                                      "longest_streak": self.longest_streak,
+                                      "completion_rate": completion_rate},
+                                     index=self.habits,
+                                     columns=["current_streak", "longest_streak", "completion_rate"])
+
+        return df_statistics
+
+    def determine_runs(self, habit):
+        df_runs = pd.DataFrame({"start": np.array(self.run_starts[habit], dtype="datetime64[ns]"),
+                                "length": np.array(self.run_lengths[habit], dtype=int)},
+                               columns=["start", "length"])
+
+        return df_runs
+
+    def current_streak(self, habit):
+        return int(self.last_streak[self.habits.index(habit)])
@@ -0,0 +1,245 @@
+import os
+import re
+import sys
+import json
+import time
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import flask
+
+from caching_functions import FigureCache, PageCache
+from data_functions import DataReloader, determine_loaded_data_version, load_data
+
+
+# 1. configuration of a tenant
+# (every user of the dashboard is a tenant with a directory "tenants/<name>/", which contains the CSV files
+# in "data/", optionally the photos for the weight page in "images/"
+# and optionally a "config.json" that overrides the values below, e.g. {"name": "...", "goals": {"weight": 70}})
+# (the dates of the default tenant are in "config.json" of the app, the dates of the other tenants are
+# derived from their data unless they are set in their "config.json")
+default_config = {
+    "name": "Sebastian Mantey",
+    "header_image_source": "https://raw.githubusercontent.com/SebastianMantey/Personal_Dashboard/master/images/header%20image.png",
+    "weight_image_source": None,    # e.g. "https://.../{}.JPG" (None: photos in "images/", see image_functions.py)
+    "weight_old_approach_end_date": None,       # None: there is no old approach, all weights are shown as new
+    "weight_new_approach_start_date": None,     # None: from the first weight on
+    "habit_calendar_start_dates": {},           # habit -> first day of its calendar (default: first day of the data)
+    "goals": {
+        "subscribers": 100000,
+        "videos": 100,
+        "weight": 85,
+        "self_discipline": 100,
+        "cold_shower": 100,
+        "omad": 21,
+        "lucid_dreaming": 30,
+        "ab_workout": 100
+    }
+}
+
+# (tenant names are used as directory names and as the first part of the URL)
+tenant_name_pattern = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]*$")
+
+
+def load_tenant_config(config_path):
+    # (values that are dicts, e.g. the goals, are merged with the defaults)
+    config = {key: dict(value) if isinstance(value, dict) else value for key, value in default_config.items()}
+    if os.path.exists(config_path):
+        with open(config_path) as config_file:
+            tenant_config = json.load(config_file)
+        for key, value in tenant_config.items():
+            if isinstance(config.get(key), dict):
+                config[key].update(value)
+            else:
+                config[key] = value
+
+    return config
+
+
+# 2. tenants
+# what the callbacks need to answer a request of a tenant
+TenantState = namedtuple("TenantState", ["dataset", "figure_cache", "page_cache"])
+
+
+class Tenant:
+    # data, pages and figures of one tenant
+    # (the dataset is only loaded when the tenant is requested and it is dropped again
+    # when the memory budget of all tenants is exceeded, see TenantRegistry)
+
+    def __init__(self, name, tenant_dir, page_builders, figure_cache_bytes):
+        self.name = name
+        self.data_dir = os.path.join(tenant_dir, "data")
+        self.config_path = os.path.join(tenant_dir, "config.json")
+        self.page_cache = PageCache(page_builders)
+        self.figure_cache = FigureCache(max_bytes=figure_cache_bytes)
+
+        self.dataset = None
+        self.data_reloader = None
+        self.n_bytes = 0            # memory of the dataset (see determine_dataset_size)
+        self.last_used = 0.0
+        self.last_checked = 0.0     # last time the CSV files were checked for changes
+        self.lock = threading.Lock()
+
+    def determine_memory_usage(self):
+        return self.n_bytes + self.figure_cache.n_bytes + self.page_cache.n_bytes
+
+    def unload(self):
+        with self.lock:
+            self.dataset = None
+            self.data_reloader = None
+            self.n_bytes = 0
+            self.figure_cache.clear()
+            self.page_cache.clear()
+
+
+class TenantRegistry:
+    # serves the tenants in "tenants_dir" at "/<tenant>/<page>" (all other URLs belong to the default tenant)
+    # - tenants are discovered when they are requested, so new ones can be added while the app is running
+    # - the CSV files are checked for changes when a tenant is requested (at most every "reload_interval" seconds),
+    #   instead of with one background thread per tenant
+    # - if the data and figures of all loaded tenants take up more than "memory_budget" bytes,
+    #   the least recently used tenants are unloaded (and loaded again from the binary cache when they are requested)
+
+    def __init__(self, tenants_dir, create_dataset, page_builders, memory_budget=512 * 1024 ** 2,
+                 figure_cache_bytes=8 * 1024 ** 2, reload_interval=60):
+        self.tenants_dir = tenants_dir
+        self.create_dataset = create_dataset      # (data, data_version, previous_dataset, config) -> Dataset
+        self.page_builders = page_builders
+        self.memory_budget = memory_budget
+        self.figure_cache_bytes = figure_cache_bytes
+        self.reload_interval = reload_interval
+
+        self.n_loads = 0
+        self.n_evictions = 0
+
+        self._tenants = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, server):
+        server.before_request(self._redirect_to_tenant_root)
+
+    def _redirect_to_tenant_root(self):
+        # "/<tenant>" -> "/<tenant>/"
+        # (the links to the pages are relative, so that they stay within the pages of the tenant)
+        if flask.request.method == "GET":
+            path = flask.request.path
+            if path.count("/") == 1 and self.exists(path[1:]):
+                return flask.redirect(flask.request.script_root + path + "/")
+
+    # 2.1 URLs
+    def exists(self, name):
+        if name in self._tenants:
+            return True
+        if not tenant_name_pattern.match(name) or name in self.page_builders:
+            return False
+
+        return os.path.isdir(os.path.join(self.tenants_dir, name, "data"))
+
+    def split_pathname(self, pathname):
+        # "/<tenant>/<page>" -> (tenant, page), "/<page>" -> (None, page)
+        segments = [segment for segment in (pathname or "").split("/") if segment]
+        if segments and self.exists(segments[0]):
+            return segments[0], "/".join(segments[1:])
+
+        return None, "/".join(segments)
+
+    # 2.2 data of a tenant
+    def get(self, name):
+        tenant = self._get_tenant(name)
+        with tenant.lock:
+            now = time.time()
+            if tenant.dataset is None:
+                self._load(tenant)
+            elif self.reload_interval > 0 and now - tenant.last_checked > self.reload_interval:
+                tenant.last_checked = now
+                try:
+                    tenant.data_reloader.check_for_changes()
+                except Exception as error:
+                    # the tenant keeps the current data
+                    print("Warning! Reloading the data of tenant {!r} failed: {!r}".format(name, error))
+
+            tenant.last_used = now
+            state = TenantState(tenant.dataset, tenant.figure_cache, tenant.page_cache)
+
+        self._enforce_memory_budget(keep=tenant)
+
+        return state
+
+    def _get_tenant(self, name):
+        with self._lock:
+            if name not in self._tenants:
+                if not self.exists(name):
+                    raise KeyError(name)
+                self._tenants[name] = Tenant(name, os.path.join(self.tenants_dir, name), self.page_builders,
+                                             self.figure_cache_bytes)
+
+            return self._tenants[name]
+
+    def _load(self, tenant):
+        data, file_states = load_data(tenant.data_dir)
+        config = load_tenant_config(tenant.config_path)
+        data_version = determine_loaded_data_version(tenant.data_dir, file_states)
+
+        tenant.dataset = self.create_dataset(data, data_version, None, config)
+        tenant.figure_cache.set_data_version(tenant.dataset.version)
+        tenant.n_bytes = determine_dataset_size(tenant.dataset)
+        tenant.last_checked = time.time()
+
+        def publish_data(data, data_version):
+            # (called by "check_for_changes" while the lock of the tenant is held)
+            tenant.dataset = self.create_dataset(data, data_version, tenant.dataset, tenant.dataset.config)
+            tenant.figure_cache.set_data_version(tenant.dataset.version)
+            tenant.n_bytes = determine_dataset_size(tenant.dataset)
+
+        tenant.data_reloader = DataReloader(tenant.data_dir, data, file_states, on_reload=publish_data,
+                                            interval=self.reload_interval)
+        self.n_loads += 1
+
+    # 2.3 memory budget
+    def determine_memory_usage(self):
+        with self._lock:
+            return sum(tenant.determine_memory_usage() for tenant in self._tenants.values())
+
+    def _enforce_memory_budget(self, keep):
+        with self._lock:
+            loaded_tenants = [tenant for tenant in self._tenants.values()
+                              if tenant.dataset is not None and tenant is not keep]
+            n_bytes = sum(tenant.determine_memory_usage() for tenant in self._tenants.values())
+
+            for tenant in sorted(loaded_tenants, key=lambda tenant: tenant.last_used):
+                if n_bytes <= self.memory_budget:
+                    break
+                n_bytes -= tenant.determine_memory_usage()
+                tenant.unload()
+                self.n_evictions += 1
+
+
+def determine_dataset_size(dataset):
+    # memory of the data frames and of the values derived from them
+    # (e.g. TimeTrackingIndex, DailyTaskMinutes, RollingAverages, StreakTracker and the aggregates of the API),
+    # objects that are referenced more than once are only counted once
+    return _determine_size(dataset, seen=set())
+
+
+def _determine_size(value, seen):
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_determine_size(key, seen) + _determine_size(item, seen)
+                                          for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_determine_size(item, seen) for item in value)
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + _determine_size(vars(value), seen)
+
+    return sys.getsizeof(value)
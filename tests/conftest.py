@@ -0,0 +1,44 @@
+import os
+import sys
+import shutil
+
+import pytest
+
+# the modules of the app are imported from the root of the repository
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+
+from data_functions import data_files
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    # copy of the CSV files in "data/" (so that the tests can append rows to them)
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for spec in data_files.values():
+        shutil.copy(os.path.join(root_dir, "data", spec["file_name"]), str(data_dir))
+
+    return str(data_dir)
+
+
+def split_csv(file_path, n_rows):
+    # header with the first "n_rows" rows, and the remaining rows
+    with open(file_path, "rb") as csv_file:
+        lines = csv_file.readlines()
+
+    return b"".join(lines[:n_rows + 1]), b"".join(lines[n_rows + 1:])
+
+
+def truncate_csv(file_path, n_rows):
+    # keeps the first "n_rows" rows and returns the others (to append them later)
+    head, tail = split_csv(file_path, n_rows)
+    with open(file_path, "wb") as csv_file:
+        csv_file.write(head)
+
+    return tail
+
+
+def append_to_csv(file_path, content):
+    with open(file_path, "ab") as csv_file:
+        csv_file.write(content)
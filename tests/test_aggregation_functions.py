@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import root_dir
+from data_functions import data_files, determine_read_options, read_csv
+from aggregation_functions import RollingAverages, DailyTaskMinutes
+
+
+def load_test_data(name):
+    spec = data_files[name]
+    return read_csv(os.path.join(root_dir, "data", spec["file_name"]), **determine_read_options(spec))
+
+
+# 1. rolling averages
+@pytest.fixture
+def deep_work():
+    # (with some missing days, which make the windows that contain them missing, too)
+    deep_work = load_test_data("deep_work")["Deep Work"].copy()
+    deep_work.iloc[[40, 41, 200]] = np.nan
+
+    return deep_work
+
+
+def check_same_rolling_averages(rolling_averages, expected_rolling_averages, windows):
+    pd.testing.assert_series_equal(rolling_averages.series, expected_rolling_averages.series)
+    for window in windows:
+        pd.testing.assert_series_equal(rolling_averages.determine_rolling_average(window),
+                                       expected_rolling_averages.determine_rolling_average(window))
+        pd.testing.assert_series_equal(rolling_averages.determine_rolling_average(window, "2019-03-01", "2019-06-30"),
+                                       expected_rolling_averages.determine_rolling_average(window, "2019-03-01",
+                                                                                           "2019-06-30"))
+
+
+def test_rolling_averages_are_the_same_as_pandas(deep_work):
+    rolling_averages = RollingAverages(deep_work, windows=(7, 30, 90))
+    for window in [1, 7, 30, 45, 90]:
+        pd.testing.assert_series_equal(rolling_averages.determine_rolling_average(window),
+                                       deep_work.rolling(window).mean())
+
+
+# extending gives the same rolling averages as computing them for all days
+@pytest.mark.parametrize("n_days", [1, 5, 89, 200, 394])
+def test_extend(deep_work, n_days):
+    windows = (7, 30, 90)
+    rolling_averages = RollingAverages(deep_work.iloc[:n_days], windows=windows).extend(deep_work.iloc[n_days:])
+
+    check_same_rolling_averages(rolling_averages, RollingAverages(deep_work, windows=windows), windows + (45,))
+
+
+def test_extend_day_by_day(deep_work):
+    windows = (7, 30, 90)
+    rolling_averages = RollingAverages(deep_work.iloc[:1], windows=windows)
+    for n_days in range(1, len(deep_work)):
+        previous_rolling_averages = rolling_averages
+        rolling_averages = rolling_averages.extend(deep_work.iloc[n_days:n_days + 1])
+
+    # (the rolling averages of the previous dataset don't change)
+    check_same_rolling_averages(previous_rolling_averages, RollingAverages(deep_work.iloc[:-1], windows=windows),
+                                windows)
+    check_same_rolling_averages(rolling_averages, RollingAverages(deep_work, windows=windows), windows)
+
+
+# 2. time spent per day and task
+@pytest.fixture
+def df_time_tracking():
+    return load_test_data("time_tracking")
+
+
+def check_same_task_minutes(daily_task_minutes, expected_daily_task_minutes):
+    assert daily_task_minutes.tasks == expected_daily_task_minutes.tasks
+    assert daily_task_minutes.first_date == expected_daily_task_minutes.first_date
+    assert np.array_equal(daily_task_minutes.minutes, expected_daily_task_minutes.minutes)
+    pd.testing.assert_index_equal(daily_task_minutes.dates, expected_daily_task_minutes.dates)
+    pd.testing.assert_series_equal(daily_task_minutes.get_days("2019-02-04", n_days=7),
+                                   expected_daily_task_minutes.get_days("2019-02-04", n_days=7))
+
+
+@pytest.mark.parametrize("n_rows", [1, 100, 500, 888])
+def test_extend_task_minutes(df_time_tracking, n_rows):
+    tasks = ["Deep Work", "Sleep"]      # the other tasks are added when they occur
+    daily_task_minutes = DailyTaskMinutes(df_time_tracking.iloc[:n_rows], tasks=tasks)
+    daily_task_minutes = daily_task_minutes.extend(df_time_tracking.iloc[n_rows:])
+
+    check_same_task_minutes(daily_task_minutes, DailyTaskMinutes(df_time_tracking, tasks=tasks))
+
+
+def test_extend_task_minutes_with_earlier_days(df_time_tracking):
+    # (the table is shifted, if time entries are added for days before the first day)
+    tasks = ["Deep Work"]
+    daily_task_minutes = DailyTaskMinutes(df_time_tracking.iloc[500:], tasks=tasks)
+    extended_daily_task_minutes = daily_task_minutes.extend(df_time_tracking.iloc[:500])
+
+    check_same_task_minutes(extended_daily_task_minutes, DailyTaskMinutes(df_time_tracking, tasks=tasks))
+    check_same_task_minutes(daily_task_minutes, DailyTaskMinutes(df_time_tracking.iloc[500:], tasks=tasks))
+
+
+def test_extend_empty_task_minutes(df_time_tracking):
+    daily_task_minutes = DailyTaskMinutes(df_time_tracking.iloc[:0]).extend(df_time_tracking)
+
+    check_same_task_minutes(daily_task_minutes, DailyTaskMinutes(df_time_tracking))
+    pd.testing.assert_frame_equal(daily_task_minutes.determine_rollup("W"),
+                                  DailyTaskMinutes(df_time_tracking).determine_rollup("W"))
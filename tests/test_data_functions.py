@@ -0,0 +1,110 @@
+import os
+
+import pandas as pd
+
+from conftest import truncate_csv, append_to_csv
+from data_functions import (data_files, determine_read_options, load_data, read_csv, read_csv_tail,
+                            DataReloader)
+
+
+# 1. only parsing the appended rows gives the same data frame as parsing the whole file
+def check_read_csv_tail(data_dir, name, n_rows):
+    spec = data_files[name]
+    read_options = determine_read_options(spec)
+    file_path = os.path.join(data_dir, spec["file_name"])
+
+    tail = truncate_csv(file_path, n_rows)
+    df = read_csv(file_path, **read_options)
+    offset = os.path.getsize(file_path)
+    append_to_csv(file_path, tail)
+
+    df_tail = read_csv_tail(file_path, df, offset, os.path.getsize(file_path), **read_options)
+    pd.testing.assert_frame_equal(df_tail, read_csv(file_path, **read_options))
+
+
+def test_read_csv_tail_with_date_index(data_dir):
+    check_read_csv_tail(data_dir, "habits", n_rows=100)
+
+
+def test_read_csv_tail_with_flags(data_dir):
+    check_read_csv_tail(data_dir, "video_uploads_2019", n_rows=100)
+
+
+def test_read_csv_tail_with_categoricals_and_minutes(data_dir):
+    # (without an index column, the appended rows continue the numbering)
+    check_read_csv_tail(data_dir, "time_tracking", n_rows=500)
+
+
+def test_read_csv_tail_leaves_out_unfinished_row(data_dir):
+    spec = data_files["habits"]
+    read_options = determine_read_options(spec)
+    file_path = os.path.join(data_dir, spec["file_name"])
+
+    tail = truncate_csv(file_path, 100)
+    df = read_csv(file_path, **read_options)
+    offset = os.path.getsize(file_path)
+    append_to_csv(file_path, tail[:-5])
+
+    df_tail = read_csv_tail(file_path, df, offset, os.path.getsize(file_path), **read_options)
+    pd.testing.assert_frame_equal(df_tail, read_csv(file_path, **read_options).iloc[:-1])
+
+
+# 2. the reloaded data is the same as the data of a full load
+def check_reloaded_data(data_dir, reloader):
+    data, _ = load_data(data_dir, cache_dir=os.path.join(data_dir, ".fresh_cache"))
+    for name in data_files:
+        pd.testing.assert_frame_equal(reloader.data[name], data[name])
+
+
+def test_reloader_parses_appended_rows(data_dir):
+    truncated_files = {name: os.path.join(data_dir, data_files[name]["file_name"])
+                       for name in ["habits", "deep_work", "time_tracking"]}
+    tails = {name: truncate_csv(file_path, 50) for name, file_path in truncated_files.items()}
+
+    data, file_states = load_data(data_dir)
+    reloaded = []
+    reloader = DataReloader(data_dir, data, file_states, on_reload=lambda data, version: reloaded.append(version))
+    assert not reloader.check_for_changes()
+
+    for name, file_path in truncated_files.items():
+        append_to_csv(file_path, tails[name])
+    assert reloader.check_for_changes()
+    assert len(reloaded) == 1
+
+    # (the frames of the other files are not parsed again)
+    assert reloader.data["weight"] is data["weight"]
+    check_reloaded_data(data_dir, reloader)
+
+    # the cache that is written for the appended rows is used by the next start of the app
+    data, _ = load_data(data_dir)
+    for name in data_files:
+        pd.testing.assert_frame_equal(data[name], reloader.data[name])
+
+
+def test_reloader_keeps_rows_appended_before_it_starts(data_dir):
+    # (rows appended between "load_data" and the start of the reloader are not part of the loaded data)
+    file_path = os.path.join(data_dir, data_files["habits"]["file_name"])
+    tail = truncate_csv(file_path, 50)
+
+    data, file_states = load_data(data_dir)
+    append_to_csv(file_path, tail)
+    reloader = DataReloader(data_dir, data, file_states, on_reload=lambda data, version: None)
+
+    assert reloader.check_for_changes()
+    check_reloaded_data(data_dir, reloader)
+
+
+def test_reloader_parses_changed_file_again(data_dir):
+    file_path = os.path.join(data_dir, data_files["weight"]["file_name"])
+
+    data, file_states = load_data(data_dir)
+    reloader = DataReloader(data_dir, data, file_states, on_reload=lambda data, version: None)
+    # (the weight of the first day is corrected)
+    with open(file_path) as csv_file:
+        content = csv_file.read()
+    with open(file_path, "w") as csv_file:
+        csv_file.write(content.replace("2018-10-29,92.5,91.5,90.5,91.3", "2018-10-29,92.5,91.5,90.5,91.2"))
+
+    assert reloader.check_for_changes()
+    check_reloaded_data(data_dir, reloader)
+    assert reloader.data["weight"]["actual"].iloc[0] == 91.2
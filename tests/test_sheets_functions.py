@@ -0,0 +1,70 @@
+import os
+
+import pandas as pd
+import pytest
+from gspread.exceptions import APIError
+
+from conftest import root_dir
+from data_functions import data_files, load_data
+from sheets_functions import FakeSheetsSession, SheetsClient, SheetsDataSource, sheet_ranges
+
+
+@pytest.fixture
+def session():
+    return FakeSheetsSession.from_data_dir("test-spreadsheet", os.path.join(root_dir, "data"))
+
+
+@pytest.fixture
+def data_source(session):
+    return SheetsDataSource(SheetsClient("test-spreadsheet", session=session))
+
+
+# the sheets are parsed exactly like the CSV files
+def test_load(data_source, session, tmp_path):
+    data = data_source.load()
+    expected_data, _ = load_data(os.path.join(root_dir, "data"), cache_dir=str(tmp_path))
+
+    assert list(data) == list(data_files)
+    for name in data_files:
+        pd.testing.assert_frame_equal(data[name], expected_data[name])
+
+    # (all sheets are fetched with one request)
+    assert session.n_requests == 1
+
+
+def test_refresh_without_changes(data_source, session):
+    data = data_source.load()
+    version = data_source.version
+
+    assert not data_source.refresh()
+    assert data_source.data is data
+    assert data_source.version == version
+    assert session.n_requests == 2
+
+
+def test_refresh_parses_only_changed_sheets(data_source, session):
+    data = data_source.load()
+    version = data_source.version
+
+    habits = session.tables[sheet_ranges["habits"]]
+    habits.append(["2019-07-04", "1", "0", "1", "1", "0"])
+    assert data_source.refresh()
+
+    assert data_source.version != version
+    assert len(data_source.data["habits"]) == len(data["habits"]) + 1
+    pd.testing.assert_frame_equal(data_source.data["habits"].iloc[:-1], data["habits"])
+    assert data_source.data["habits"].iloc[-1].tolist() == [True, False, True, True, False]
+    for name in data_files:
+        if name != "habits":
+            assert data_source.data[name] is data[name]
+
+    # (the data that was loaded before doesn't change)
+    assert len(data["habits"]) == len(habits) - 2
+
+
+def test_unknown_spreadsheet(session):
+    data_source = SheetsDataSource(SheetsClient("other-spreadsheet", session=session))
+
+    with pytest.raises(APIError):
+        data_source.load()
+    assert data_source.data is None
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import root_dir
+from data_functions import data_files, determine_read_options, read_csv
+from streak_functions import StreakTracker
+
+
+@pytest.fixture
+def df_habits():
+    spec = data_files["habits"]
+    return read_csv(os.path.join(root_dir, "data", spec["file_name"]), **determine_read_options(spec))
+
+
+def check_same_streaks(streak_tracker, expected_streak_tracker):
+    pd.testing.assert_frame_equal(streak_tracker.determine_statistics(),
+                                  expected_streak_tracker.determine_statistics())
+    for habit in expected_streak_tracker.habits:
+        pd.testing.assert_frame_equal(streak_tracker.determine_runs(habit),
+                                      expected_streak_tracker.determine_runs(habit))
+        assert streak_tracker.current_streak(habit) == expected_streak_tracker.current_streak(habit)
+
+
+# appending days gives the same streaks as building the tracker from all days
+@pytest.mark.parametrize("n_days", [1, 30, 120, 242])
+def test_append_days(df_habits, n_days):
+    streak_tracker = StreakTracker(df_habits.iloc[:n_days])
+    streak_tracker.append_days(df_habits.iloc[n_days:])
+
+    check_same_streaks(streak_tracker, StreakTracker(df_habits))
+
+
+def test_append_days_one_by_one(df_habits):
+    streak_tracker = StreakTracker(df_habits.iloc[:1])
+    for n_days in range(1, len(df_habits)):
+        streak_tracker.append_days(df_habits.iloc[n_days:n_days + 1])
+
+    check_same_streaks(streak_tracker, StreakTracker(df_habits))
+
+
+def test_append_days_to_copy(df_habits):
+    # (the tracker of the previous dataset doesn't change)
+    streak_tracker = StreakTracker(df_habits.iloc[:100])
+    copied_streak_tracker = streak_tracker.copy()
+    copied_streak_tracker.append_days(df_habits.iloc[100:])
+
+    check_same_streaks(streak_tracker, StreakTracker(df_habits.iloc[:100]))
+    check_same_streaks(copied_streak_tracker, StreakTracker(df_habits))
+
+
+def test_streaks_that_end_on_the_last_day():
+    dates = pd.date_range("2019-01-01", periods=6, name="date")
+    df = pd.DataFrame({"a": [1, 1, 0, 1, 1, 1], "b": [0, 0, 0, 0, 0, 0], "c": [1, 1, 1, 1, 1, 0]},
+                      index=dates).astype(bool)
+
+    streak_tracker = StreakTracker(df.iloc[:2])
+    streak_tracker.append_days(df.iloc[2:])
+
+    check_same_streaks(streak_tracker, StreakTracker(df))
+    assert np.array_equal(streak_tracker.determine_statistics().current_streak.values, [3, 0, 5])